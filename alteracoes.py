@@ -0,0 +1,67 @@
+import json
+
+from database import get_db_connection
+
+# --- Leitura do Log de Alterações ---
+# Os gatilhos criados em setup_database.criar_log_alteracoes acrescentam uma linha a
+# 'log_alteracoes' por cada linha inserida, alterada ou apagada nas tabelas auditadas.
+# Cada registo tem um número de sequência crescente ('seq'): um consumidor (cache,
+# backup incremental, índice de pesquisa, sincronização externa) guarda o último seq
+# que processou e pede só o que veio depois, em vez de voltar a ler as tabelas.
+#
+# Uso:
+#     seq = 0
+#     for alteracao in alteracoes_desde(seq, tabelas=('aparelhos',)):
+#         ...  # ex: recarregar o aparelho alteracao['linha_id']
+#         seq = alteracao['seq']
+
+OPERACOES = {'I': 'Inserção', 'U': 'Alteração', 'D': 'Remoção'}
+
+def _para_dict(linha):
+    alteracao = dict(linha)
+    alteracao['colunas'] = json.loads(alteracao['colunas']) if alteracao['colunas'] else []
+    return alteracao
+
+def alteracoes_desde(seq=0, tabelas=None, limite=1000):
+    """
+    Alterações com número de sequência maior que 'seq', pela ordem em que foram feitas
+    (no máximo 'limite'; chame de novo com o último seq recebido para continuar).
+    """
+    sql = "SELECT seq, tabela, linha_id, operacao, colunas, data_alteracao, utilizador FROM log_alteracoes WHERE seq > ?"
+    params = [seq]
+    if tabelas:
+        sql += f" AND tabela IN ({', '.join('?' for _ in tabelas)})"
+        params.extend(tabelas)
+    sql += " ORDER BY seq LIMIT ?"
+    params.append(limite)
+    conn = get_db_connection()
+    linhas = conn.execute(sql, params).fetchall()
+    conn.close()
+    return [_para_dict(linha) for linha in linhas]
+
+def ultima_sequencia():
+    """Número de sequência da alteração mais recente (0 se o log estiver vazio)."""
+    conn = get_db_connection()
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM log_alteracoes").fetchone()[0]
+    conn.close()
+    return seq
+
+def historico_da_linha(tabela, linha_id):
+    """Todas as alterações registadas para uma linha, da mais antiga para a mais recente."""
+    conn = get_db_connection()
+    linhas = conn.execute(
+        "SELECT seq, tabela, linha_id, operacao, colunas, data_alteracao, utilizador FROM log_alteracoes WHERE tabela = ? AND linha_id = ? ORDER BY seq",
+        (tabela, linha_id)
+    ).fetchall()
+    conn.close()
+    return [_para_dict(linha) for linha in linhas]
+
+def purgar_ate(seq):
+    """Apaga as alterações até 'seq' (inclusive), depois de todos os consumidores as terem processado."""
+    conn = get_db_connection()
+    # Identifica a conexão como purga perante o gatilho trg_log_alteracoes_sem_remocao
+    conn.create_function('purga_log_alteracoes', 0, lambda: 1)
+    apagadas = conn.execute("DELETE FROM log_alteracoes WHERE seq <= ?", (seq,)).rowcount
+    conn.commit()
+    conn.close()
+    return apagadas
@@ -0,0 +1,131 @@
+from datetime import date
+
+import pandas as pd
+
+from catalogo import cache_por_versao
+
+# --- Análise de Manutenções ---
+# Indicadores calculados sobre todo o histórico de 'manutencoes': tempo de retorno
+# por fornecedor (percentis), envelhecimento das O.S. abertas face ao SLA, custo por
+# modelo e por setor, reincidência de falhas e tempo médio entre falhas (MTBF) por
+# aparelho. Uma única consulta (com funções de janela para a falha anterior de cada
+# aparelho) carrega as manutenções; o resto são agregações vetorizadas do pandas,
+# agrupadas pelo 'fornecedor_id' (inteiro) e não pelo nome em texto livre.
+#
+# O resultado fica em cache por processo e só é recalculado quando a versão de
+# 'manutencoes' (ou das tabelas de referência) em 'versoes_tabelas' muda, ou no dia
+# seguinte, porque a idade das O.S. abertas conta até hoje.
+
+DEPENDENCIAS = ('manutencoes', 'fornecedores', 'modelos', 'marcas', 'setores')
+
+SLA_DIAS = 5 # O mesmo limite do alerta de manutenções atrasadas do dashboard
+FAIXAS_IDADE = [-1, SLA_DIAS, 15, 30, float('inf')]
+ROTULOS_IDADE = [f"Até {SLA_DIAS} dias", f"{SLA_DIAS + 1}-15 dias", "16-30 dias", "Mais de 30 dias"]
+PERCENTIS = [0.5, 0.9, 0.95]
+JANELA_REINCIDENCIA_DIAS = 90 # Nova falha até N dias depois do retorno conta como reincidência
+
+CONSULTA_MANUTENCOES = """
+    SELECT
+        m.id, m.aparelho_id, a.numero_serie,
+        ma.nome_marca || ' ' || mo.nome_modelo AS modelo,
+        COALESCE(s.nome_setor, 'Sem setor') AS setor,
+        COALESCE(m.fornecedor_id, 0) AS fornecedor_id, COALESCE(f.nome, 'Não informado') AS fornecedor,
+        m.data_envio, m.data_retorno, m.custo_reparo, m.status_manutencao,
+        julianday(COALESCE(m.data_retorno, :hoje)) - julianday(m.data_envio) AS dias,
+        julianday(m.data_envio) - julianday(LAG(m.data_envio) OVER aparelho) AS dias_desde_falha_anterior,
+        julianday(m.data_envio) - julianday(LAG(m.data_retorno) OVER aparelho) AS dias_desde_retorno_anterior
+    FROM manutencoes m
+    JOIN aparelhos a ON m.aparelho_id = a.id
+    JOIN modelos mo ON a.modelo_id = mo.id
+    JOIN marcas ma ON mo.marca_id = ma.id
+    LEFT JOIN colaboradores c ON m.colaborador_id_no_envio = c.id
+    LEFT JOIN setores s ON c.setor_id = s.id
+    LEFT JOIN fornecedores f ON m.fornecedor_id = f.id
+    WINDOW aparelho AS (PARTITION BY m.aparelho_id ORDER BY m.data_envio, m.id)
+"""
+
+# Tipos numéricos fixos: sem O.S. (instalação nova) o pandas lê todas as colunas como object
+TIPOS = {
+    'id': 'int64', 'aparelho_id': 'int64', 'fornecedor_id': 'int64', 'custo_reparo': 'float64',
+    'dias': 'float64', 'dias_desde_falha_anterior': 'float64', 'dias_desde_retorno_anterior': 'float64',
+}
+
+def carregar_manutencoes(conn, hoje=None):
+    """Uma linha por O.S., com a duração (até hoje, se aberta) e o intervalo desde a falha anterior do aparelho."""
+    hoje = (hoje or date.today()).isoformat()
+    return pd.read_sql_query(CONSULTA_MANUTENCOES, conn, params={'hoje': hoje}, dtype=TIPOS)
+
+# --- Indicadores ---
+def tempos_por_fornecedor(df):
+    """Percentis do tempo de retorno (dias) das O.S. fechadas e O.S. abertas, por fornecedor."""
+    fechadas = df[df['data_retorno'].notna()]
+    percentis = fechadas.groupby('fornecedor_id')['dias'].quantile(PERCENTIS).unstack().reindex(columns=PERCENTIS)
+    percentis.columns = [f"p{round(p * 100)} (dias)" for p in PERCENTIS]
+    resumo = pd.DataFrame({
+        'Fornecedor': df.groupby('fornecedor_id')['fornecedor'].first(),
+        'O.S. fechadas': fechadas.groupby('fornecedor_id').size(),
+        'Média (dias)': fechadas.groupby('fornecedor_id')['dias'].mean(),
+        'O.S. abertas': df[df['data_retorno'].isna()].groupby('fornecedor_id').size(),
+    }).join(percentis)
+    resumo[['O.S. fechadas', 'O.S. abertas']] = resumo[['O.S. fechadas', 'O.S. abertas']].fillna(0).astype(int)
+    return resumo.round(1).sort_values('p90 (dias)', ascending=False).reset_index(drop=True)
+
+def envelhecimento_abertas(df):
+    """O.S. em andamento por fornecedor e faixa de idade (a primeira faixa está dentro do SLA)."""
+    abertas = df[df['data_retorno'].isna()]
+    faixas = pd.cut(abertas['dias'], bins=FAIXAS_IDADE, labels=ROTULOS_IDADE)
+    tabela = pd.crosstab(abertas['fornecedor_id'], faixas).reindex(columns=ROTULOS_IDADE, fill_value=0)
+    tabela['Total'] = tabela.sum(axis=1)
+    tabela.insert(0, 'Fornecedor', abertas.groupby('fornecedor_id')['fornecedor'].first())
+    return tabela.sort_values('Total', ascending=False).reset_index(drop=True).rename_axis(None, axis=1)
+
+def custos(df, agrupar_por='modelo'):
+    """Custo total e médio dos reparos, por 'modelo' ou 'setor' (do colaborador no envio)."""
+    com_custo = df[df['custo_reparo'].notna()]
+    resumo = com_custo.groupby(agrupar_por)['custo_reparo'].agg(['sum', 'mean', 'count'])
+    resumo.columns = ['Custo Total (R$)', 'Custo Médio (R$)', 'Reparos']
+    return resumo.round(2).sort_values('Custo Total (R$)', ascending=False).rename_axis(agrupar_por.capitalize()).reset_index()
+
+def reincidencia_por_modelo(df):
+    """
+    Por modelo: aparelhos que foram à manutenção, quantos voltaram mais de uma vez e
+    quantas falhas aconteceram até JANELA_REINCIDENCIA_DIAS dias depois de um retorno.
+    """
+    falhas_por_aparelho = df.groupby(['modelo', 'aparelho_id']).size()
+    aparelhos = pd.DataFrame({
+        'Aparelhos': falhas_por_aparelho.groupby('modelo').size(),
+        'Com falha repetida': (falhas_por_aparelho > 1).groupby('modelo').sum(),
+    })
+    aparelhos[f"Reincidências (≤ {JANELA_REINCIDENCIA_DIAS} dias)"] = (df['dias_desde_retorno_anterior'] <= JANELA_REINCIDENCIA_DIAS).groupby(df['modelo']).sum()
+    aparelhos['Taxa de Repetição (%)'] = (100 * aparelhos['Com falha repetida'] / aparelhos['Aparelhos']).round(1)
+    return aparelhos.sort_values('Taxa de Repetição (%)', ascending=False).rename_axis('Modelo').reset_index()
+
+def mtbf_por_aparelho(df):
+    """Tempo médio entre falhas (dias entre envios consecutivos) dos aparelhos com pelo menos duas falhas."""
+    intervalos = df[df['dias_desde_falha_anterior'].notna()]
+    mtbf = intervalos.groupby(['aparelho_id', 'numero_serie', 'modelo'])['dias_desde_falha_anterior'].agg(['mean', 'size'])
+    mtbf.columns = ['MTBF (dias)', 'Intervalos']
+    mtbf['Falhas'] = mtbf.pop('Intervalos') + 1
+    return (mtbf.round(1).sort_values('MTBF (dias)').reset_index()
+            .drop(columns='aparelho_id').rename(columns={'numero_serie': 'N/S', 'modelo': 'Modelo'}))
+
+def calcular(df):
+    """Todos os indicadores a partir do DataFrame de carregar_manutencoes."""
+    return {
+        'tempos_fornecedor': tempos_por_fornecedor(df),
+        'envelhecimento': envelhecimento_abertas(df),
+        'custo_modelo': custos(df, 'modelo'),
+        'custo_setor': custos(df, 'setor'),
+        'reincidencia': reincidencia_por_modelo(df),
+        'mtbf': mtbf_por_aparelho(df),
+    }
+
+# --- Cache por Versão dos Dados ---
+
+def obter_analise(conn=None):
+    """Indicadores de calcular(), recalculados só quando as manutenções mudaram (ou o dia mudou)."""
+    return cache_por_versao(
+        'analise_manutencao', DEPENDENCIAS, None,
+        lambda conexao: calcular(carregar_manutencoes(conexao, date.today())),
+        conn, diaria=True
+    )
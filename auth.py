@@ -1,6 +1,6 @@
 import streamlit as st
-import sqlite3
 import hashlib
+from database import get_db_connection
 
 def hash_password(password):
     """Gera um hash seguro para a senha."""
@@ -8,8 +8,7 @@ def hash_password(password):
 
 def check_login(username, password):
     """Verifica as credenciais do utilizador no banco de dados."""
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     hashed_password = hash_password(password)
@@ -0,0 +1,98 @@
+"""
+Auditoria do custo de importação de cada página (estilo python -X importtime).
+
+Para cada script (app.py e pages/*.py), lê as importações de nível superior (as
+que correm logo que a página abre; imports dentro de funções são ignorados) e
+executa-as num interpretador novo com -X importtime, depois de 'import streamlit'.
+O custo reportado é o que a página acrescenta ao que o servidor já tem carregado:
+é o que a primeira sessão paga após um reinício da réplica. Uma dependência
+partilhada (ex: pandas) é atribuída ao primeiro módulo da página que a importa.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.auditar_imports [--repeticoes 3] [--top 5] [pages/6_Gerar_Documentos.py ...]
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def importacoes_de_nivel_superior(caminho):
+    """Instruções de import executadas ao abrir o script (inclui as dentro de if/try/with, não as de funções)."""
+    with open(caminho, encoding='utf-8') as ficheiro:
+        arvore = ast.parse(ficheiro.read(), filename=caminho)
+    instrucoes = []
+    pendentes = list(arvore.body)
+    while pendentes:
+        no = pendentes.pop(0)
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            instrucoes.append(ast.unparse(no))
+        elif isinstance(no, (ast.If, ast.Try, ast.With, ast.For, ast.While)):
+            for campo in ('body', 'orelse', 'finalbody', 'handlers'):
+                pendentes.extend(getattr(no, campo, []))
+        elif isinstance(no, ast.ExceptHandler):
+            pendentes.extend(no.body)
+    return instrucoes
+
+def medir_importacoes(instrucoes):
+    """
+    Executa as importações num processo novo e devolve {módulo de topo: ms cumulativos}
+    para os módulos carregados depois do streamlit.
+    """
+    codigo = "import streamlit\nimport sys\nsys.stderr.write('--- pagina ---\\n')\n" + "\n".join(instrucoes)
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                               cwd=RAIZ, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    custos = {}
+    depois_do_streamlit = False
+    for linha in resultado.stderr.splitlines():
+        if linha == '--- pagina ---':
+            depois_do_streamlit = True
+            continue
+        correspondencia = LINHA_IMPORTTIME.match(linha)
+        if not depois_do_streamlit or not correspondencia:
+            continue
+        _, cumulativo, indentacao, modulo = correspondencia.groups()
+        if not indentacao: # Só os módulos de topo; os restantes estão incluídos no cumulativo
+            custos[modulo] = int(cumulativo) / 1000
+    return custos
+
+def auditar(paginas, repeticoes):
+    """Para cada página, o menor custo total observado e o detalhe por módulo dessa execução."""
+    relatorio = {}
+    for pagina in paginas:
+        instrucoes = importacoes_de_nivel_superior(os.path.join(RAIZ, pagina))
+        melhor = None
+        for _ in range(repeticoes):
+            custos = medir_importacoes(instrucoes)
+            if melhor is None or sum(custos.values()) < sum(melhor.values()):
+                melhor = custos
+        relatorio[pagina] = melhor
+    return relatorio
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo de importação por página do AssetFlow.")
+    parser.add_argument("paginas", nargs="*", help="scripts a auditar (padrão: app.py e pages/*.py)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções por página; fica a mais rápida (padrão: 3)")
+    parser.add_argument("--top", type=int, default=5, help="módulos mais pesados a listar por página (padrão: 5)")
+    args = parser.parse_args()
+
+    paginas = args.paginas or ['app.py'] + sorted(
+        (os.path.relpath(p, RAIZ) for p in glob.glob(os.path.join(RAIZ, 'pages', '*.py'))),
+        key=lambda p: int(os.path.basename(p).split('_')[0]))
+
+    relatorio = auditar(paginas, args.repeticoes)
+    for pagina, custos in sorted(relatorio.items(), key=lambda item: -sum(item[1].values())):
+        print(f"\n{pagina}: {sum(custos.values()):.1f} ms além do streamlit")
+        for modulo, ms in sorted(custos.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {ms:>8.1f} ms  {modulo}")
+
+if __name__ == '__main__':
+    main()
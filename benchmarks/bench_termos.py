@@ -0,0 +1,127 @@
+"""
+Compara o tempo de renderização por documento do template compilado (termos.py)
+com o caminho anterior, que desenhava o termo inteiro com FPDF.cell/multi_cell.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_termos [numero_de_documentos]
+"""
+import sys
+import time
+import warnings
+
+from fpdf import FPDF
+
+from termos import TEXTO_DOCUMENTACAO, checklist_padrao, gerar_pdf_termo, obter_template
+
+DADOS_EXEMPLO = {
+    'protocolo': 1234, 'data_movimentacao': '15/03/2025',
+    'nome_completo': 'Maria Aparecida dos Santos', 'cpf': '123.456.789-00',
+    'nome_setor': 'Logística', 'gmail': 'maria.santos@empresa.com',
+    'nome_marca': 'Samsung', 'nome_modelo': 'Galaxy A54',
+    'imei1': '350000000000001', 'imei2': '350000000000002',
+}
+
+# --- Caminho anterior (referência) ---
+
+class PDFOriginal(FPDF):
+    def header(self):
+        self.set_y(self.get_y() + 5)
+        self.set_font('Arial', 'B', 16)
+        self.set_text_color(0, 51, 102)
+        self.cell(0, 10, 'TERMO DE RESPONSABILIDADE', 0, 1, 'C')
+        self.set_font('Arial', 'I', 10)
+        self.set_text_color(227, 6, 19)
+        self.cell(0, 5, 'PROTOCOLO DE RECEBIMENTO E DEVOLUÇÃO', 0, 1, 'C')
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    def section_title(self, title):
+        self.set_font('Arial', 'B', 12)
+        self.set_fill_color(0, 51, 102)
+        self.set_text_color(255, 255, 255)
+        self.cell(0, 8, title, 0, 1, 'L', fill=True)
+        self.ln(2)
+        self.set_text_color(0, 0, 0)
+
+    def info_line(self, label, value):
+        self.set_font('Arial', 'B', 10)
+        self.cell(30, 7, f" {label}:", 0, 0)
+        self.set_font('Arial', '', 10)
+        self.cell(0, 7, f" {value}", 0, 1)
+
+def gerar_pdf_termo_original(dados, checklist_data):
+    pdf = PDFOriginal()
+    pdf.set_auto_page_break(auto=False)
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(95, 7, f"CÓDIGO: {dados['protocolo']}", 1, 0, 'C')
+    pdf.cell(95, 7, f"DATA: {dados['data_movimentacao']}", 1, 1, 'C')
+    pdf.ln(5)
+    pdf.section_title('DADOS DO COLABORADOR')
+    pdf.info_line('NOME', dados['nome_completo'])
+    pdf.info_line('CPF', dados['cpf'])
+    pdf.info_line('SETOR', dados['nome_setor'])
+    pdf.info_line('EMAIL', dados['gmail'])
+    pdf.ln(5)
+    pdf.section_title('DADOS DO SMARTPHONE')
+    pdf.info_line('MARCA', dados['nome_marca'])
+    pdf.info_line('MODELO', dados['nome_modelo'])
+    pdf.info_line('IMEI 1', dados['imei1'])
+    pdf.info_line('IMEI 2', dados['imei2'])
+    pdf.ln(5)
+    pdf.section_title('DOCUMENTAÇÃO')
+    pdf.set_font('Arial', '', 8)
+    pdf.multi_cell(0, 4, TEXTO_DOCUMENTACAO, 0, 'J')
+    pdf.ln(5)
+    pdf.section_title('CHECKLIST DE RECEBIMENTO')
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(95, 6, 'ITEM', 'B', 0, 'L')
+    pdf.cell(47.5, 6, 'ENTREGA', 'B', 0, 'C')
+    pdf.cell(47.5, 6, 'ESTADO', 'B', 1, 'C')
+    pdf.set_font('Arial', '', 10)
+    for item, detalhes in checklist_data.items():
+        pdf.cell(95, 6, item, 'B', 0)
+        pdf.cell(47.5, 6, 'SIM' if detalhes['entregue'] else 'NÃO', 'B', 0, 'C')
+        pdf.cell(47.5, 6, detalhes['estado'], 'B', 1, 'C')
+    pdf.ln(20)
+    pdf.cell(0, 10, '_________________________________________', 0, 1, 'C')
+    pdf.cell(0, 5, dados['nome_completo'], 0, 1, 'C')
+    return bytes(pdf.output())
+
+# --- Medição ---
+
+def medir(funcao, n, checklist):
+    inicio = time.perf_counter()
+    for i in range(n):
+        funcao(dict(DADOS_EXEMPLO, protocolo=i), checklist)
+    return (time.perf_counter() - inicio) / n * 1000
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    checklist = checklist_padrao()
+    warnings.simplefilter('ignore', DeprecationWarning) # 'Arial' -> 'helvetica' no caminho original
+
+    inicio = time.perf_counter()
+    obter_template()
+    compilacao = (time.perf_counter() - inicio) * 1000
+
+    # Aquecimento (importações e fontes) antes de medir
+    gerar_pdf_termo_original(DADOS_EXEMPLO, checklist)
+    gerar_pdf_termo(DADOS_EXEMPLO, checklist)
+
+    original = medir(gerar_pdf_termo_original, n, checklist)
+    compilado = medir(gerar_pdf_termo, n, checklist)
+
+    print(f"Documentos por caminho: {n}")
+    print(f"Compilação do template (uma vez por processo): {compilacao:.2f} ms")
+    print(f"FPDF original:     {original:.2f} ms/documento")
+    print(f"Template compilado: {compilado:.2f} ms/documento")
+    print(f"Ganho: {original / compilado:.1f}x")
+
+if __name__ == '__main__':
+    main()
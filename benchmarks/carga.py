@@ -0,0 +1,336 @@
+"""
+Teste de carga ao nível das páginas: várias sessões simuladas (streamlit.testing
+AppTest, uma por processo) fazem login e percorrem jornadas reais em paralelo
+sobre o mesmo banco sintético (benchmarks/gerar_dados.py):
+
+    movimentacao  registar uma entrega na página de Movimentações
+    devolucao     processar a devolução de um aparelho em uso
+    manutencao    abrir uma O.S. e fechá-la de seguida
+    importacao    importar uma planilha de colaboradores
+    flow          fazer uma pergunta ao assistente Flow
+
+No fim mostra, por passo, os percentis de latência, os erros (separando os de
+bloqueio do SQLite, 'database is locked') e o débito de passos e jornadas.
+
+O Flow só chama a API Gemini se GEMINI_API_KEY estiver definida no ambiente;
+sem ela, mede-se apenas o caminho da página até à resposta de chave ausente.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.carga [--sessoes 8] [--jornadas 5] [--escala 1] [--saida resultado.json]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import database
+from benchmarks.gerar_dados import SETORES, gerar_banco, gerar_cpf, gerar_nome
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS = {
+    'login': 'app.py',
+    'movimentacao': 'pages/4_Movimentacoes.py',
+    'manutencao': 'pages/8_Manutencoes.py',
+    'devolucao': 'pages/9_Devolucoes.py',
+    'importacao': 'pages/10_Importar_Exportar.py',
+    'flow': 'pages/12_Converse_com_o_Flow.py',
+}
+PERGUNTAS_FLOW = ["pesquisar aparelho do {nome}", "mostrar histórico do {nome}", "o que aconteceu em 2024-06-03?"]
+
+class FalhaPasso(Exception):
+    """O passo terminou sem o resultado esperado (ex: a página mostrou um erro)."""
+
+# --- Registo das Medições ---
+
+class Registo:
+    """Medições de uma sessão (cada sessão corre no seu processo); juntar() agrega-as no fim."""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.bloqueios = defaultdict(int)
+        self.exemplos = defaultdict(set)
+        self.jornadas = defaultdict(int)
+
+    def passo(self, nome, segundos, erro=None):
+        self.latencias[nome].append(segundos * 1000)
+        if erro is not None:
+            self.erros[nome] += 1
+            if 'database is locked' in str(erro):
+                self.bloqueios[nome] += 1
+            if len(self.exemplos[nome]) < 3:
+                self.exemplos[nome].add(str(erro)[:200])
+
+    def jornada(self, nome):
+        self.jornadas[nome] += 1
+
+    def juntar(self, dados):
+        """Agrega as medições de outra sessão (o vars() do seu Registo)."""
+        for nome, tempos in dados['latencias'].items():
+            self.latencias[nome].extend(tempos)
+        for campo in ('erros', 'bloqueios', 'jornadas'):
+            for nome, total in dados[campo].items():
+                getattr(self, campo)[nome] += total
+        for nome, exemplos in dados['exemplos'].items():
+            self.exemplos[nome] |= exemplos
+
+    def resumo(self, duracao):
+        passos = {}
+        for nome, tempos in sorted(self.latencias.items()):
+            p50, p95, p99 = np.percentile(tempos, [50, 95, 99])
+            passos[nome] = {
+                'n': len(tempos), 'p50_ms': round(p50, 1), 'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1),
+                'max_ms': round(max(tempos), 1), 'erros': self.erros[nome], 'bloqueios': self.bloqueios[nome],
+            }
+        total_passos = sum(p['n'] for p in passos.values())
+        return {
+            'duracao_s': round(duracao, 2),
+            'passos_por_s': round(total_passos / duracao, 2) if duracao else 0,
+            'jornadas_por_s': round(sum(self.jornadas.values()) / duracao, 2) if duracao else 0,
+            'jornadas': dict(self.jornadas),
+            'passos': passos,
+            'exemplos_erros': {nome: sorted(exemplos) for nome, exemplos in self.exemplos.items()},
+        }
+
+# --- Sessão Simulada ---
+
+def _mensagens_erro(at):
+    return [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+
+class Sessao:
+    """Um utilizador com sessão iniciada; cada página é aberta num AppTest com o mesmo session_state."""
+
+    def __init__(self, registo, login, senha, timeout):
+        self.registo = registo
+        self.login = login
+        self.senha = senha
+        self.timeout = timeout
+        self.estado = {}
+
+    def _passo(self, nome, acao):
+        """Executa 'acao' (que devolve o AppTest), mede-a e regista erros do Streamlit ou exceções."""
+        inicio = time.perf_counter()
+        erro = None
+        at = None
+        try:
+            at = acao()
+            mensagens = _mensagens_erro(at)
+            if mensagens:
+                erro = FalhaPasso(mensagens[0])
+        except Exception as e:
+            erro = e
+        self.registo.passo(nome, time.perf_counter() - inicio, erro)
+        if erro is not None:
+            raise FalhaPasso(f"{nome}: {erro}")
+        return at
+
+    def abrir(self, pagina, nome_passo):
+        def acao():
+            at = AppTest.from_file(os.path.join(RAIZ, PAGINAS[pagina]), default_timeout=self.timeout)
+            for chave, valor in self.estado.items():
+                at.session_state[chave] = valor
+            if os.environ.get('GEMINI_API_KEY'):
+                at.secrets['GEMINI_API_KEY'] = os.environ['GEMINI_API_KEY']
+            return at.run()
+        return self._passo(nome_passo, acao)
+
+    def iniciar(self):
+        at = self.abrir('login', 'login: abrir')
+        def entrar():
+            at.text_input[0].input(self.login)
+            at.text_input[1].input(self.senha)
+            at.button[0].click()
+            at.run()
+            if not at.session_state['logged_in']:
+                raise FalhaPasso("credenciais recusadas")
+            return at
+        self._passo('login: entrar', entrar)
+        self.estado = {chave: at.session_state[chave] for chave in ('logged_in', 'username', 'user_role', 'user_name')}
+
+# --- Jornadas ---
+
+def _botao(at, rotulo):
+    return next(b for b in at.button if b.label == rotulo)
+
+def _opcao_com(selectbox, texto):
+    return next(opcao for opcao in selectbox.options if texto in opcao)
+
+def _amostra(sql, params=()):
+    """Escolhe uma linha ao acaso para a jornada (fora da medição)."""
+    conn = sqlite3.connect(database.DB_PATH)
+    linha = conn.execute(sql + " ORDER BY RANDOM() LIMIT 1", params).fetchone()
+    conn.close()
+    return linha
+
+def jornada_movimentacao(sessao, rng):
+    serie = _amostra("SELECT numero_serie FROM aparelhos WHERE status_id = 1")
+    nome = _amostra("SELECT nome_completo FROM colaboradores")
+    if not serie or not nome:
+        return
+    at = sessao.abrir('movimentacao', 'movimentacao: abrir')
+    sessao._passo('movimentacao: pesquisar aparelho', lambda: at.text_input(key="mov_aparelho_termo").input(serie[0]).run())
+    sessao._passo('movimentacao: pesquisar colaborador', lambda: at.text_input(key="mov_colaborador_termo").input(nome[0]).run())
+    def registar():
+        at.selectbox(key="mov_colaborador").select(_opcao_com(at.selectbox(key="mov_colaborador"), nome[0]))
+        next(s for s in at.selectbox if s.label == "Novo Status do Aparelho*").select("Em uso")
+        next(t for t in at.text_input if t.label == "Nova Localização").input("Mesa do colaborador")
+        _botao(at, "Registar Movimentação").click()
+        return at.run()
+    sessao._passo('movimentacao: registar', registar)
+
+def jornada_devolucao(sessao, rng):
+    serie = _amostra("SELECT numero_serie FROM aparelhos WHERE status_id = 2")
+    if not serie:
+        return
+    at = sessao.abrir('devolucao', 'devolucao: abrir')
+    sessao._passo('devolucao: pesquisar', lambda: at.text_input(key="dev_aparelho_termo").input(serie[0]).run())
+    def processar():
+        if not at.selectbox(key="dev_aparelho").options:
+            raise FalhaPasso("aparelho já devolvido por outra sessão")
+        _botao(at, "Processar Devolução").click()
+        return at.run()
+    sessao._passo('devolucao: processar', processar)
+
+def jornada_manutencao(sessao, rng):
+    serie = _amostra("SELECT numero_serie FROM aparelhos WHERE status_id IN (1, 2)")
+    if not serie:
+        return
+    at = sessao.abrir('manutencao', 'manutencao: abrir')
+    sessao._passo('manutencao: pesquisar', lambda: at.text_input(key="os_aparelho_termo").input(serie[0]).run())
+    def abrir_os():
+        next(t for t in at.text_input if t.label.startswith("Fornecedor")).input("Assistência Técnica XYZ")
+        next(t for t in at.text_area if t.label.startswith("Defeito")).input("Teste de carga")
+        _botao(at, "Abrir Ordem de Serviço").click()
+        return at.run()
+    sessao._passo('manutencao: abrir O.S.', abrir_os)
+    def fechar_os():
+        selecao = next(s for s in at.selectbox if s.label.startswith("Selecione a Ordem de Serviço"))
+        selecao.select(_opcao_com(selecao, f"(S/N: {serie[0]})"))
+        next(t for t in at.text_area if t.label.startswith("Solução")).input("Reparo concluído")
+        _botao(at, "Fechar Ordem de Serviço").click()
+        return at.run()
+    sessao._passo('manutencao: fechar O.S.', fechar_os)
+
+def jornada_importacao(sessao, rng, linhas=20):
+    planilha = pd.DataFrame([{
+        'codigo': str(rng.randrange(10**6, 10**7)), 'nome_completo': gerar_nome(rng), 'cpf': gerar_cpf(rng),
+        'gmail': '', 'nome_setor': rng.choice(SETORES),
+    } for _ in range(linhas)])
+    conteudo = io.BytesIO()
+    planilha.to_excel(conteudo, index=False)
+
+    at = sessao.abrir('importacao', 'importacao: abrir')
+    sessao._passo('importacao: enviar planilha', lambda: at.file_uploader(key="upload_colab").set_value(
+        ("colaboradores.xlsx", conteudo.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")).run())
+    def importar():
+        _botao(at, "Importar Dados dos Colaboradores").click()
+        return at.run()
+    sessao._passo('importacao: importar', importar)
+
+def jornada_flow(sessao, rng):
+    nome = _amostra("SELECT nome_completo FROM colaboradores")
+    at = sessao.abrir('flow', 'flow: abrir')
+    pergunta = rng.choice(PERGUNTAS_FLOW).format(nome=nome[0] if nome else "Ana")
+    sessao._passo('flow: perguntar', lambda: at.chat_input[0].set_value(pergunta).run())
+
+JORNADAS = {
+    'movimentacao': jornada_movimentacao,
+    'devolucao': jornada_devolucao,
+    'manutencao': jornada_manutencao,
+    'importacao': jornada_importacao,
+    'flow': jornada_flow,
+}
+
+# --- Execução ---
+
+def executar_sessao(numero, caminho_banco, args, jornadas):
+    """
+    Corre num processo próprio: o AppTest usa um Runtime global e não pode ser
+    partilhado entre threads. Devolve vars() do Registo (o AppTest substitui o
+    __main__, pelo que a classe não pode ser enviada de volta por pickle).
+    """
+    logging.disable(logging.WARNING) # Avisos de modo 'bare' e de depreciação do Streamlit
+    database.DB_PATH = caminho_banco
+    registo = Registo()
+    rng = random.Random(args.semente + numero)
+    sessao = Sessao(registo, args.login, args.senha, args.timeout)
+    try:
+        sessao.iniciar()
+    except FalhaPasso:
+        return vars(registo)
+    for _ in range(args.jornadas):
+        nome = rng.choice(jornadas)
+        try:
+            JORNADAS[nome](sessao, rng)
+            registo.jornada(nome)
+        except (FalhaPasso, StopIteration):
+            pass # Já contabilizado no passo (ou elemento em falta na página); segue para a próxima jornada
+    return vars(registo)
+
+def preparar_banco(args, pasta):
+    destino = os.path.join(pasta, 'carga.db')
+    if args.banco:
+        shutil.copyfile(args.banco, destino)
+    else:
+        print(f"A gerar o banco sintético (escala {args.escala:g})...")
+        gerar_banco(destino, args.escala, args.semente)
+    return destino
+
+def imprimir(resumo):
+    print(f"\nDuração: {resumo['duracao_s']} s | {resumo['passos_por_s']} passos/s | {resumo['jornadas_por_s']} jornadas/s")
+    print(f"Jornadas concluídas: {resumo['jornadas']}\n")
+    print(f"{'passo':<38}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}{'erros':>8}{'bloq.':>7}")
+    for nome, p in resumo['passos'].items():
+        print(f"{nome:<38}{p['n']:>6}{p['p50_ms']:>10.1f}{p['p95_ms']:>10.1f}{p['p99_ms']:>10.1f}{p['max_ms']:>10.1f}{p['erros']:>8}{p['bloqueios']:>7}")
+    if resumo['exemplos_erros']:
+        print("\nExemplos de erros:")
+        for nome, exemplos in resumo['exemplos_erros'].items():
+            for exemplo in exemplos:
+                print(f"  {nome}: {exemplo}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das páginas do AssetFlow com AppTest.")
+    parser.add_argument("--sessoes", type=int, default=8, help="sessões simultâneas (padrão: 8)")
+    parser.add_argument("--jornadas", type=int, default=5, help="jornadas por sessão (padrão: 5)")
+    parser.add_argument("--apenas", help=f"jornadas a usar, separadas por vírgula ({', '.join(JORNADAS)})")
+    parser.add_argument("--escala", type=float, default=1.0, help="escala do banco sintético (padrão: 1)")
+    parser.add_argument("--banco", help="usa uma cópia deste banco em vez de gerar um")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--login", default="admin")
+    parser.add_argument("--senha", default="admin")
+    parser.add_argument("--timeout", type=float, default=120, help="tempo máximo por execução de página (s)")
+    parser.add_argument("--saida", help="grava o resumo em JSON neste ficheiro")
+    args = parser.parse_args()
+
+    jornadas = args.apenas.split(",") if args.apenas else list(JORNADAS)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_banco = preparar_banco(args, pasta)
+
+        registo = Registo()
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.sessoes) as executor:
+            futuros = [executor.submit(executar_sessao, numero, caminho_banco, args, jornadas) for numero in range(args.sessoes)]
+            for futuro in futuros:
+                registo.juntar(futuro.result())
+        resumo = registo.resumo(time.perf_counter() - inicio)
+
+    imprimir(resumo)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as ficheiro:
+            json.dump(resumo, ficheiro, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Suíte de benchmarks das consultas mais usadas (consultas.py e pesquisa.py),
+executada sobre bancos sintéticos (benchmarks/gerar_dados.py) em várias escalas.
+
+Cada execução grava os tempos em benchmarks/resultados/<data>.json e compara a
+mediana de cada caso com a baseline guardada; casos acima do limiar são
+assinalados como regressão e o processo termina com código 1 (útil em CI).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.executar [--escalas 1,10] [--repeticoes 5] [--limiar 0.25]
+    python -m benchmarks.executar --guardar-baseline   # substitui a baseline pelos resultados
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+import analise_manutencao
+import catalogo
+import database
+import depreciacao
+import instrumentacao
+import consultas
+import pesquisa
+import reconciliacao
+import tco
+from benchmarks.gerar_dados import gerar_banco
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+PASTA_DADOS = os.path.join(PASTA, 'dados')
+PASTA_RESULTADOS = os.path.join(PASTA, 'resultados')
+BASELINE = os.path.join(PASTA, 'baseline.json')
+
+def analise_manutencao_sem_cache():
+    """Pior caso da análise de manutenções: a primeira abertura depois de uma escrita."""
+    conn = database.get_db_connection()
+    try:
+        return analise_manutencao.calcular(analise_manutencao.carregar_manutencoes(conn))
+    finally:
+        conn.close()
+
+def valor_contabil_sem_cache():
+    """Leitura da frota e cálculo vetorizado do valor contábil, como depois de uma alteração de valores."""
+    catalogo.limpar_cache('depreciacao')
+    return depreciacao.valores_contabeis()
+
+def tco_sem_cache():
+    """Consulta do TCO sobre todo o histórico e totais por colaborador e setor, sem a cache."""
+    conn = database.get_db_connection()
+    try:
+        return tco.carregar_totais(conn)
+    finally:
+        conn.close()
+
+def conciliacao_inventario():
+    """Conciliação de uma contagem com todos os N/S do banco, carregada como um .txt."""
+    conn = database.get_db_connection()
+    try:
+        series = [linha[0] for linha in conn.execute("SELECT numero_serie FROM aparelhos")]
+    finally:
+        conn.close()
+    return reconciliacao.conciliar_arquivo(io.BytesIO('\n'.join(series).encode()), 'contagem.txt')
+
+# Nome do caso -> função sem argumentos (os parâmetros imitam o uso real das páginas)
+CASOS = {
+    'dashboard': consultas.carregar_dados_dashboard,
+    'inventario_por_data': lambda: consultas.carregar_inventario_completo(),
+    'inventario_por_responsavel': lambda: consultas.carregar_inventario_completo("responsavel_atual ASC"),
+    'historico_completo': lambda: consultas.carregar_historico_completo(),
+    'historico_em_uso_2024': lambda: consultas.carregar_historico_completo("Em uso", date(2024, 1, 1), date(2024, 12, 31)),
+    'manutencoes_em_andamento': consultas.carregar_manutencoes_em_andamento,
+    'analise_manutencao': analise_manutencao_sem_cache,
+    'valor_contabil': valor_contabil_sem_cache,
+    'tco': tco_sem_cache,
+    'conciliacao_inventario': conciliacao_inventario,
+    'pesquisa_aparelhos': lambda: pesquisa.pesquisar_aparelhos("35"),
+    'pesquisa_aparelhos_em_uso': lambda: pesquisa.pesquisar_aparelhos_em_uso("Ana"),
+    'pesquisa_colaboradores': lambda: pesquisa.pesquisar_colaboradores("Mar"),
+    'flow_aparelhos_colaborador': lambda: consultas.pesquisar_aparelhos_por_filtros({'nome_colaborador': 'Silva'}),
+    'flow_aparelhos_serie': lambda: consultas.pesquisar_aparelhos_por_filtros({'numero_serie': '0000A'}),
+    'flow_movimentacoes_colaborador': lambda: consultas.pesquisar_movimentacoes_por_filtros({'nome_colaborador': 'Souza'}),
+    'flow_movimentacoes_data': lambda: consultas.pesquisar_movimentacoes_por_filtros({'data': '2024-06-03'}),
+}
+
+def preparar_banco(escala, semente):
+    """Devolve o caminho do banco sintético da escala, gerando-o apenas na primeira vez."""
+    os.makedirs(PASTA_DADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_DADOS, f"escala_{escala:g}_semente_{semente}.db")
+    if not os.path.exists(caminho):
+        print(f"A gerar o banco da escala {escala:g} em {caminho}...")
+        gerar_banco(caminho, escala, semente)
+    return caminho
+
+def medir(funcao, repeticoes):
+    """Executa uma vez para aquecer a cache de páginas do SQLite e devolve os tempos (ms) das repetições."""
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+def executar(escalas, repeticoes, semente, filtro=None):
+    # As consultas lentas são esperadas nas escalas grandes; não poluem o log da aplicação
+    instrumentacao.LIMIAR_CONSULTA_LENTA_MS = float('inf')
+
+    resultados = {}
+    for escala in escalas:
+        database.DB_PATH = preparar_banco(escala, semente)
+        for nome, funcao in CASOS.items():
+            if filtro and filtro not in nome:
+                continue
+            tempos = medir(funcao, repeticoes)
+            chave = f"{nome}@{escala:g}"
+            resultados[chave] = {
+                'mediana_ms': round(statistics.median(tempos), 3),
+                'minimo_ms': round(min(tempos), 3),
+                'maximo_ms': round(max(tempos), 3),
+                'repeticoes': repeticoes,
+            }
+            print(f"{chave:<45} mediana {resultados[chave]['mediana_ms']:>10.2f} ms   mín {resultados[chave]['minimo_ms']:>10.2f} ms")
+    return resultados
+
+def comparar(resultados, baseline, limiar, diferenca_minima_ms=1.0):
+    """
+    Lista (caso, baseline_ms, atual_ms, variação) dos casos que pioraram mais do que
+    o limiar. Diferenças absolutas pequenas (ruído em casos de menos de 1 ms) são ignoradas.
+    """
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = baseline.get(chave)
+        if not anterior:
+            continue
+        variacao = atual['mediana_ms'] / anterior['mediana_ms'] - 1 if anterior['mediana_ms'] else 0
+        if variacao > limiar and atual['mediana_ms'] - anterior['mediana_ms'] >= diferenca_minima_ms:
+            regressoes.append((chave, anterior['mediana_ms'], atual['mediana_ms'], variacao))
+    return regressoes
+
+def gravar_json(caminho, dados):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as ficheiro:
+        json.dump(dados, ficheiro, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das consultas do AssetFlow.")
+    parser.add_argument("--escalas", default="1,10", help="escalas separadas por vírgula (padrão: 1,10)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições por caso (padrão: 5)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--limiar", type=float, default=0.25, help="variação da mediana que conta como regressão (padrão: 0.25 = +25%%)")
+    parser.add_argument("--diferenca-minima", type=float, default=1.0, help="diferença mínima em ms para contar como regressão (padrão: 1)")
+    parser.add_argument("--filtro", help="executa apenas os casos cujo nome contém este texto")
+    parser.add_argument("--baseline", default=BASELINE, help="ficheiro da baseline (padrão: benchmarks/baseline.json)")
+    parser.add_argument("--guardar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    args = parser.parse_args()
+
+    escalas = [float(e) for e in args.escalas.split(",")]
+    resultados = executar(escalas, args.repeticoes, args.semente, args.filtro)
+
+    execucao = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'maquina': platform.node(),
+        'resultados': resultados,
+    }
+    gravar_json(os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d_%H%M%S}.json"), execucao)
+
+    if args.guardar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as ficheiro:
+                baseline = json.load(ficheiro).get('resultados', {})
+        baseline.update(resultados)
+        gravar_json(args.baseline, dict(execucao, resultados=baseline))
+        print(f"Baseline atualizada em {args.baseline}.")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar; execute com --guardar-baseline para criar uma.")
+        return
+    with open(args.baseline, encoding='utf-8') as ficheiro:
+        baseline = json.load(ficheiro).get('resultados', {})
+
+    regressoes = comparar(resultados, baseline, args.limiar, args.diferenca_minima)
+    if not regressoes:
+        print(f"Sem regressões acima de {args.limiar:.0%} face à baseline.")
+        return
+    print(f"\nRegressões acima de {args.limiar:.0%}:")
+    for chave, anterior, atual, variacao in regressoes:
+        print(f"  {chave:<45} {anterior:>10.2f} ms -> {atual:>10.2f} ms  (+{variacao:.0%})")
+    sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Gera um banco de dados sintético, determinístico (semente fixa) e com o schema
+completo do setup_database.py, para medir as páginas com inventários grandes.
+
+Cada aparelho segue um ciclo de vida realista: entrada no estoque, entregas a
+colaboradores, devoluções com checklist, idas à manutenção (com a O.S. em
+'manutencoes') e, eventualmente, a baixa. Nomes, CPFs (com dígitos
+verificadores válidos), números de série e IMEIs (com Luhn) são gerados.
+
+Escala 1 = 1.000 aparelhos, 200 colaboradores e ~50 movimentações por aparelho;
+a escala 100 dá ~100 mil aparelhos, 20 mil colaboradores e ~5 milhões de
+movimentações. Por omissão, os dados são carregados num banco em memória e
+copiados para o ficheiro com a API de backup do SQLite.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.gerar_dados destino.db [--escala 10] [--semente 42]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from setup_database import configurar_banco, criar_tabelas, hash_password
+
+ESCALA_BASE = {'aparelhos': 1000, 'colaboradores': 200, 'movimentacoes_por_aparelho': 50}
+PERIODO_ANOS = 5
+TAMANHO_LOTE = 50_000
+
+# Os ids seguem a ordem do banco de produção (Em estoque = 1, Em uso = 2, ...)
+STATUS = ["Em estoque", "Em uso", "Em manutenção", "Baixado/Inutilizado", "Danificado"]
+EM_ESTOQUE, EM_USO, EM_MANUTENCAO, BAIXADO, DANIFICADO = range(1, 6)
+
+SETORES = ["TI", "Comercial", "Operações", "Financeiro", "Recursos Humanos", "Logística",
+           "Marketing", "Jurídico", "Compras", "Atendimento", "Merchandising", "Diretoria"]
+
+# Marca -> [(modelo, valor de compra, TAC do IMEI)]
+MODELOS = {
+    "Samsung": [("Galaxy A14", 999.0, "35260211"), ("Galaxy A34", 1599.0, "35260311"), ("Galaxy A54", 2199.0, "35260411"),
+                ("Galaxy S23", 4299.0, "35260511"), ("Galaxy Tab A8", 1299.0, "35260611")],
+    "Apple": [("iPhone 12", 3499.0, "35300811"), ("iPhone 13", 4199.0, "35300911"), ("iPhone 14", 5299.0, "35301011"),
+              ("iPad 9", 2899.0, "35301111")],
+    "Motorola": [("Moto E13", 699.0, "35410111"), ("Moto G23", 1099.0, "35410211"), ("Moto G54", 1499.0, "35410311"),
+                 ("Edge 40", 2999.0, "35410411")],
+    "Xiaomi": [("Redmi 12C", 799.0, "86730111"), ("Redmi Note 12", 1299.0, "86730211"), ("Poco X5", 1799.0, "86730311")],
+    "Positivo": [("Twist 5", 599.0, "35880111"), ("Tab Q10", 899.0, "35880211")],
+}
+
+PRENOMES = ["Ana", "Maria", "Juliana", "Fernanda", "Patrícia", "Aline", "Camila", "Bruna", "Larissa", "Beatriz",
+            "Mariana", "Gabriela", "Letícia", "Amanda", "Vanessa", "Luciana", "Adriana", "Carla", "Renata", "Débora",
+            "José", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas", "Luiz", "Marcos",
+            "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe", "Rodrigo", "Gustavo", "Thiago",
+            "Cauã", "Matheus", "Leonardo", "Vinícius", "Diego", "André", "Fábio", "Ricardo", "Sérgio", "Igor"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+              "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+              "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Monteiro", "Batista", "Cavalcanti", "Pinto"]
+CONECTORES = ["", "", "", "da ", "de "]
+
+ITENS_CHECKLIST = ["Tela", "Carcaça", "Bateria", "Botões", "USB", "Chip", "Carregador", "Cabo USB", "Capa", "Película"]
+DEFEITOS = ["Tela trincada", "Não carrega", "Bateria viciada", "Botão de volume travado", "Conector USB com mau contacto",
+            "Câmera embaçada", "Não reconhece o chip", "Reinicia sozinho", "Alto-falante sem som", "Molhado"]
+SOLUCOES = ["Troca de tela", "Troca do conector de carga", "Troca de bateria", "Troca do flex de botões",
+            "Limpeza e reflow", "Troca da câmera traseira", "Troca da gaveta do chip", "Atualização de firmware"]
+FORNECEDORES = ["Assistência Técnica XYZ", "Cell Repair Center", "Samsung Service", "Apple Authorized Service",
+                "TechFix Celulares", "Conserta Já"]
+
+# --- Identificadores Brasileiros ---
+
+def gerar_cpf(rng):
+    """CPF formatado (000.000.000-00) com dígitos verificadores válidos."""
+    digitos = [rng.randrange(10) for _ in range(9)]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    texto = "".join(map(str, digitos))
+    return f"{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}"
+
+def digito_luhn(numero):
+    soma = 0
+    for i, caractere in enumerate(reversed(numero)):
+        d = int(caractere)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        soma += d
+    return str((10 - soma % 10) % 10)
+
+def gerar_imei(tac, sequencia):
+    """IMEI de 15 dígitos: TAC do modelo + número de série de 6 dígitos + dígito de Luhn."""
+    corpo = f"{tac}{sequencia % 1_000_000:06d}"
+    return corpo + digito_luhn(corpo)
+
+def gerar_nome(rng):
+    conector = rng.choice(CONECTORES)
+    return f"{rng.choice(PRENOMES)} {conector}{rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+def _sem_acentos(texto):
+    tabela = str.maketrans("áàâãéêíóôõúçÁÂÃÉÍÓÚÇ", "aaaaeeiooouc" "AAAEIOUC")
+    return texto.translate(tabela)
+
+# --- Geração por Tabela ---
+
+def _referencias(cursor):
+    cursor.executemany("INSERT INTO status (id, nome_status) VALUES (?, ?)", enumerate(STATUS, start=1))
+    cursor.executemany("INSERT INTO setores (nome_setor) VALUES (?)", [(s,) for s in SETORES])
+    modelos = [] # (modelo_id, valor, tac)
+    for marca_id, (marca, lista) in enumerate(MODELOS.items(), start=1):
+        cursor.execute("INSERT INTO marcas (id, nome_marca) VALUES (?, ?)", (marca_id, marca))
+        for nome_modelo, valor, tac in lista:
+            cursor.execute("INSERT INTO modelos (nome_modelo, marca_id) VALUES (?, ?)", (nome_modelo, marca_id))
+            modelos.append((cursor.lastrowid, valor, tac))
+    cursor.execute("INSERT INTO usuarios (nome, login, senha, cargo) VALUES (?, ?, ?, ?)",
+                   ("Administrador Padrão", "admin", hash_password("admin"), "Administrador"))
+    return modelos
+
+def _colaboradores(cursor, rng, quantidade, inicio):
+    cpfs, linhas, contas = set(), [], []
+    for i in range(1, quantidade + 1):
+        cpf = gerar_cpf(rng)
+        while cpf in cpfs:
+            cpf = gerar_cpf(rng)
+        cpfs.add(cpf)
+        nome = gerar_nome(rng)
+        setor_id = rng.randint(1, len(SETORES))
+        partes = _sem_acentos(nome).lower().split()
+        gmail = f"{partes[0]}.{partes[-1]}{i}@gmail.com"
+        data_cadastro = (inicio + timedelta(days=rng.randrange(PERIODO_ANOS * 365 // 2))).strftime('%Y-%m-%d')
+        linhas.append((i, nome, cpf, gmail, setor_id, data_cadastro, str(1000 + i)))
+        if rng.random() < 0.6:
+            contas.append((gmail, f"Senha@{rng.randrange(10**6):06d}", f"(11) 9{rng.randrange(10**8):08d}",
+                           f"{partes[0]}{i}@empresa.com.br", setor_id, i))
+    cursor.executemany("INSERT INTO colaboradores (id, nome_completo, cpf, gmail, setor_id, data_cadastro, codigo) VALUES (?, ?, ?, ?, ?, ?, ?)", linhas)
+    cursor.executemany("INSERT INTO contas_gmail (email, senha, telefone_recuperacao, email_recuperacao, setor_id, colaborador_id) VALUES (?, ?, ?, ?, ?, ?)", contas)
+
+def _checklist(rng, danificado):
+    """Checklist de devolução com os estados da página de devoluções."""
+    estados = ["Bom", "Riscado", "Quebrado", "Faltando"] if danificado else ["Bom", "Bom", "Bom", "Riscado"]
+    checklist = {}
+    for item in ITENS_CHECKLIST:
+        estado = rng.choice(estados) if rng.random() > 0.03 else "Faltando"
+        checklist[item] = {'entregue': estado != "Faltando", 'estado': estado}
+    return json.dumps(checklist)
+
+def _ciclo_de_vida(rng, aparelho_id, data_cadastro, fim, colaboradores, intervalo_medio):
+    """
+    Gera as movimentações e manutenções de um aparelho, por ordem cronológica.
+    Devolve (movimentacoes, manutencoes, status_final).
+    """
+    movimentos, manutencoes = [], []
+
+    def registar(quando, colaborador_id, status, localizacao, observacoes, checklist=None):
+        movimentos.append((quando.strftime('%Y-%m-%d %H:%M:%S'), aparelho_id, colaborador_id, status, localizacao, observacoes, checklist))
+
+    agora = data_cadastro
+    registar(agora, None, EM_ESTOQUE, "Estoque Interno", "Entrada inicial no sistema.")
+    status = EM_ESTOQUE
+
+    while True:
+        # Tempo em estoque até à próxima entrega
+        agora += timedelta(hours=rng.expovariate(1 / (intervalo_medio * 6)) + 1)
+        if agora >= fim:
+            return movimentos, manutencoes, status
+        colaborador_id = rng.randint(1, colaboradores)
+        registar(agora, colaborador_id, EM_USO, "Mesa do colaborador", "Entrega de aparelho.")
+        status = EM_USO
+
+        # Tempo em uso até à devolução
+        agora += timedelta(hours=rng.expovariate(1 / (intervalo_medio * 18)) + 1)
+        if agora >= fim:
+            return movimentos, manutencoes, status
+
+        destino = rng.random()
+        if destino < 0.85:
+            registar(agora, None, EM_ESTOQUE, "Estoque Interno", "Devolução.", _checklist(rng, False))
+            status = EM_ESTOQUE
+            continue
+        if destino > 0.995:
+            registar(agora, None, BAIXADO, "Descarte", "Aparelho sem condições de uso.", _checklist(rng, True))
+            return movimentos, manutencoes, BAIXADO
+
+        # Manutenção: a O.S. fica aberta até ao retorno (ou até hoje, se ainda não voltou)
+        if rng.random() < 0.3:
+            registar(agora, colaborador_id, DANIFICADO, "Mesa do colaborador", "Aparelho reportado como danificado.")
+            agora += timedelta(hours=rng.uniform(2, 72))
+            if agora >= fim:
+                return movimentos, manutencoes, DANIFICADO
+        defeito = rng.choice(DEFEITOS)
+        registar(agora, colaborador_id, EM_MANUTENCAO, "Assistência Técnica", defeito, _checklist(rng, True))
+        fornecedor = rng.choice(FORNECEDORES)
+        envio = agora.strftime('%Y-%m-%d')
+        agora += timedelta(days=rng.lognormvariate(2.0, 0.6))
+        if agora >= fim:
+            manutencoes.append((aparelho_id, colaborador_id, fornecedor, envio, defeito, None, None, None, 'Em Andamento'))
+            return movimentos, manutencoes, EM_MANUTENCAO
+        retorno = agora.strftime('%Y-%m-%d')
+        if rng.random() < 0.95:
+            custo = round(rng.uniform(80, 900), 2)
+            manutencoes.append((aparelho_id, colaborador_id, fornecedor, envio, defeito, retorno, rng.choice(SOLUCOES), custo, 'Concluída'))
+            registar(agora, None, EM_ESTOQUE, "Estoque Interno", "Retorno da manutenção.")
+            status = EM_ESTOQUE
+        else:
+            manutencoes.append((aparelho_id, colaborador_id, fornecedor, envio, defeito, retorno, "Sem reparo viável", None, 'Sem Reparo'))
+            registar(agora, None, BAIXADO, "Descarte", "Baixa após manutenção sem reparo.")
+            return movimentos, manutencoes, BAIXADO
+
+def _aparelhos(cursor, rng, quantidade, colaboradores, modelos, inicio, fim, movimentacoes_por_aparelho, ao_progredir=None):
+    # Cada ciclo gera ~2,4 movimentações e dura ~24 x intervalo_medio horas
+    periodo_horas = (fim - inicio).total_seconds() / 3600
+    intervalo_medio = periodo_horas / 2 / (movimentacoes_por_aparelho / 2.4) / 24
+
+    aparelhos, movimentos, manutencoes = [], [], []
+    totais = {'aparelhos': 0, 'historico_movimentacoes': 0, 'manutencoes': 0}
+
+    def descarregar():
+        cursor.executemany("INSERT INTO aparelhos (id, numero_serie, imei1, imei2, valor, modelo_id, status_id, data_cadastro) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", aparelhos)
+        cursor.executemany("INSERT INTO historico_movimentacoes (data_movimentacao, aparelho_id, colaborador_id, status_id, localizacao_atual, observacoes, checklist_devolucao) VALUES (?, ?, ?, ?, ?, ?, ?)", movimentos)
+        cursor.executemany("INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, fornecedor, data_envio, defeito_reportado, data_retorno, solucao_aplicada, custo_reparo, status_manutencao) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", manutencoes)
+        totais['aparelhos'] += len(aparelhos)
+        totais['historico_movimentacoes'] += len(movimentos)
+        totais['manutencoes'] += len(manutencoes)
+        aparelhos.clear(); movimentos.clear(); manutencoes.clear()
+        if ao_progredir:
+            ao_progredir(totais)
+
+    # Metade dos aparelhos entra no início do período; os restantes ao longo dele
+    segundos_periodo = int((fim - inicio).total_seconds())
+    for aparelho_id in range(1, quantidade + 1):
+        modelo_id, valor, tac = rng.choice(modelos)
+        atraso = 0 if rng.random() < 0.5 else rng.randrange(segundos_periodo)
+        data_cadastro = inicio + timedelta(seconds=atraso)
+        movs, mans, status_final = _ciclo_de_vida(rng, aparelho_id, data_cadastro, fim, colaboradores, intervalo_medio)
+        numero_serie = f"{tac[:2]}{aparelho_id:08X}{rng.randrange(16**2):02X}"
+        aparelhos.append((aparelho_id, numero_serie, gerar_imei(tac, aparelho_id * 2), gerar_imei(tac, aparelho_id * 2 + 1),
+                          round(valor * rng.uniform(0.9, 1.1), 2), modelo_id, status_final, data_cadastro.strftime('%Y-%m-%d')))
+        movimentos.extend(movs)
+        manutencoes.extend(mans)
+        if len(movimentos) >= TAMANHO_LOTE:
+            descarregar()
+    descarregar()
+    return totais
+
+# --- Carregamento ---
+
+def gerar_banco(caminho, escala=1.0, semente=42, em_memoria=True, fim=None, ao_progredir=None):
+    """
+    Cria 'caminho' com dados sintéticos na escala pedida e aplica o setup_database
+    (índices, versionamento, etc.) no fim, para não pagar os índices linha a linha.
+    Devolve o número de linhas por tabela.
+    """
+    if os.path.exists(caminho):
+        raise FileExistsError(f"'{caminho}' já existe; escolha outro destino ou apague-o primeiro.")
+
+    rng = random.Random(semente)
+    fim = fim or datetime(2025, 1, 1)
+    inicio = fim - timedelta(days=PERIODO_ANOS * 365)
+    n_aparelhos = max(1, int(ESCALA_BASE['aparelhos'] * escala))
+    n_colaboradores = max(1, int(ESCALA_BASE['colaboradores'] * escala))
+
+    conn = sqlite3.connect(":memory:" if em_memoria else caminho)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    cursor = conn.cursor()
+    criar_tabelas(cursor)
+
+    modelos = _referencias(cursor)
+    _colaboradores(cursor, rng, n_colaboradores, inicio)
+    totais = _aparelhos(cursor, rng, n_aparelhos, n_colaboradores, modelos, inicio, fim,
+                        ESCALA_BASE['movimentacoes_por_aparelho'], ao_progredir)
+    conn.commit()
+
+    if em_memoria:
+        destino = sqlite3.connect(caminho)
+        conn.backup(destino)
+        destino.close()
+    conn.close()
+
+    configurar_banco(caminho)
+    totais['colaboradores'] = n_colaboradores
+    return totais
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco de dados sintético do AssetFlow.")
+    parser.add_argument("destino", help="ficheiro .db a criar")
+    parser.add_argument("--escala", type=float, default=1.0, help="1 = 1.000 aparelhos, 200 colaboradores (padrão: 1)")
+    parser.add_argument("--semente", type=int, default=42, help="semente do gerador (padrão: 42)")
+    parser.add_argument("--em-disco", action="store_true", help="escreve direto no ficheiro em vez de usar memória + backup")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    def progresso(totais):
+        print(f"\r{totais['aparelhos']} aparelhos, {totais['historico_movimentacoes']} movimentações...", end="", flush=True)
+
+    totais = gerar_banco(args.destino, args.escala, args.semente, em_memoria=not args.em_disco, ao_progredir=progresso)
+    print()
+    for tabela, linhas in totais.items():
+        print(f"{tabela}: {linhas}")
+    print(f"Concluído em {time.perf_counter() - inicio:.1f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import date
+
+import database
+import instrumentacao
+import metricas
+
+# --- Cache de Dados de Referência ---
+# As tabelas de referência (status, setores, marcas, modelos) mudam raramente mas
+# são lidas em todas as páginas. Cada uma é carregada uma vez por processo e só é
+# recarregada quando a sua versão em 'versoes_tabelas' (incrementada por gatilhos,
+# ver setup_database.criar_versionamento) muda.
+#
+# O mesmo mecanismo serve os outros resultados caros de calcular (análise das
+# manutenções, frota da depreciação, totais do TCO): ver cache_por_versao.
+#
+# As versões são lidas no máximo uma vez por conexão (de novo só depois de essa
+# conexão escrever). Sem conexão, as lidas há menos de VALIDADE_VERSOES segundos são
+# reaproveitadas, desde que este processo não tenha escrito nada entretanto; as
+# escritas dos outros processos são vistas ao fim desse intervalo.
+
+VALIDADE_VERSOES = 1.0
+
+# tabela -> (consulta, coluna com o nome de apresentação, tabelas cuja versão invalida a cache)
+CATALOGOS = {
+    'status': (
+        "SELECT id, nome_status FROM status ORDER BY nome_status",
+        'nome_status', ('status',)
+    ),
+    'setores': (
+        "SELECT id, nome_setor FROM setores ORDER BY nome_setor",
+        'nome_setor', ('setores',)
+    ),
+    'marcas': (
+        "SELECT id, nome_marca FROM marcas ORDER BY nome_marca",
+        'nome_marca', ('marcas',)
+    ),
+    'modelos': (
+        """
+        SELECT mo.id, mo.nome_modelo, mo.marca_id, ma.nome_marca,
+               ma.nome_marca || ' - ' || mo.nome_modelo as modelo_completo
+        FROM modelos mo
+        JOIN marcas ma ON mo.marca_id = ma.id
+        ORDER BY ma.nome_marca, mo.nome_modelo
+        """,
+        'modelo_completo', ('modelos', 'marcas')
+    ),
+}
+
+class Catalogo:
+    """Conteúdo de uma tabela de referência com mapas nome→id e id→nome."""
+
+    def __init__(self, linhas, coluna_nome):
+        self.linhas = linhas
+        self.ids = {linha[coluna_nome]: linha['id'] for linha in linhas}
+        self.nomes = {linha['id']: linha[coluna_nome] for linha in linhas}
+
+# --- Cache por Versão dos Dados ---
+_cache = {} # (nome, DB_PATH, dependências) -> {chave: (versão, valor)}
+_lock = threading.Lock()
+
+_versoes_recentes = {} # DB_PATH -> (instante, instrumentacao.escritas, versões)
+
+def _versoes(conexao):
+    memo = getattr(conexao, '_versoes_tabelas', None)
+    if memo and memo[0] == conexao.total_changes:
+        return memo[1]
+    versoes = dict(conexao.execute("SELECT tabela, versao FROM versoes_tabelas").fetchall())
+    try:
+        conexao._versoes_tabelas = (conexao.total_changes, versoes)
+    except AttributeError: # sqlite3.Connection sem instrumentação
+        pass
+    return versoes
+
+def versoes_tabelas(conn=None):
+    """Versões atuais das tabelas versionadas (tabela -> versão), sem as reler a cada chamada."""
+    if conn is not None:
+        return _versoes(conn)
+    caminho = database.DB_PATH
+    recentes = _versoes_recentes.get(caminho)
+    if recentes and recentes[1] == instrumentacao.escritas and time.monotonic() - recentes[0] < VALIDADE_VERSOES:
+        return recentes[2]
+    escritas = instrumentacao.escritas # Antes da leitura, para não perder uma escrita concorrente
+    conexao = database.get_db_connection()
+    try:
+        versoes = _versoes(conexao)
+    finally:
+        conexao.close()
+    _versoes_recentes[caminho] = (time.monotonic(), escritas, versoes)
+    return versoes
+
+def cache_por_versao(nome, dependencias, chave, carregar, conn=None, diaria=False):
+    """
+    Devolve carregar(conexao), guardado por processo e recalculado só quando a versão de
+    alguma das tabelas em 'dependencias' (ver setup_database.TABELAS_VERSIONADAS) muda.
+    'nome' identifica a cache nas métricas e 'chave' distingue valores da mesma cache
+    (ex: o período). Com 'conn' (ex: a réplica), as versões e os dados são lidos nessa
+    conexão; com 'diaria', o valor também é recalculado quando o dia muda. Os valores
+    guardados com versões antigas são descartados.
+    """
+    versao = tuple(versoes_tabelas(conn).get(t, 0) for t in dependencias)
+    if diaria:
+        versao = (date.today(), *versao)
+    grupo = (nome, database.DB_PATH, dependencias)
+
+    metricas.CACHE_PEDIDOS.inc(cache=nome)
+    em_cache = _cache.get(grupo, {}).get(chave)
+    if em_cache and em_cache[0] == versao:
+        return em_cache[1]
+
+    metricas.CACHE_FALHAS.inc(cache=nome)
+    conexao = conn or database.get_db_connection()
+    try:
+        valor = carregar(conexao)
+    finally:
+        if conn is None:
+            conexao.close()
+    with _lock:
+        valores = _cache.setdefault(grupo, {})
+        for antiga in [k for k, (v, _) in valores.items() if v != versao]:
+            del valores[antiga]
+        valores[chave] = (versao, valor)
+    return valor
+
+def limpar_cache(nome=None):
+    """Descarta a cache (ex: depois de restaurar um backup); com 'nome', só a dessa cache."""
+    with _lock:
+        for grupo in [g for g in _cache if nome is None or g[0] == nome]:
+            del _cache[grupo]
+        if nome is None:
+            _versoes_recentes.clear()
+
+# --- Catálogos ---
+
+def obter_catalogo(tabela, conn=None):
+    """
+    Devolve o Catalogo da tabela indicada. Se for passada uma conexão (ex: dentro de
+    uma transação de escrita), ela é reutilizada em vez de se abrir uma nova.
+    """
+    consulta, coluna_nome, dependencias = CATALOGOS[tabela]
+    return cache_por_versao(
+        'catalogo', dependencias, tabela,
+        lambda conexao: Catalogo([dict(linha) for linha in conexao.execute(consulta).fetchall()], coluna_nome),
+        conn
+    )
+
+def id_por_nome(tabela, nome, conn=None):
+    """Devolve o id correspondente ao nome numa tabela de referência, ou None."""
+    return obter_catalogo(tabela, conn).ids.get(nome)
+
+def nome_por_id(tabela, id_registo, conn=None):
+    """Devolve o nome correspondente ao id numa tabela de referência, ou None."""
+    return obter_catalogo(tabela, conn).nomes.get(id_registo)
+
+def status_id(nome_status, conn=None):
+    """Atalho para o id de um status pelo nome (ex: 'Em uso')."""
+    return id_por_nome('status', nome_status, conn)
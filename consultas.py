@@ -0,0 +1,393 @@
+import pandas as pd
+from datetime import datetime, timedelta
+from database import get_db_connection
+from replica import get_replica_connection
+from analise_manutencao import SLA_DIAS
+import depreciacao
+
+# --- Consultas de Leitura das Páginas ---
+# Funções sem dependência do Streamlit, usadas pelas páginas (que tratam da cache
+# e da apresentação) e pela suíte de benchmarks (benchmarks/executar.py), para que
+# ambas meçam exatamente o mesmo SQL e o mesmo código pandas. As consultas de
+# relatório (dashboard, inventário e histórico completos) leem da réplica de
+# leitura quando esta está configurada (ver replica.py).
+
+def carregar_dados_dashboard():
+    """KPIs, dados dos gráficos e do painel de ação rápida do dashboard (app.py)."""
+    conn = get_replica_connection()
+
+    # KPIs
+    total_aparelhos = conn.execute("SELECT COUNT(id) FROM aparelhos").fetchone()[0] or 0
+    valor_total = conn.execute("SELECT SUM(valor) FROM aparelhos").fetchone()[0] or 0
+    total_colaboradores = conn.execute("SELECT COUNT(id) FROM colaboradores").fetchone()[0] or 0
+
+    kpis_manutencao = conn.execute("""
+        SELECT COUNT(a.id), SUM(a.valor)
+        FROM aparelhos a JOIN status s ON a.status_id = s.id
+        WHERE s.nome_status = 'Em manutenção'
+    """).fetchone()
+    aparelhos_manutencao = kpis_manutencao[0] or 0
+    valor_manutencao = kpis_manutencao[1] or 0
+
+    # Valor contábil: cache por versão dos aparelhos/regras no banco principal (ver depreciacao.py)
+    frota = depreciacao.resumo_frota()
+
+    aparelhos_estoque = conn.execute("""
+        SELECT COUNT(a.id) FROM aparelhos a JOIN status s ON a.status_id = s.id WHERE s.nome_status = 'Em estoque'
+    """).fetchone()[0] or 0
+
+    # Gráficos
+    df_status = pd.read_sql_query("SELECT s.nome_status, COUNT(a.id) as quantidade FROM aparelhos a JOIN status s ON a.status_id = s.id GROUP BY s.nome_status", conn)
+    df_setor = pd.read_sql_query("""
+        SELECT s.nome_setor, COUNT(a.id) as quantidade
+        FROM aparelhos a
+        JOIN historico_movimentacoes h ON a.id = h.aparelho_id
+        JOIN (SELECT aparelho_id, MAX(data_movimentacao) as max_data FROM historico_movimentacoes GROUP BY aparelho_id) hm ON h.aparelho_id = hm.aparelho_id AND h.data_movimentacao = hm.max_data
+        JOIN colaboradores c ON h.colaborador_id = c.id
+        JOIN setores s ON c.setor_id = s.id
+        WHERE a.status_id = (SELECT id FROM status WHERE nome_status = 'Em uso')
+        GROUP BY s.nome_setor
+    """, conn)
+
+    # Painel de Ação Rápida
+    data_limite = (datetime.now() - timedelta(days=SLA_DIAS)).strftime("%Y-%m-%d")
+    df_manut_atrasadas = _manutencoes_abertas(
+        conn, "a.numero_serie, mo.nome_modelo, COALESCE(f.nome, m.fornecedor) AS fornecedor, m.data_envio", enviadas_antes=data_limite
+    )
+    manutencoes_abertas = contar_manutencoes_abertas(conn)
+
+    df_ultimas_mov = pd.read_sql_query("""
+        SELECT h.data_movimentacao, c.nome_completo, s.nome_status, a.numero_serie
+        FROM historico_movimentacoes h
+        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+        JOIN status s ON h.status_id = s.id
+        JOIN aparelhos a ON h.aparelho_id = a.id
+        ORDER BY h.data_movimentacao DESC LIMIT 5
+    """, conn)
+
+    conn.close()
+    return {
+        "kpis": {
+            "total_aparelhos": total_aparelhos, "valor_total": valor_total,
+            "total_colaboradores": total_colaboradores, "aparelhos_manutencao": aparelhos_manutencao,
+            "valor_manutencao": valor_manutencao, "aparelhos_estoque": aparelhos_estoque,
+            "manutencoes_abertas": manutencoes_abertas, "valor_contabil": frota['valor_contabil'],
+            "depreciacao_acumulada": frota['depreciacao_acumulada']
+        },
+        "graficos": {"status": df_status, "setor": df_setor},
+        "acao_rapida": {"manut_atrasadas": df_manut_atrasadas, "ultimas_mov": df_ultimas_mov}
+    }
+
+# Ordenações permitidas no inventário (o valor entra diretamente no ORDER BY)
+ORDENACOES_INVENTARIO = {
+    "Data de Entrada (Mais Recente)": "a.data_cadastro DESC",
+    "Número de Série (A-Z)": "a.numero_serie ASC",
+    "Modelo (A-Z)": "modelo_completo ASC",
+    "Status (A-Z)": "s.nome_status ASC",
+    "Responsável (A-Z)": "responsavel_atual ASC"
+}
+
+def carregar_inventario_completo(order_by="a.data_cadastro DESC"):
+    """
+    Carrega uma visão completa do inventário, incluindo o responsável atual e permitindo ordenação.
+    """
+    conn = get_replica_connection()
+    query = f"""
+        WITH UltimoResponsavel AS (
+            SELECT
+                h.aparelho_id,
+                h.colaborador_id,
+                ROW_NUMBER() OVER(PARTITION BY h.aparelho_id ORDER BY h.data_movimentacao DESC) as rn
+            FROM historico_movimentacoes h
+        )
+        SELECT
+            a.id,
+            a.numero_serie,
+            ma.nome_marca || ' - ' || mo.nome_modelo as modelo_completo,
+            s.nome_status,
+            c.nome_completo as responsavel_atual,
+            a.valor,
+            a.imei1,
+            a.imei2,
+            a.data_cadastro
+        FROM aparelhos a
+        LEFT JOIN modelos mo ON a.modelo_id = mo.id
+        LEFT JOIN marcas ma ON mo.marca_id = ma.id
+        LEFT JOIN status s ON a.status_id = s.id
+        LEFT JOIN UltimoResponsavel ur ON a.id = ur.aparelho_id AND ur.rn = 1
+        LEFT JOIN colaboradores c ON ur.colaborador_id = c.id
+        ORDER BY {order_by}
+    """
+    df = pd.read_sql_query(query, conn)
+    conn.close()
+    return df
+
+def carregar_historico_completo(status_filter=None, start_date=None, end_date=None):
+    """Carrega o histórico completo de movimentações, com filtros avançados."""
+    conn = get_replica_connection()
+    query = """
+        SELECT
+            h.id, h.data_movimentacao, a.numero_serie, mo.nome_modelo,
+            c.nome_completo as colaborador, s.nome_status,
+            h.localizacao_atual, h.observacoes
+        FROM historico_movimentacoes h
+        JOIN aparelhos a ON h.aparelho_id = a.id
+        JOIN status s ON h.status_id = s.id
+        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+        LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    """
+    params = []
+    where_clauses = []
+
+    if status_filter and status_filter != "Todos":
+        where_clauses.append("s.nome_status = ?")
+        params.append(status_filter)
+
+    if start_date and end_date:
+        where_clauses.append("date(h.data_movimentacao) BETWEEN ? AND ?")
+        params.append(start_date.strftime('%Y-%m-%d'))
+        params.append(end_date.strftime('%Y-%m-%d'))
+    elif start_date:
+        where_clauses.append("date(h.data_movimentacao) >= ?")
+        params.append(start_date.strftime('%Y-%m-%d'))
+    elif end_date:
+        where_clauses.append("date(h.data_movimentacao) <= ?")
+        params.append(end_date.strftime('%Y-%m-%d'))
+
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+
+    query += " ORDER BY h.data_movimentacao DESC"
+
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
+
+# Colunas e junções das O.S. abertas. A condição sobre o status é literal (e não um
+# parâmetro) para o SQLite usar o índice parcial idx_manutencoes_abertas, que também
+# dá a ordem por data de envio: o custo depende só do número de O.S. abertas.
+def _manutencoes_abertas(conn, colunas, enviadas_antes=None):
+    query = f"""
+        SELECT {colunas}
+        FROM manutencoes m
+        JOIN aparelhos a ON m.aparelho_id = a.id
+        JOIN modelos mo ON a.modelo_id = mo.id
+        LEFT JOIN fornecedores f ON m.fornecedor_id = f.id
+        WHERE m.status_manutencao = 'Em Andamento'
+    """
+    params = []
+    if enviadas_antes:
+        query += " AND m.data_envio < ?"
+        params.append(enviadas_antes)
+    query += " ORDER BY m.data_envio ASC"
+    return pd.read_sql_query(query, conn, params=params)
+
+def carregar_manutencoes_em_andamento():
+    """Ordens de serviço abertas, da mais antiga para a mais recente."""
+    conn = get_db_connection()
+    df = _manutencoes_abertas(conn, "m.id, a.numero_serie, mo.nome_modelo, COALESCE(f.nome, m.fornecedor) AS fornecedor, m.data_envio, m.defeito_reportado")
+    conn.close()
+    return df
+
+def contar_manutencoes_abertas(conn=None):
+    """Número de O.S. em andamento, lido do contador mantido pelos gatilhos (ver setup_database.criar_contadores)."""
+    conexao = conn or get_db_connection()
+    linha = conexao.execute("SELECT valor FROM contadores WHERE nome = 'manutencoes_abertas'").fetchone()
+    if conn is None:
+        conexao.close()
+    return linha[0] if linha else 0
+
+# --- Análise de Danos (checklist_itens) ---
+
+# Dimensões aceites em relatorio_danos -> (expressão SQL, nome da coluna)
+DIMENSOES_DANOS = {
+    'modelo': ("m.nome_marca || ' ' || mo.nome_modelo", 'Modelo'),
+    'setor': ("COALESCE(st.nome_setor, 'Sem setor')", 'Setor'),
+    'item': ("ci.item", 'Item'),
+}
+
+def relatorio_danos(agrupar_por='modelo', data_inicio=None, data_fim=None):
+    """
+    Taxa de danos nas devoluções, agrupada por modelo, setor do colaborador ou item
+    do checklist. Conta como dano um item 'Quebrado', 'Faltando' ou não entregue.
+    """
+    expressao, coluna = DIMENSOES_DANOS[agrupar_por]
+    query = f"""
+        SELECT
+            {expressao} AS "{coluna}",
+            COUNT(*) AS itens_inspecionados,
+            COUNT(DISTINCT ci.movimentacao_id) AS devolucoes,
+            SUM(ci.estado = 'Riscado') AS riscados,
+            SUM(ci.estado = 'Quebrado') AS quebrados,
+            SUM(ci.estado = 'Faltando' OR ci.entregue = 0) AS faltando,
+            ROUND(100.0 * SUM(ci.estado IN ('Quebrado', 'Faltando') OR ci.entregue = 0) / COUNT(*), 2) AS taxa_dano
+        FROM checklist_itens ci
+        JOIN historico_movimentacoes h ON ci.movimentacao_id = h.id
+        JOIN aparelhos a ON h.aparelho_id = a.id
+        JOIN modelos mo ON a.modelo_id = mo.id
+        JOIN marcas m ON mo.marca_id = m.id
+        LEFT JOIN colaboradores c ON ci.colaborador_id = c.id
+        LEFT JOIN setores st ON c.setor_id = st.id
+        WHERE ci.tipo = 'devolucao'
+    """
+    params = []
+    if data_inicio:
+        query += " AND date(h.data_movimentacao) >= ?"
+        params.append(data_inicio.strftime('%Y-%m-%d'))
+    if data_fim:
+        query += " AND date(h.data_movimentacao) <= ?"
+        params.append(data_fim.strftime('%Y-%m-%d'))
+    query += " GROUP BY 1 ORDER BY taxa_dano DESC, itens_inspecionados DESC"
+
+    conn = get_replica_connection()
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
+
+# --- Ciclo de Vida (intervalos_status) ---
+# Cada movimentação abre um intervalo que termina na movimentação seguinte do aparelho
+# (tabela mantida por gatilhos, ver setup_database.criar_intervalos_status), por isso o
+# tempo em cada status é uma diferença de datas, sem emparelhar linhas do histórico.
+
+def linha_do_tempo_aparelho(aparelho_id):
+    """Intervalos de um aparelho, do mais antigo para o atual, com a duração em dias."""
+    conn = get_db_connection()
+    df = pd.read_sql_query("""
+        SELECT
+            i.inicio, i.fim, s.nome_status, c.nome_completo AS colaborador,
+            ROUND(julianday(COALESCE(i.fim, :agora)) - julianday(i.inicio), 1) AS dias
+        FROM intervalos_status i
+        JOIN status s ON i.status_id = s.id
+        LEFT JOIN colaboradores c ON i.colaborador_id = c.id
+        WHERE i.aparelho_id = :aparelho_id
+        ORDER BY i.inicio, i.movimentacao_id
+    """, conn, params={'aparelho_id': aparelho_id, 'agora': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+    conn.close()
+    # As datas do histórico têm ou não microssegundos, conforme a origem da escrita
+    df['inicio'] = pd.to_datetime(df['inicio'], format='mixed')
+    df['fim'] = pd.to_datetime(df['fim'], format='mixed')
+    return df
+
+def tempo_em_status(data_inicio, data_fim):
+    """
+    Tempo da frota em cada status entre duas datas: dias somados (cada intervalo é
+    cortado ao período), aparelhos, intervalos iniciados no período e a sua duração
+    média e mediana (em curso contam até agora).
+    """
+    inicio = data_inicio.strftime('%Y-%m-%d')
+    fim = (data_fim + timedelta(days=1)).strftime('%Y-%m-%d')
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_replica_connection()
+    # A condição sobre status_id deixa o SQLite procurar cada status no índice
+    # idx_intervalos_status_periodo até ao fim do período, em vez de percorrer todos os intervalos
+    intervalos = pd.read_sql_query("""
+        SELECT
+            s.nome_status AS status, i.aparelho_id, i.inicio >= :inicio AS iniciado_no_periodo,
+            julianday(MIN(COALESCE(i.fim, :agora), :fim)) - julianday(MAX(i.inicio, :inicio)) AS dias_no_periodo,
+            julianday(COALESCE(i.fim, :agora)) - julianday(i.inicio) AS duracao
+        FROM intervalos_status i
+        JOIN status s ON i.status_id = s.id
+        WHERE i.status_id IN (SELECT id FROM status)
+          AND i.inicio < :fim AND COALESCE(i.fim, :agora) > :inicio
+    """, conn, params={'inicio': inicio, 'fim': fim, 'agora': agora})
+    conn.close()
+
+    iniciados = intervalos[intervalos['iniciado_no_periodo'] == 1].groupby('status')['duracao']
+    resumo = pd.DataFrame({
+        'Dias no Período': intervalos.groupby('status')['dias_no_periodo'].sum(),
+        'Aparelhos': intervalos.groupby('status')['aparelho_id'].nunique(),
+        'Entradas no Status': iniciados.size(),
+        'Duração Média (dias)': iniciados.mean(),
+        'Duração Mediana (dias)': iniciados.median(),
+    })
+    resumo['Entradas no Status'] = resumo['Entradas no Status'].fillna(0).astype(int)
+    return resumo.round(1).sort_values('Dias no Período', ascending=False).rename_axis('Status').reset_index()
+
+def dias_ate_status(status_origem, status_destino, data_inicio, data_fim):
+    """
+    Duração média e mediana (dias) dos intervalos em 'status_origem' que terminaram
+    numa passagem para 'status_destino' dentro do período
+    (ex: dias em estoque antes da entrega: 'Em estoque' -> 'Em uso').
+    """
+    conn = get_replica_connection()
+    duracoes = pd.read_sql_query("""
+        SELECT julianday(i.fim) - julianday(i.inicio) AS dias
+        FROM intervalos_status i
+        WHERE i.status_id = (SELECT id FROM status WHERE nome_status = ?)
+          AND i.proximo_status_id = (SELECT id FROM status WHERE nome_status = ?)
+          AND i.fim >= ? AND i.fim < ?
+    """, conn, params=(status_origem, status_destino, data_inicio.strftime('%Y-%m-%d'), (data_fim + timedelta(days=1)).strftime('%Y-%m-%d')))['dias']
+    conn.close()
+    return {'media': duracoes.mean(), 'mediana': duracoes.median(), 'total': len(duracoes)}
+
+# --- Pesquisas do Assistente Flow ---
+
+def pesquisar_aparelhos_por_filtros(filtros):
+    """Aparelhos com o responsável atual, filtrados por nome do colaborador e/ou N/S."""
+    conn = get_db_connection()
+    query = """
+        SELECT a.numero_serie, mo.nome_modelo, c.nome_completo as responsavel, s.nome_status
+        FROM aparelhos a
+        LEFT JOIN modelos mo ON a.modelo_id = mo.id
+        LEFT JOIN status s ON a.status_id = s.id
+        LEFT JOIN (
+            SELECT aparelho_id, colaborador_id
+            FROM historico_movimentacoes
+            WHERE (aparelho_id, data_movimentacao) IN (
+                SELECT aparelho_id, MAX(data_movimentacao)
+                FROM historico_movimentacoes
+                GROUP BY aparelho_id
+            )
+        ) h ON a.id = h.aparelho_id
+        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+    """
+    params = []
+    where_clauses = []
+
+    if filtros.get("nome_colaborador"):
+        where_clauses.append("c.nome_completo LIKE ?")
+        params.append(f"%{filtros['nome_colaborador']}%")
+
+    if filtros.get("numero_serie"):
+        where_clauses.append("a.numero_serie LIKE ?")
+        params.append(f"%{filtros['numero_serie']}%")
+
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
+
+def pesquisar_movimentacoes_por_filtros(filtros):
+    """Histórico de movimentações filtrado por colaborador, N/S e/ou data (AAAA-MM-DD)."""
+    conn = get_db_connection()
+    query = """
+        SELECT h.data_movimentacao, a.numero_serie, mo.nome_modelo, c.nome_completo as colaborador, s.nome_status, h.observacoes
+        FROM historico_movimentacoes h
+        JOIN aparelhos a ON h.aparelho_id = a.id
+        JOIN status s ON h.status_id = s.id
+        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+        LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    """
+    params = []
+    where_clauses = []
+
+    if filtros.get("nome_colaborador"):
+        where_clauses.append("c.nome_completo LIKE ?")
+        params.append(f"%{filtros['nome_colaborador']}%")
+    if filtros.get("numero_serie"):
+        where_clauses.append("a.numero_serie LIKE ?")
+        params.append(f"%{filtros['numero_serie']}%")
+    if filtros.get("data"):
+        where_clauses.append("date(h.data_movimentacao) = ?")
+        params.append(filtros['data'])
+
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+
+    query += " ORDER BY h.data_movimentacao DESC"
+
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import threading
+
+from setup_database import configurar_banco, corrigir_contadores
+from instrumentacao import ConexaoInstrumentada
+
+# Caminho do banco de dados (pode ser alterado por variável de ambiente, ex: para testes de carga)
+DB_PATH = os.environ.get('ASSETFLOW_DB', 'inventario.db')
+
+# Utilizador da aplicação registado no log de alterações (ver setup_database.criar_log_alteracoes).
+# Cada execução de uma página do Streamlit corre numa thread própria.
+_sessao = threading.local()
+
+def definir_utilizador(login):
+    """Define o utilizador a quem são atribuídas as escritas feitas nesta thread."""
+    _sessao.utilizador = login
+
+def utilizador_atual():
+    return getattr(_sessao, 'utilizador', None)
+
+# Os gatilhos de auditoria gravam o log sem utilizador (funcionam em qualquer cliente);
+# nas conexões da aplicação, este gatilho temporário preenche-o com o da thread
+GATILHO_UTILIZADOR = """
+    CREATE TEMP TRIGGER IF NOT EXISTS trg_log_alteracoes_utilizador
+    AFTER INSERT ON main.log_alteracoes
+    WHEN NEW.utilizador IS NULL AND utilizador_atual() IS NOT NULL
+    BEGIN
+        UPDATE log_alteracoes SET utilizador = utilizador_atual() WHERE seq = NEW.seq;
+    END
+"""
+
+_estrutura_verificada = set()
+_lock_estrutura = threading.Lock()
+
+def garantir_estrutura(caminho=None):
+    """Executa as migrações do setup_database (e acerta os contadores) uma única vez por processo e por ficheiro."""
+    caminho = caminho or DB_PATH
+    if caminho in _estrutura_verificada:
+        return
+    with _lock_estrutura:
+        if caminho not in _estrutura_verificada:
+            configurar_banco(caminho)
+            corrigir_contadores(caminho)
+            _estrutura_verificada.add(caminho)
+
+def get_db_connection(timeout=5.0):
+    """
+    Abre uma conexão com o banco de dados com acesso às colunas por nome.
+    Todas as instruções são medidas (ver instrumentacao.py) e as escritas ficam
+    registadas no log de alterações em nome do utilizador definido para a thread.
+    """
+    garantir_estrutura()
+    conn = sqlite3.connect(DB_PATH, timeout=timeout, factory=ConexaoInstrumentada)
+    conn.row_factory = sqlite3.Row
+    conn.create_function('utilizador_atual', 0, utilizador_atual)
+    conn.execute(GATILHO_UTILIZADOR)
+    return conn
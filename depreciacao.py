@@ -0,0 +1,157 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import database
+from catalogo import cache_por_versao
+
+# --- Depreciação e Valor Contábil ---
+# O valor de aquisição ('aparelhos.valor') perde-se com a idade do aparelho segundo a
+# regra de depreciação do modelo, da marca ou a regra padrão (por esta ordem de
+# precedência, tabela 'regras_depreciacao'):
+#   linear             -> perde (valor - residual) em partes iguais ao longo da vida útil
+#   saldo_decrescente  -> perde 'taxa_anual' do saldo por ano, sem descer do residual,
+#                         e fica no residual no fim da vida útil
+#
+# O valor, a data de cadastro (em dias julianos) e os parâmetros da regra de cada
+# aparelho são lidos uma vez e ficam em cache até a versão dos aparelhos (valor, data
+# ou modelo), dos modelos ou das regras mudar em 'versoes_tabelas'. O valor contábil
+# da frota inteira é depois uma única passagem vetorizada do NumPy sobre esses arrays.
+
+METODOS = {'linear': "Linear", 'saldo_decrescente': "Saldo Decrescente"}
+
+DEPENDENCIAS = ('aparelhos', 'modelos', 'regras_depreciacao')
+
+DIAS_POR_MES = 365.25 / 12
+JULIANO_EPOCA = 2440587.5 # Dia juliano de 1970-01-01
+
+def dia_juliano(dia):
+    """Data em dias julianos, como o julianday() do SQLite."""
+    return (dia - date(1970, 1, 1)).days + JULIANO_EPOCA
+
+def calcular_valor_contabil(valor, meses, saldo_decrescente, vida_util_meses, taxa_anual, valor_residual_pct):
+    """
+    Valor contábil para arrays NumPy do mesmo tamanho (um elemento por aparelho).
+    'meses' é a idade do aparelho; 'saldo_decrescente' é booleano (False = linear).
+    """
+    meses = np.maximum(meses, 0.0)
+    residual = valor * valor_residual_pct
+    fracao_vida = np.minimum(meses / vida_util_meses, 1.0)
+    linear = valor - (valor - residual) * fracao_vida
+    decrescente = np.where(
+        meses >= vida_util_meses,
+        residual,
+        np.maximum(valor * (1.0 - np.nan_to_num(taxa_anual)) ** (np.minimum(meses, vida_util_meses) / 12.0), residual),
+    )
+    return np.where(saldo_decrescente, decrescente, linear)
+
+# --- Regras ---
+def carregar_regras(conn=None):
+    """Regras de depreciação com a descrição do alvo (Padrão, marca ou modelo)."""
+    conexao = conn or database.get_db_connection()
+    df = pd.read_sql_query("""
+        SELECT r.id, r.marca_id, r.modelo_id,
+               CASE WHEN r.modelo_id IS NOT NULL THEN 'Modelo: ' || mm.nome_marca || ' - ' || mo.nome_modelo
+                    WHEN r.marca_id IS NOT NULL THEN 'Marca: ' || ma.nome_marca
+                    ELSE 'Padrão' END AS alvo,
+               r.metodo, r.vida_util_meses, r.taxa_anual, r.valor_residual_pct
+        FROM regras_depreciacao r
+        LEFT JOIN marcas ma ON r.marca_id = ma.id
+        LEFT JOIN modelos mo ON r.modelo_id = mo.id
+        LEFT JOIN marcas mm ON mo.marca_id = mm.id
+        ORDER BY r.modelo_id IS NOT NULL, r.marca_id IS NOT NULL, alvo
+    """, conexao)
+    if conn is None:
+        conexao.close()
+    return df
+
+def definir_regra(metodo, vida_util_meses, valor_residual_pct, taxa_anual=None, marca_id=None, modelo_id=None):
+    """Cria ou substitui a regra do alvo (padrão, marca ou modelo)."""
+    conn = database.get_db_connection()
+    try:
+        conn.execute("""
+            INSERT INTO regras_depreciacao (marca_id, modelo_id, metodo, vida_util_meses, taxa_anual, valor_residual_pct)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (IFNULL(marca_id, 0), IFNULL(modelo_id, 0)) DO UPDATE SET
+                metodo = excluded.metodo, vida_util_meses = excluded.vida_util_meses,
+                taxa_anual = excluded.taxa_anual, valor_residual_pct = excluded.valor_residual_pct
+        """, (marca_id, modelo_id, metodo, vida_util_meses, taxa_anual if metodo == 'saldo_decrescente' else None, valor_residual_pct))
+        conn.commit()
+    finally:
+        conn.close()
+
+def remover_regra(regra_id):
+    conn = database.get_db_connection()
+    try:
+        conn.execute("DELETE FROM regras_depreciacao WHERE id = ?", (regra_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+# --- Cache por Versão dos Dados ---
+
+def _carregar_frota(conn):
+    """Arrays por aparelho: id, valor, data de cadastro (juliano) e os parâmetros da regra aplicável."""
+    df = pd.read_sql_query("""
+        SELECT a.id, COALESCE(a.valor, 0) AS valor, julianday(a.data_cadastro) AS cadastro, a.modelo_id, mo.marca_id
+        FROM aparelhos a
+        LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    """, conn)
+    regras = pd.read_sql_query("SELECT marca_id, modelo_id, metodo, vida_util_meses, taxa_anual, valor_residual_pct FROM regras_depreciacao", conn)
+
+    # Regra de cada aparelho: a do modelo, senão a da marca, senão a padrão (posição 0);
+    # sem regra padrão, os aparelhos sem regra própria não depreciam
+    sem_regra = pd.DataFrame([{'metodo': 'linear', 'vida_util_meses': np.inf, 'taxa_anual': np.nan, 'valor_residual_pct': 1.0}])
+    padrao = regras[regras['marca_id'].isna() & regras['modelo_id'].isna()]
+    regras = pd.concat([padrao if not padrao.empty else sem_regra, regras], ignore_index=True)
+    por_modelo = regras['modelo_id'].dropna()
+    por_marca = regras['marca_id'].dropna()
+    indice = (
+        df['modelo_id'].map(pd.Series(por_modelo.index, index=por_modelo.values))
+        .fillna(df['marca_id'].map(pd.Series(por_marca.index, index=por_marca.values)))
+        .fillna(0).astype(int).to_numpy()
+    )
+
+    return {
+        'id': df['id'].to_numpy(),
+        'valor': df['valor'].to_numpy(dtype=float),
+        'cadastro': df['cadastro'].to_numpy(dtype=float),
+        'saldo_decrescente': (regras['metodo'] == 'saldo_decrescente').to_numpy()[indice],
+        'vida_util_meses': regras['vida_util_meses'].to_numpy(dtype=float)[indice],
+        'taxa_anual': regras['taxa_anual'].to_numpy(dtype=float)[indice],
+        'valor_residual_pct': regras['valor_residual_pct'].to_numpy(dtype=float)[indice],
+    }
+
+def _obter_frota(conn=None):
+    return cache_por_versao('depreciacao', DEPENDENCIAS, None, _carregar_frota, conn)
+
+def _calcular(frota, data_referencia):
+    meses = np.nan_to_num((dia_juliano(data_referencia or date.today()) - frota['cadastro']) / DIAS_POR_MES)
+    contabil = calcular_valor_contabil(
+        frota['valor'], meses, frota['saldo_decrescente'],
+        frota['vida_util_meses'], frota['taxa_anual'], frota['valor_residual_pct'],
+    )
+    return contabil, meses >= frota['vida_util_meses']
+
+def valores_contabeis(data_referencia=None, conn=None):
+    """DataFrame (indexado pelo id do aparelho) com valor de aquisição, valor contábil e depreciação acumulada."""
+    frota = _obter_frota(conn)
+    contabil, _ = _calcular(frota, data_referencia)
+    return pd.DataFrame({
+        'valor': frota['valor'],
+        'valor_contabil': contabil.round(2),
+        'depreciacao_acumulada': (frota['valor'] - contabil).round(2),
+    }, index=pd.Index(frota['id'], name='aparelho_id'))
+
+def resumo_frota(data_referencia=None, conn=None):
+    """Totais da frota: valor de aquisição, valor contábil, depreciação acumulada e aparelhos no fim da vida útil."""
+    frota = _obter_frota(conn)
+    contabil, fim_da_vida = _calcular(frota, data_referencia)
+    valor_aquisicao = float(frota['valor'].sum())
+    return {
+        'valor_aquisicao': valor_aquisicao,
+        'valor_contabil': float(contabil.sum()),
+        'depreciacao_acumulada': valor_aquisicao - float(contabil.sum()),
+        'totalmente_depreciados': int(fim_da_vida.sum()),
+    }
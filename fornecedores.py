@@ -0,0 +1,105 @@
+import difflib
+import re
+import unicodedata
+from functools import lru_cache
+
+# --- Cadastro de Fornecedores ---
+# O fornecedor de uma O.S. era texto livre, por isso "Assistência XYZ",
+# "assistencia xyz" e "XYZ Ltda" contavam como fornecedores diferentes. Cada nome
+# é agora reduzido a uma chave normalizada (sem acentos, maiúsculas, pontuação nem
+# sufixos societários), única na tabela 'fornecedores', e as manutenções guardam o
+# 'fornecedor_id'. Um nome novo cuja chave não existe ainda é comparado com os
+# fornecedores existentes (palavras distintivas iguais ou nome muito semelhante)
+# antes de se criar um registo novo.
+#
+# Usado pelo setup_database (migração dos nomes já gravados) e pelas escritas de
+# manutenções; a pesquisa para o autocomplete está em pesquisa.pesquisar_fornecedores.
+
+SUFIXOS_SOCIETARIOS = {'ltda', 'me', 'epp', 'eireli', 'sa', 'mei'}
+
+# Palavras que não distinguem um fornecedor de outro (ignoradas na comparação aproximada)
+PALAVRAS_GENERICAS = {
+    'assistencia', 'tecnica', 'tecnico', 'autorizada', 'autorizado', 'authorized',
+    'service', 'servicos', 'servico', 'center', 'centro', 'celular', 'celulares',
+    'repair', 'reparos', 'reparo', 'de', 'da', 'do', 'e',
+}
+
+SEMELHANCA_MINIMA = 0.88
+
+def chave_fornecedor(nome):
+    """Chave normalizada de um nome: 'Assistência Técnica XYZ Ltda.' -> 'assistencia tecnica xyz'."""
+    texto = unicodedata.normalize('NFKD', nome or '').encode('ascii', 'ignore').decode().lower()
+    palavras = re.sub(r'[^a-z0-9]+', ' ', texto).split()
+    while len(palavras) > 1 and palavras[-1] in SUFIXOS_SOCIETARIOS:
+        palavras.pop()
+    if len(palavras) > 2 and palavras[-2:] == ['s', 'a']: # S.A. e S/A
+        del palavras[-2:]
+    return ' '.join(palavras)
+
+@lru_cache(maxsize=4096)
+def _generica(palavra):
+    """Palavra genérica, mesmo com erros de digitação ('sevice' -> 'service')."""
+    return palavra in PALAVRAS_GENERICAS or bool(difflib.get_close_matches(palavra, PALAVRAS_GENERICAS, n=1, cutoff=SEMELHANCA_MINIMA))
+
+def _palavras_distintivas(chave):
+    return frozenset(palavra for palavra in chave.split() if not _generica(palavra))
+
+def encontrar_equivalente(chave, fornecedores):
+    """
+    Procura em 'fornecedores' (dict chave -> id) o fornecedor equivalente à chave:
+    a mesma chave, as mesmas palavras distintivas, ou palavras distintivas muito
+    semelhantes (erros de digitação). Devolve o id ou None.
+    """
+    if chave in fornecedores:
+        return fornecedores[chave]
+    distintivas = _palavras_distintivas(chave)
+    if not distintivas:
+        return None # Só palavras genéricas ("Assistência Técnica"): apenas a chave exata
+    candidatos = {} # palavras distintivas -> id
+    for outra, fornecedor_id in fornecedores.items():
+        palavras = _palavras_distintivas(outra)
+        if palavras == distintivas:
+            return fornecedor_id
+        if palavras:
+            candidatos[' '.join(sorted(palavras))] = fornecedor_id
+    parecidas = difflib.get_close_matches(' '.join(sorted(distintivas)), list(candidatos), n=1, cutoff=SEMELHANCA_MINIMA)
+    return candidatos[parecidas[0]] if parecidas else None
+
+def _chaves_existentes(conn):
+    return dict(conn.execute("SELECT chave, id FROM fornecedores").fetchall())
+
+def obter_ou_criar_fornecedor(nome, conn, fornecedores=None):
+    """
+    Devolve o id do fornecedor equivalente a 'nome', criando-o se não existir
+    (None para nomes vazios). Não faz commit: é usada dentro das transações de escrita.
+    'fornecedores' (dict chave -> id) evita reler a tabela em chamadas repetidas e é
+    atualizado com o fornecedor criado.
+    """
+    chave = chave_fornecedor(nome)
+    if not chave:
+        return None
+    if fornecedores is None:
+        fornecedores = _chaves_existentes(conn)
+    fornecedor_id = encontrar_equivalente(chave, fornecedores)
+    if fornecedor_id is None:
+        fornecedor_id = conn.execute(
+            "INSERT INTO fornecedores (nome, chave) VALUES (?, ?)", (' '.join(nome.split()), chave)
+        ).lastrowid
+        fornecedores[chave] = fornecedor_id
+    return fornecedor_id
+
+def associar_manutencoes_sem_fornecedor(conn):
+    """
+    Preenche 'fornecedor_id' nas manutenções que só têm o nome em texto (dados antigos
+    ou importados). Os nomes mais usados são tratados primeiro e ficam como nome do
+    fornecedor; as variantes são associadas a eles. Devolve o número de O.S. atualizadas.
+    """
+    nomes = conn.execute("""
+        SELECT fornecedor FROM manutencoes
+        WHERE fornecedor_id IS NULL AND TRIM(COALESCE(fornecedor, '')) <> ''
+        GROUP BY fornecedor ORDER BY COUNT(*) DESC, fornecedor
+    """).fetchall()
+    fornecedores = _chaves_existentes(conn)
+    associacoes = [(obter_ou_criar_fornecedor(nome, conn, fornecedores), nome) for (nome,) in nomes]
+    cursor = conn.executemany("UPDATE manutencoes SET fornecedor_id = ? WHERE fornecedor = ? AND fornecedor_id IS NULL", associacoes)
+    return cursor.rowcount if associacoes else 0
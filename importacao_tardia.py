@@ -0,0 +1,33 @@
+import importlib
+
+# --- Importação Tardia de Bibliotecas Pesadas ---
+# plotly, fpdf, httpx, etc. demoram centenas de milissegundos a importar e só são
+# precisos quando o utilizador chega ao gráfico, ao PDF ou à chamada à API. Com
+# importar_tardiamente, o módulo só é carregado no primeiro acesso a um atributo
+# (ex: px.pie), o que acelera o primeiro render de cada página após um reinício
+# e evita carregar bibliotecas que a sessão nunca usa.
+# Auditoria do custo de importação por página: python -m benchmarks.auditar_imports
+
+class ModuloTardio:
+    """Representa um módulo ainda não importado; importa-o no primeiro acesso a um atributo."""
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def _carregar(self):
+        if self._modulo is None:
+            # O import_module usa os locks de importação do Python, por isso é seguro entre sessões
+            self._modulo = importlib.import_module(self._nome)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = "carregado" if self._modulo is not None else "por carregar"
+        return f"<ModuloTardio '{self._nome}' ({estado})>"
+
+def importar_tardiamente(nome):
+    """Substituto de 'import nome' que adia a importação até ao primeiro uso."""
+    return ModuloTardio(nome)
@@ -0,0 +1,257 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# --- Instrumentação de Consultas SQL ---
+# Todas as conexões abertas por database.get_db_connection usam as classes abaixo,
+# que medem cada instrução (incluindo a leitura das linhas) e registam o SQL
+# normalizado, o formato dos parâmetros, a duração, o número de linhas e a
+# página/função que a executou. Instruções acima do limiar vão para o log de
+# consultas lentas, com o EXPLAIN QUERY PLAN anexado.
+
+LIMIAR_CONSULTA_LENTA_MS = float(os.environ.get('ASSETFLOW_LIMIAR_CONSULTA_LENTA_MS', 200))
+LOG_CONSULTAS_LENTAS = os.environ.get('ASSETFLOW_LOG_CONSULTAS_LENTAS', os.path.join('logs', 'consultas_lentas.jsonl'))
+# Ao passar deste tamanho o log é renomeado para '<log>.1' (substituindo o anterior) e recomeçado
+TAMANHO_MAXIMO_LOG = int(float(os.environ.get('ASSETFLOW_LOG_CONSULTAS_LENTAS_MB', 10)) * 1024 * 1024)
+
+# Funções chamadas com o dicionário de cada consulta concluída (ex: perfil, métricas)
+observadores_consultas = []
+
+# Instruções que alteraram linhas desde o início do processo (catalogo.py deixa de
+# reaproveitar versões de tabelas lidas antes de uma escrita deste processo)
+escritas = 0
+
+# Conexões abertas neste momento e desde o início do processo (lidas por metricas.py)
+conexoes_abertas = 0
+conexoes_total = 0
+_lock_conexoes = threading.Lock()
+
+_RAIZ_PROJETO = os.path.dirname(os.path.abspath(__file__))
+_FICHEIROS_IGNORADOS = {os.path.abspath(__file__)}
+_lock_log = threading.Lock()
+
+@lru_cache(maxsize=512)
+def normalizar_sql(sql):
+    """Remove literais e espaços para agrupar consultas iguais com valores diferentes."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\s+", " ", sql).strip()
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+    return sql
+
+def formato_parametros(params):
+    """Descreve os tipos dos parâmetros sem guardar os valores (ex: 'str, int')."""
+    if not params:
+        return ""
+    if isinstance(params, dict):
+        return ", ".join(f"{chave}: {type(valor).__name__}" for chave, valor in params.items())
+    return ", ".join(type(valor).__name__ for valor in params)
+
+def _origem():
+    """
+    Devolve (pagina, funcao): o script do Streamlit mais externo e a função mais
+    interna do projeto na pilha de chamadas (ex: 'pesquisa.py:pesquisar_aparelhos').
+    """
+    pagina, funcao = None, None
+    frame = sys._getframe(2)
+    while frame is not None:
+        ficheiro = os.path.abspath(frame.f_code.co_filename)
+        if ficheiro.startswith(_RAIZ_PROJETO) and ficheiro not in _FICHEIROS_IGNORADOS:
+            relativo = os.path.relpath(ficheiro, _RAIZ_PROJETO)
+            if funcao is None:
+                funcao = f"{relativo}:{frame.f_code.co_name}"
+            pagina = relativo
+        frame = frame.f_back
+    return pagina, funcao
+
+def _plano_execucao(conexao, sql, params):
+    try:
+        cursor = sqlite3.Cursor(conexao)
+        linhas = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        cursor.close()
+        return [linha[-1] for linha in linhas]
+    except sqlite3.Error as e:
+        return [f"Plano indisponível: {e}"]
+
+def _escrever_log_lento(registo):
+    pasta = os.path.dirname(LOG_CONSULTAS_LENTAS)
+    with _lock_log:
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        try:
+            if os.path.getsize(LOG_CONSULTAS_LENTAS) >= TAMANHO_MAXIMO_LOG:
+                os.replace(LOG_CONSULTAS_LENTAS, f"{LOG_CONSULTAS_LENTAS}.1")
+        except FileNotFoundError:
+            pass
+        with open(LOG_CONSULTAS_LENTAS, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(registo, ensure_ascii=False, default=str) + "\n")
+
+class _Medicao:
+    """Consulta em curso: acumula o tempo do execute e das leituras até ao fim."""
+
+    __slots__ = ('conexao', 'sql', 'params', 'formato', 'pagina', 'funcao', 'duracao', 'linhas')
+
+    def __init__(self, conexao, sql, params, formato):
+        self.conexao = conexao
+        self.sql = sql
+        self.params = params
+        self.formato = formato
+        self.pagina, self.funcao = _origem()
+        self.duracao = 0.0
+        self.linhas = 0
+
+    def concluir(self, linhas_afetadas):
+        global escritas
+        if linhas_afetadas > 0: # INSERT/UPDATE/DELETE (o rowcount de um SELECT é -1)
+            escritas += 1
+        duracao_ms = self.duracao * 1000
+        if self.linhas == 0 and linhas_afetadas > 0:
+            self.linhas = linhas_afetadas
+        registo = {
+            'data': datetime.now().isoformat(timespec='milliseconds'),
+            'sql': normalizar_sql(self.sql),
+            'parametros': self.formato,
+            'duracao_ms': round(duracao_ms, 3),
+            'linhas': self.linhas,
+            'pagina': self.pagina,
+            'funcao': self.funcao,
+        }
+        for observador in list(observadores_consultas):
+            try:
+                observador(registo)
+            except Exception:
+                pass
+        if duracao_ms >= LIMIAR_CONSULTA_LENTA_MS:
+            registo['plano'] = _plano_execucao(self.conexao, self.sql, self.params)
+            try:
+                _escrever_log_lento(registo)
+            except OSError:
+                pass
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede o execute e as leituras; a medição termina quando o resultado acaba."""
+
+    _medicao = None
+
+    def _iniciar(self, sql, params, formato):
+        self._terminar()
+        self._medicao = _Medicao(self.connection, sql, params, formato)
+
+    def _terminar(self):
+        medicao, self._medicao = self._medicao, None
+        if medicao is not None:
+            medicao.concluir(self.rowcount)
+
+    def _medir(self, funcao, *args):
+        medicao = self._medicao
+        if medicao is None:
+            return funcao(*args)
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            medicao.duracao += time.perf_counter() - inicio
+
+    def execute(self, sql, params=()):
+        self._iniciar(sql, params, formato_parametros(params))
+        self._medir(super().execute, sql, params)
+        if self.description is None:
+            # INSERT/UPDATE/DELETE/DDL: não há linhas para ler
+            self._terminar()
+        return self
+
+    def executemany(self, sql, seq_params):
+        seq_params = list(seq_params)
+        formato = f"{len(seq_params)} x ({formato_parametros(seq_params[0]) if seq_params else ''})"
+        # O plano de execução (se a instrução for lenta) é pedido com a primeira linha de parâmetros
+        self._iniciar(sql, seq_params[0] if seq_params else (), formato)
+        self._medir(super().executemany, sql, seq_params)
+        self._terminar()
+        return self
+
+    def fetchone(self):
+        linha = self._medir(super().fetchone)
+        if self._medicao is not None:
+            if linha is None:
+                self._terminar()
+            else:
+                self._medicao.linhas += 1
+        return linha
+
+    def fetchmany(self, size=None):
+        linhas = self._medir(super().fetchmany, size if size is not None else self.arraysize)
+        if self._medicao is not None:
+            self._medicao.linhas += len(linhas)
+            if len(linhas) < (size if size is not None else self.arraysize):
+                self._terminar()
+        return linhas
+
+    def fetchall(self):
+        linhas = self._medir(super().fetchall)
+        if self._medicao is not None:
+            self._medicao.linhas += len(linhas)
+            self._terminar()
+        return linhas
+
+    def __next__(self):
+        try:
+            linha = self._medir(super().__next__)
+        except StopIteration:
+            self._terminar()
+            raise
+        if self._medicao is not None:
+            self._medicao.linhas += 1
+        return linha
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        # Consultas lidas só em parte (ex: conn.execute(...).fetchone()) terminam aqui
+        try:
+            self._terminar()
+        except Exception:
+            pass
+
+def _contar_conexao(delta):
+    global conexoes_abertas, conexoes_total
+    with _lock_conexoes:
+        conexoes_abertas += delta
+        if delta > 0:
+            conexoes_total += delta
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores (incluindo os de conn.execute e pandas) são instrumentados."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._aberta = True
+        _contar_conexao(1)
+
+    def close(self):
+        if self._aberta:
+            self._aberta = False
+            _contar_conexao(-1)
+        super().close()
+
+    def __del__(self):
+        # Conexões que as páginas não fecham explicitamente
+        if getattr(self, '_aberta', False):
+            self._aberta = False
+            _contar_conexao(-1)
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_params):
+        return self.cursor().executemany(sql, seq_params)
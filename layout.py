@@ -0,0 +1,160 @@
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+import streamlit as st
+from auth import logout
+from database import definir_utilizador
+
+# --- Layout Partilhado (Header, Barra Lateral e CSS) ---
+# Antes, cada página repetia ~90 linhas com o mesmo bloco <style>, a logo e o
+# footer da barra lateral, e os ícones vinham do GitHub a cada sessão do browser.
+# Aqui o CSS é minificado e os ícones são SVG embutidos (data URI); ambos são
+# montados uma vez por processo e reutilizados em todas as execuções das páginas.
+#
+# Uso numa página (depois da autenticação e de perfil.iniciar_pagina):
+#     layout.aplicar()              # CSS + logo + barra lateral com footer
+#     layout.aplicar('chat')        # idem, com os estilos extra do título do Flow
+# ou, só com as peças necessárias:
+#     layout.estilos('logo'); layout.cabecalho()
+
+ESTILOS = {
+    'logo': """
+        /* Estilos da Logo */
+        .logo-text {
+            font-family: 'Courier New', monospace;
+            font-size: 28px;
+            font-weight: bold;
+            padding-top: 20px;
+        }
+        .logo-asset { color: #003366; }
+        .logo-flow { color: #E30613; }
+        @media (prefers-color-scheme: dark) {
+            .logo-asset { color: #FFFFFF; }
+            .logo-flow { color: #FF4B4B; }
+        }
+    """,
+    'rodape': """
+        /* Estilos para o footer na barra lateral */
+        .sidebar-footer {
+            text-align: center;
+            padding-top: 20px;
+            padding-bottom: 20px;
+        }
+        .sidebar-footer a { margin-right: 15px; text-decoration: none; }
+        .sidebar-footer img {
+            width: 25px;
+            height: 25px;
+            filter: grayscale(1) opacity(0.5);
+            transition: filter 0.3s;
+        }
+        .sidebar-footer img:hover { filter: grayscale(0) opacity(1); }
+        @media (prefers-color-scheme: dark) {
+            .sidebar-footer img { filter: grayscale(1) opacity(0.6) invert(1); }
+            .sidebar-footer img:hover { filter: opacity(1) invert(1); }
+        }
+    """,
+    'chat': """
+        /* Estilos para a Logo do Chat (Converse com o Flow) */
+        .flow-title {
+            display: flex;
+            align-items: center;
+            padding-bottom: 10px;
+        }
+        .flow-title .icon {
+            font-size: 2.5em;
+            margin-right: 15px;
+        }
+        .flow-title h1 {
+            font-family: 'Courier New', monospace;
+            font-size: 3em;
+            font-weight: bold;
+            margin: 0;
+            padding: 0;
+            line-height: 1;
+        }
+        .flow-title .text-chat { color: #003366; }
+        .flow-title .text-flow { color: #E30613; }
+        @media (prefers-color-scheme: dark) {
+            .flow-title .text-chat { color: #FFFFFF; }
+            .flow-title .text-flow { color: #FF4B4B; }
+        }
+    """,
+}
+
+# Ícones do footer (a preto, como os originais do Font Awesome; o CSS trata do tema escuro)
+ICONES = {
+    'github': (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 16 16"><path d="M8 0C3.58 0 0 3.58 0 8c0 3.54 '
+        '2.29 6.53 5.47 7.59.4.07.55-.17.55-.38 0-.19-.01-.82-.01-1.49-2.01.37-2.53-.49-2.69-.94-.09-.23-.48-.94-.82-1.13'
+        '-.28-.15-.68-.52-.01-.53.63-.01 1.08.58 1.23.82.72 1.21 1.87.87 2.33.66.07-.52.28-.87.51-1.07-1.78-.2-3.64-.89'
+        '-3.64-3.95 0-.87.31-1.59.82-2.15-.08-.2-.36-1.02.08-2.12 0 0 .67-.21 2.2.82.64-.18 1.32-.27 2-.27.68 0 1.36.09 '
+        '2 .27 1.53-1.04 2.2-.82 2.2-.82.44 1.1.16 1.92.08 2.12.51.56.82 1.27.82 2.15 0 3.07-1.87 3.75-3.65 3.95.29.25.54'
+        '.73.54 1.48 0 1.07-.01 1.93-.01 2.2 0 .21.15.46.55.38A8.013 8.013 0 0016 8c0-4.42-3.58-8-8-8z"/></svg>'
+    ),
+    'linkedin': (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path fill-rule="evenodd" d="M3 0h18a3 3 0 0 1 3 3v18'
+        'a3 3 0 0 1-3 3H3a3 3 0 0 1-3-3V3a3 3 0 0 1 3-3zm1.8 9.5V19h3.4V9.5zM6.5 4.7a1.8 1.8 0 1 0 0 3.6 1.8 1.8 0 0 0 0-3.6z'
+        'm4 4.8V19h3.4v-4.7c0-1.3.4-2.4 1.9-2.4s1.7 1.3 1.7 2.5V19h3.4v-5.1c0-2.7-.7-4.7-3.9-4.7-1.7 0-2.9.8-3.4 1.7V9.5z"/></svg>'
+    ),
+}
+
+LIGACOES_RODAPE = (
+    ('GitHub', 'https://github.com/caufreitxs026', 'github'),
+    ('LinkedIn', 'https://linkedin.com/in/cauafreitas', 'linkedin'),
+)
+
+def minificar_css(css):
+    """Remove comentários e espaços desnecessários do CSS."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def icone_data_uri(nome):
+    """Ícone SVG como data URI, para ser usado num <img> sem pedido externo."""
+    return "data:image/svg+xml," + quote(ICONES[nome])
+
+@lru_cache(maxsize=None)
+def _bloco_estilos(pecas):
+    return "<style>" + "".join(minificar_css(ESTILOS[peca]) for peca in pecas) + "</style>"
+
+@lru_cache(maxsize=None)
+def _html_rodape():
+    ligacoes = "".join(
+        f'<a href="{url}" target="_blank" title="{titulo}"><img src="{icone_data_uri(icone)}" alt="{titulo}"></a>'
+        for titulo, url, icone in LIGACOES_RODAPE
+    )
+    return f'<div class="sidebar-footer">{ligacoes}</div>'
+
+HTML_LOGO = '<div class="logo-text"><span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span></div>'
+
+# --- Peças do Layout ---
+def estilos(*pecas):
+    """Emite um único bloco <style> minificado com as peças pedidas (chaves de ESTILOS)."""
+    st.markdown(_bloco_estilos(pecas), unsafe_allow_html=True)
+
+def cabecalho():
+    """Logo no canto superior esquerdo."""
+    st.markdown(HTML_LOGO, unsafe_allow_html=True)
+
+def barra_lateral(rodape=True):
+    """Informações do utilizador, botão de Logout e, opcionalmente, o footer com os ícones."""
+    with st.sidebar:
+        st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
+        st.write(f"Cargo: **{st.session_state['user_role']}**")
+        if st.button("Logout"):
+            logout()
+        if rodape:
+            st.markdown("---")
+            st.markdown(_html_rodape(), unsafe_allow_html=True)
+
+def aplicar(*estilos_extra):
+    """
+    Layout completo das páginas: CSS (logo, footer e extras), header e barra lateral.
+    Também identifica o utilizador da sessão nas escritas desta execução (log de alterações).
+    """
+    definir_utilizador(st.session_state.get('username'))
+    estilos('logo', 'rodape', *estilos_extra)
+    cabecalho()
+    barra_lateral()
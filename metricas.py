@@ -0,0 +1,232 @@
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instrumentacao
+
+# --- Métricas no Formato Prometheus ---
+# Contadores, medidores e histogramas mantidos em memória por processo (cada réplica
+# do Streamlit tem os seus). São expostos em formato de texto Prometheus por um
+# pequeno servidor HTTP e/ou por um ficheiro reescrito periodicamente (para o
+# textfile collector do node_exporter), conforme as variáveis de ambiente:
+#   ASSETFLOW_METRICAS_PORTA      -> porta do endpoint /metrics (ex: 9464)
+#   ASSETFLOW_METRICAS_ENDERECO   -> endereço do endpoint (padrão 127.0.0.1)
+#   ASSETFLOW_METRICAS_FICHEIRO   -> caminho do ficheiro .prom ('{pid}' no caminho dá um
+#                                    ficheiro por processo, ex: assetflow_{pid}.prom)
+#   ASSETFLOW_METRICAS_INTERVALO  -> segundos entre escritas do ficheiro (padrão 15)
+#   ASSETFLOW_INSTANCIA           -> rótulo 'instancia' de todas as séries (padrão máquina:pid)
+# Os exportadores são iniciados pelo app.py (iniciar_exportador), não na importação.
+# Com várias réplicas na mesma máquina só a primeira fica com a porta; o rótulo
+# 'instancia' e o ficheiro por processo evitam que as réplicas se sobreponham.
+
+_registo = []
+_lock = threading.Lock()
+_log = logging.getLogger(__name__)
+
+INSTANCIA = os.environ.get('ASSETFLOW_INSTANCIA') or f"{socket.gethostname()}:{os.getpid()}"
+
+BUCKETS_PADRAO = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = [f'instancia="{_escapar(INSTANCIA)}"']
+    pares.extend(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}"
+
+def _formatar_numero(valor):
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=(), funcao=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        # Com 'funcao', o valor (sem rótulos) é lido no momento da exportação
+        self.funcao = funcao
+        self._valores = {}
+        with _lock:
+            _registo.append(self)
+
+    def _chave(self, rotulos):
+        return tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+
+    def _linhas(self):
+        if self.funcao is not None:
+            return [f"{self.nome}{_formatar_rotulos((), ())} {_formatar_numero(self.funcao())}"]
+        with _lock:
+            valores = dict(self._valores)
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}" for chave, valor in sorted(valores.items())]
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._linhas())
+        return linhas
+
+class Contador(_Metrica):
+    """Valor que só aumenta (ex: número de consultas, erros)."""
+    tipo = 'counter'
+
+    def inc(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with _lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (ex: conexões abertas)."""
+    tipo = 'gauge'
+
+    def definir(self, valor, **rotulos):
+        with _lock:
+            self._valores[self._chave(rotulos)] = valor
+
+class Histograma(_Metrica):
+    """Distribuição de valores (ex: durações em segundos) em buckets cumulativos."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with _lock:
+            serie = self._valores.get(chave)
+            if serie is None:
+                serie = self._valores[chave] = {'contagens': [0] * len(self.buckets), 'soma': 0.0, 'total': 0}
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie['contagens'][i] += 1
+                    break
+            serie['soma'] += valor
+            serie['total'] += 1
+
+    def _linhas(self):
+        with _lock:
+            valores = {chave: {'contagens': list(s['contagens']), 'soma': s['soma'], 'total': s['total']} for chave, s in self._valores.items()}
+        linhas = []
+        for chave, serie in sorted(valores.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, serie['contagens']):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(serie['soma'])}")
+            linhas.append(f"{self.nome}_count{rotulos} {serie['total']}")
+        return linhas
+
+def exportar_texto():
+    """Todas as métricas do processo no formato de texto do Prometheus."""
+    with _lock:
+        metricas = list(_registo)
+    linhas = []
+    for metrica in metricas:
+        linhas.extend(metrica.exportar())
+    return "\n".join(linhas) + "\n"
+
+# --- Métricas da Aplicação ---
+
+CONSULTA_SQL_SEGUNDOS = Histograma('assetflow_consulta_sql_segundos', 'Duração das instruções SQL (execução e leitura das linhas).', ('pagina',))
+CONSULTAS_LENTAS = Contador('assetflow_consultas_lentas_total', 'Instruções SQL acima do limiar de consulta lenta.', ('pagina',))
+CONEXOES_ABERTAS = Medidor('assetflow_conexoes_abertas', 'Conexões SQLite abertas neste momento.', funcao=lambda: instrumentacao.conexoes_abertas)
+CONEXOES_TOTAL = Contador('assetflow_conexoes_total', 'Conexões SQLite abertas desde o início do processo.', funcao=lambda: instrumentacao.conexoes_total)
+
+CACHE_PEDIDOS = Contador('assetflow_cache_pedidos_total', 'Pedidos a uma cache (dashboard, catalogo, arquivo_termos, analise_manutencao, depreciacao, tco).', ('cache',))
+CACHE_FALHAS = Contador('assetflow_cache_falhas_total', 'Pedidos que não foram servidos pela cache.', ('cache',))
+
+IMPORTACAO_LINHAS = Contador('assetflow_importacao_linhas_total', 'Linhas processadas nas importações de planilhas.', ('tabela', 'resultado'))
+IMPORTACAO_SEGUNDOS = Histograma('assetflow_importacao_segundos', 'Duração das importações de planilhas.', ('tabela',), buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300))
+
+TERMO_RENDERIZACAO_SEGUNDOS = Histograma('assetflow_termo_renderizacao_segundos', 'Tempo de renderização de um termo em PDF.', ('modo',))
+BACKUP_SEGUNDOS = Histograma('assetflow_backup_segundos', 'Duração da geração e da restauração de backups.', ('operacao', 'resultado'), buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300))
+
+REPLICA_SINCRONIZACOES = Contador('assetflow_replica_sincronizacoes_total', 'Verificações da réplica de leitura, por resultado (copiada, sem_alteracoes, erro).', ('resultado',))
+REPLICA_SINCRONIZACAO_SEGUNDOS = Histograma('assetflow_replica_sincronizacao_segundos', 'Duração das cópias do banco principal para a réplica de leitura.', buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+
+GEMINI_SEGUNDOS = Histograma('assetflow_gemini_segundos', 'Latência das chamadas à API Gemini.', ('resultado',), buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30))
+GEMINI_ERROS = Contador('assetflow_gemini_erros_total', 'Erros nas chamadas à API Gemini, por tipo.', ('tipo',))
+
+def _observar_consulta(registo):
+    pagina = registo['pagina'] or ''
+    CONSULTA_SQL_SEGUNDOS.observar(registo['duracao_ms'] / 1000, pagina=pagina)
+    if registo['duracao_ms'] >= instrumentacao.LIMIAR_CONSULTA_LENTA_MS:
+        CONSULTAS_LENTAS.inc(pagina=pagina)
+
+instrumentacao.observadores_consultas.append(_observar_consulta)
+
+# --- Exportação (servidor HTTP e ficheiro de texto) ---
+
+class _PedidoMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        corpo = exportar_texto().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass # Não polui o log do Streamlit com cada recolha
+
+def _escrever_ficheiro_periodicamente(caminho, intervalo):
+    while True:
+        try:
+            pasta = os.path.dirname(caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            temporario = f"{caminho}.{os.getpid()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as ficheiro:
+                ficheiro.write(exportar_texto())
+            os.replace(temporario, caminho)
+        except OSError as erro:
+            _log.warning("Não foi possível escrever as métricas em %s: %s", caminho, erro)
+        time.sleep(intervalo)
+
+def _remover_ficheiro(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+_exportador_iniciado = False
+
+def iniciar_exportador():
+    """Inicia, uma única vez por processo, os exportadores configurados por variáveis de ambiente."""
+    global _exportador_iniciado
+    with _lock:
+        if _exportador_iniciado:
+            return
+        _exportador_iniciado = True
+
+    porta = os.environ.get('ASSETFLOW_METRICAS_PORTA')
+    if porta:
+        endereco = os.environ.get('ASSETFLOW_METRICAS_ENDERECO', '127.0.0.1')
+        try:
+            servidor = ThreadingHTTPServer((endereco, int(porta)), _PedidoMetricas)
+            threading.Thread(target=servidor.serve_forever, name='assetflow-metricas-http', daemon=True).start()
+        except OSError as erro:
+            # Porta ocupada (ex: outra réplica na mesma máquina); o ficheiro continua disponível
+            _log.warning("Endpoint de métricas não iniciado em %s:%s: %s", endereco, porta, erro)
+
+    caminho = os.environ.get('ASSETFLOW_METRICAS_FICHEIRO')
+    if caminho:
+        intervalo = float(os.environ.get('ASSETFLOW_METRICAS_INTERVALO', 15))
+        if '{pid}' in caminho:
+            caminho = caminho.replace('{pid}', str(os.getpid()))
+            atexit.register(_remover_ficheiro, caminho) # Não deixa séries de processos terminados
+        threading.Thread(target=_escrever_ficheiro_periodicamente, args=(caminho, intervalo), name='assetflow-metricas-ficheiro', daemon=True).start()
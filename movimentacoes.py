@@ -0,0 +1,261 @@
+import json
+import re
+from datetime import datetime, date
+
+from database import get_db_connection
+from catalogo import status_id
+import replica
+
+# --- Movimentações e Devoluções (individuais e em massa) ---
+# Lógica partilhada pelas páginas de movimentação (pages/4_Movimentacoes.py) e de
+# devolução (pages/9_Devolucoes.py), sem dependência do Streamlit. As operações em
+# massa (ex: entrega a uma equipa nova, desligamento de vários colaboradores)
+# gravam todos os aparelhos numa única transação com executemany, em vez de uma
+# execução da página por aparelho.
+
+# Destino escolhido na triagem -> (novo status, localização, mantém o vínculo ao colaborador)
+DESTINOS_DEVOLUCAO = {
+    "Devolver ao Estoque": ("Em estoque", "Estoque Interno", False),
+    "Enviar para Manutenção": ("Em manutenção", "Triagem Manutenção", True),
+    "Baixar/Inutilizar": ("Baixado/Inutilizado", "Descarte", False),
+}
+
+ITENS_CHECKLIST_DEVOLUCAO = ["Tela", "Carcaça", "Bateria", "Botões", "USB", "Chip", "Carregador", "Cabo USB", "Capa", "Película"]
+OPCOES_ESTADO_DEVOLUCAO = ["Bom", "Riscado", "Quebrado", "Faltando"]
+
+def separar_series(texto):
+    """Lista de N/S colados ou lidos por leitor de código de barras (um por linha, ou separados por vírgula/espaço)."""
+    return list(dict.fromkeys(serie for serie in re.split(r"[\s,;]+", texto or "") if serie))
+
+def separar_pares(texto):
+    """
+    Pares (N/S, colaborador) colados de uma planilha: uma linha por aparelho, com o
+    N/S e o código, CPF ou nome do colaborador separados por tabulação, ';' ou ','.
+    """
+    pares = []
+    for linha in (texto or "").splitlines():
+        partes = [parte.strip() for parte in re.split(r"[\t;,]", linha, maxsplit=1)]
+        if partes[0]:
+            pares.append((partes[0], partes[1] if len(partes) > 1 else ""))
+    return pares
+
+def _aparelhos_movimentaveis(coluna, valores):
+    """Aparelhos não baixados cuja 'coluna' (id ou numero_serie) está na lista, numa só consulta."""
+    conn = get_db_connection()
+    aparelhos = conn.execute(f"""
+        SELECT a.id, a.numero_serie, mo.nome_modelo, ma.nome_marca, s.nome_status
+        FROM aparelhos a
+        JOIN modelos mo ON a.modelo_id = mo.id
+        JOIN marcas ma ON mo.marca_id = ma.id
+        JOIN status s ON a.status_id = s.id
+        WHERE a.{coluna} IN (SELECT value FROM json_each(?)) AND s.nome_status != 'Baixado/Inutilizado'
+        ORDER BY a.numero_serie COLLATE NOCASE
+    """, (json.dumps(list(valores)),)).fetchall()
+    conn.close()
+    return aparelhos
+
+def aparelhos_por_ids(ids):
+    return _aparelhos_movimentaveis('id', ids) if ids else []
+
+def aparelhos_por_series(series):
+    """
+    Resolve uma lista de N/S numa só consulta, excluindo os aparelhos baixados.
+    Devolve (linhas encontradas, N/S sem correspondência).
+    """
+    if not series:
+        return [], []
+    aparelhos = _aparelhos_movimentaveis('numero_serie', series)
+    encontradas = {aparelho['numero_serie'] for aparelho in aparelhos}
+    return aparelhos, [serie for serie in series if serie not in encontradas]
+
+def registar_movimentacoes(movimentos):
+    """
+    Regista várias movimentações numa única transação. Cada movimento é um dicionário
+    com aparelho_id, colaborador_id (ou None), status_id, status_nome, localizacao e
+    observacoes. Nos envios para manutenção, o colaborador passa a ser o último
+    que teve o aparelho e é aberta uma O.S. preliminar.
+
+    Devolve o número de movimentações gravadas. Em caso de erro nada é gravado e a
+    exceção é propagada.
+    """
+    conn = get_db_connection(timeout=15.0)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        para_manutencao = [m['aparelho_id'] for m in movimentos if m['status_nome'] == "Em manutenção"]
+        ultimo_colaborador = {}
+        if para_manutencao:
+            ultimo_colaborador = dict(conn.execute("""
+                SELECT h.aparelho_id, h.colaborador_id
+                FROM historico_movimentacoes h
+                WHERE h.aparelho_id IN (SELECT value FROM json_each(?))
+                  AND h.id = (SELECT id FROM historico_movimentacoes
+                              WHERE aparelho_id = h.aparelho_id AND colaborador_id IS NOT NULL
+                              ORDER BY data_movimentacao DESC, id DESC LIMIT 1)
+            """, (json.dumps(para_manutencao),)).fetchall())
+
+        agora, hoje = datetime.now(), date.today()
+        historico, estados, manutencoes = [], [], []
+        for movimento in movimentos:
+            aparelho_id = movimento['aparelho_id']
+            colaborador_id = movimento['colaborador_id']
+            if movimento['status_nome'] == "Em manutenção":
+                colaborador_id = ultimo_colaborador.get(aparelho_id, colaborador_id)
+                manutencoes.append((aparelho_id, colaborador_id, hoje, movimento['observacoes'], 'Em Andamento'))
+            historico.append((agora, aparelho_id, colaborador_id, movimento['status_id'], movimento['localizacao'], movimento['observacoes']))
+            estados.append((movimento['status_id'], aparelho_id))
+
+        conn.executemany(
+            "INSERT INTO historico_movimentacoes (data_movimentacao, aparelho_id, colaborador_id, status_id, localizacao_atual, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
+            historico
+        )
+        conn.executemany("UPDATE aparelhos SET status_id = ? WHERE id = ?", estados)
+        conn.executemany("""
+            INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, data_envio, defeito_reportado, status_manutencao)
+            VALUES (?, ?, ?, ?, ?)
+        """, manutencoes)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    replica.pedir_sincronizacao() # Os relatórios de histórico leem da réplica de leitura, se estiver ativa
+    return len(historico)
+
+def colaboradores_por_identificador(valores):
+    """
+    Resolve uma lista de códigos, CPFs ou nomes completos (ex: de uma planilha de
+    desligamentos) numa só consulta. Devolve (dict valor -> linha do colaborador,
+    valores sem correspondência, valores ambíguos). Vários valores podem apontar para
+    o mesmo colaborador (o código e o nome, p.ex.); um valor que corresponde a mais de
+    um colaborador (homónimos) fica nos ambíguos e não é resolvido.
+    """
+    valores = list(dict.fromkeys(str(valor).strip() for valor in valores if str(valor).strip()))
+    if not valores:
+        return {}, [], []
+    conn = get_db_connection()
+    linhas = conn.execute("""
+        WITH pedidos AS (SELECT DISTINCT value AS valor FROM json_each(?))
+        SELECT DISTINCT p.valor, c.id, c.nome_completo, c.codigo
+        FROM pedidos p
+        JOIN colaboradores c ON c.codigo = p.valor COLLATE NOCASE OR c.cpf = p.valor OR c.nome_completo = p.valor COLLATE NOCASE
+        ORDER BY c.nome_completo COLLATE NOCASE
+    """, (json.dumps(valores),)).fetchall()
+    conn.close()
+    correspondencias = {}
+    for linha in linhas:
+        correspondencias.setdefault(linha['valor'], []).append(linha)
+    por_valor = {valor: encontrados[0] for valor, encontrados in correspondencias.items() if len(encontrados) == 1}
+    nao_encontrados = [valor for valor in valores if valor not in correspondencias]
+    ambiguos = [valor for valor in valores if len(correspondencias.get(valor, ())) > 1]
+    return por_valor, nao_encontrados, ambiguos
+
+def aparelhos_em_posse(colaborador_ids):
+    """
+    Aparelhos 'Em uso' cuja última movimentação é de um dos colaboradores indicados,
+    numa única consulta (usa idx_historico_colaborador e idx_historico_aparelho_data).
+    """
+    if not colaborador_ids:
+        return []
+    conn = get_db_connection()
+    aparelhos = conn.execute("""
+        SELECT
+            a.id as aparelho_id, a.numero_serie, mo.nome_modelo, ma.nome_marca,
+            c.id as colaborador_id, c.nome_completo as colaborador_nome
+        FROM historico_movimentacoes h
+        JOIN aparelhos a ON a.id = h.aparelho_id AND a.status_id = (SELECT id FROM status WHERE nome_status = 'Em uso')
+        JOIN colaboradores c ON c.id = h.colaborador_id
+        JOIN modelos mo ON a.modelo_id = mo.id
+        JOIN marcas ma ON mo.marca_id = ma.id
+        WHERE h.colaborador_id IN (SELECT value FROM json_each(?))
+          AND h.id = (SELECT id FROM historico_movimentacoes
+                      WHERE aparelho_id = h.aparelho_id
+                      ORDER BY data_movimentacao DESC, id DESC LIMIT 1)
+        ORDER BY c.nome_completo COLLATE NOCASE, a.numero_serie COLLATE NOCASE
+    """, (json.dumps(list(colaborador_ids)),)).fetchall()
+    conn.close()
+    return aparelhos
+
+def contas_gmail_dos_colaboradores(colaborador_ids):
+    """Contas Gmail atualmente vinculadas aos colaboradores indicados."""
+    if not colaborador_ids:
+        return []
+    conn = get_db_connection()
+    contas = conn.execute(
+        "SELECT id, email, colaborador_id FROM contas_gmail WHERE colaborador_id IN (SELECT value FROM json_each(?)) ORDER BY email",
+        (json.dumps(list(colaborador_ids)),)
+    ).fetchall()
+    conn.close()
+    return contas
+
+def devolver_aparelhos(devolucoes, desvincular_contas_de=()):
+    """
+    Processa várias devoluções numa única transação. Cada devolução é um dicionário
+    com aparelho_id, colaborador_id, destino (chave de DESTINOS_DEVOLUCAO), checklist
+    ({item: {'entregue', 'estado'}}) e observacoes. Aparelhos que entretanto deixaram
+    de estar 'Em uso' (ex: devolvidos noutra sessão) são ignorados.
+    As contas Gmail dos colaboradores em 'desvincular_contas_de' ficam sem colaborador.
+
+    Devolve {'por_destino': {destino: quantidade}, 'ignorados': [aparelho_id], 'contas_desvinculadas': n}.
+    Em caso de erro nada é gravado e a exceção é propagada.
+    """
+    conn = get_db_connection(timeout=15.0)
+    try:
+        # Reserva a escrita já no início, para a verificação abaixo não ficar desatualizada
+        conn.execute("BEGIN IMMEDIATE")
+        em_uso_id = status_id("Em uso", conn)
+        status_destino = {destino: status_id(nome_status, conn) for destino, (nome_status, _, _) in DESTINOS_DEVOLUCAO.items()}
+        ainda_em_uso = {linha[0] for linha in conn.execute(
+            "SELECT id FROM aparelhos WHERE status_id = ? AND id IN (SELECT value FROM json_each(?))",
+            (em_uso_id, json.dumps([d['aparelho_id'] for d in devolucoes]))
+        )}
+
+        agora, hoje = datetime.now(), date.today()
+        historico, estados, manutencoes = [], [], []
+        por_destino, ignorados = {}, []
+        for devolucao in devolucoes:
+            aparelho_id = devolucao['aparelho_id']
+            if aparelho_id not in ainda_em_uso:
+                ignorados.append(aparelho_id)
+                continue
+            ainda_em_uso.discard(aparelho_id) # Um aparelho repetido na lista só é devolvido uma vez
+            _, localizacao, mantem_vinculo = DESTINOS_DEVOLUCAO[devolucao['destino']]
+            novo_status_id = status_destino[devolucao['destino']]
+            historico.append((
+                agora, aparelho_id, devolucao['colaborador_id'] if mantem_vinculo else None, novo_status_id,
+                localizacao, devolucao.get('observacoes'), json.dumps(devolucao['checklist'])
+            ))
+            estados.append((novo_status_id, aparelho_id))
+            if devolucao['destino'] == "Enviar para Manutenção":
+                # INTEGRAÇÃO: abre uma O.S. preliminar, como na devolução individual
+                manutencoes.append((aparelho_id, devolucao['colaborador_id'], hoje, devolucao.get('observacoes'), 'Em Andamento'))
+            por_destino[devolucao['destino']] = por_destino.get(devolucao['destino'], 0) + 1
+
+        conn.executemany("""
+            INSERT INTO historico_movimentacoes
+            (data_movimentacao, aparelho_id, colaborador_id, status_id, localizacao_atual, observacoes, checklist_devolucao)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, historico)
+        conn.executemany("UPDATE aparelhos SET status_id = ? WHERE id = ?", estados)
+        conn.executemany("""
+            INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, data_envio, defeito_reportado, status_manutencao)
+            VALUES (?, ?, ?, ?, ?)
+        """, manutencoes)
+
+        contas_desvinculadas = 0
+        if desvincular_contas_de:
+            contas_desvinculadas = conn.execute(
+                "UPDATE contas_gmail SET colaborador_id = NULL WHERE colaborador_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(desvincular_contas_de)),)
+            ).rowcount
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    replica.pedir_sincronizacao()
+    return {'por_destino': por_destino, 'ignorados': ignorados, 'contas_desvinculadas': contas_desvinculadas}
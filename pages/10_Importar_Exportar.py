@@ -1,110 +1,37 @@
 import streamlit as st
+import perfil
+import layout
 import sqlite3
 import pandas as pd
 from datetime import date, datetime
 import io
+import time
+from database import get_db_connection
+from catalogo import CATALOGOS, obter_catalogo
+from consultas import carregar_inventario_completo
+import depreciacao
+import metricas
 
 # --- Autenticação e Permissão ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
+perfil.iniciar_pagina("10_Importar_Exportar")
+
 if st.session_state.get('user_role') != 'Administrador':
     st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
-    st.stop()
-
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
+    perfil.parar()
 
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções do DB ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def get_foreign_key_map(table_name, column_name, key_column='id'):
     """Cria um dicionário mapeando nomes a IDs para chaves estrangeiras."""
+    # Tabelas de referência vêm da cache de catálogos (modelos são indexados por 'Marca - Modelo')
+    if table_name in CATALOGOS:
+        return dict(obter_catalogo(table_name).ids)
+
     conn = get_db_connection()
     key_alias = key_column.split('.')[-1]
     
@@ -119,6 +46,42 @@ def get_foreign_key_map(table_name, column_name, key_column='id'):
         conn.close()
         return pd.Series(df[key_column].values, index=df[column_name]).to_dict()
 
+def registar_metricas_importacao(tabela, sucesso, erros, inicio):
+    """Regista as linhas importadas/rejeitadas e a duração da importação (linhas/s via rate())."""
+    metricas.IMPORTACAO_LINHAS.inc(sucesso, tabela=tabela, resultado='sucesso')
+    metricas.IMPORTACAO_LINHAS.inc(erros, tabela=tabela, resultado='erro')
+    metricas.IMPORTACAO_SEGUNDOS.observar(time.perf_counter() - inicio, tabela=tabela)
+
+def planilha_modelo(df_modelo, nome_folha):
+    """
+    Devolve a função que gera o .xlsx do modelo. O download_button só a chama no
+    clique, por isso o openpyxl não é carregado em cada execução da página.
+    """
+    def gerar():
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df_modelo.to_excel(writer, index=False, sheet_name=nome_folha)
+        return output.getvalue()
+    return gerar
+
+def planilha_inventario_contabil():
+    """Função que gera o .xlsx do inventário com o valor contábil atual e uma folha de resumo."""
+    def gerar():
+        inventario = carregar_inventario_completo(order_by="a.id").join(
+            depreciacao.valores_contabeis()[['valor_contabil', 'depreciacao_acumulada']], on='id'
+        )
+        resumo = depreciacao.resumo_frota()
+        df_resumo = pd.DataFrame({
+            "Indicador": ["Valor de Aquisição", "Valor Contábil", "Depreciação Acumulada", "Aparelhos Totalmente Depreciados"],
+            "Valor": [resumo['valor_aquisicao'], resumo['valor_contabil'], resumo['depreciacao_acumulada'], resumo['totalmente_depreciados']],
+        })
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            inventario.to_excel(writer, index=False, sheet_name='Inventario')
+            df_resumo.to_excel(writer, index=False, sheet_name='Resumo')
+        return output.getvalue()
+    return gerar
+
 # --- UI ---
 st.title("Importar Dados em Lote")
 st.markdown("---")
@@ -127,9 +90,16 @@ st.info("Selecione a operação, baixe o modelo, preencha com seus dados e faça
 
 tabela_selecionada = st.selectbox(
     "1. Selecione a operação:",
-    ["Importar Colaboradores", "Importar Aparelhos", "Importar Marcas", "Importar Contas Gmail", "Importar Movimentações"]
+    ["Importar Colaboradores", "Importar Aparelhos", "Importar Marcas", "Importar Contas Gmail", "Importar Movimentações", "Exportar Inventário (Valor Contábil)"]
 )
 
+# --- EXPORTAÇÃO DO INVENTÁRIO COM VALOR CONTÁBIL ---
+if tabela_selecionada == "Exportar Inventário (Valor Contábil)":
+    st.markdown("---")
+    st.subheader("Exportar Inventário com Valor Contábil")
+    st.caption("Valor contábil à data de hoje, segundo as regras de depreciação (Cadastros Gerais > Depreciação).")
+    st.download_button(label="Baixar Inventário (.xlsx)", data=planilha_inventario_contabil(), file_name=f"inventario_valor_contabil_{date.today().isoformat()}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
 # --- LÓGICA PARA COLABORADORES ---
 if tabela_selecionada == "Importar Colaboradores":
     st.markdown("---")
@@ -138,11 +108,7 @@ if tabela_selecionada == "Importar Colaboradores":
     setores_map = get_foreign_key_map("setores", "nome_setor")
     exemplo_setor = list(setores_map.keys())[0] if setores_map else "TI"
     df_modelo = pd.DataFrame({"codigo": ["1001"], "nome_completo": ["Nome Sobrenome Exemplo"], "cpf": ["12345678900"], "gmail": ["exemplo.email@gmail.com"], "nome_setor": [exemplo_setor]})
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_modelo.to_excel(writer, index=False, sheet_name='Colaboradores')
-    
-    st.download_button(label="Baixar Planilha Modelo", data=output.getvalue(), file_name="modelo_colaboradores.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button(label="Baixar Planilha Modelo", data=planilha_modelo(df_modelo, 'Colaboradores'), file_name="modelo_colaboradores.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     uploaded_file = st.file_uploader("Escolha a planilha de Colaboradores (.xlsx)", type="xlsx", key="upload_colab")
     if uploaded_file:
@@ -152,6 +118,7 @@ if tabela_selecionada == "Importar Colaboradores":
             if st.button("Importar Dados dos Colaboradores"):
                 conn = get_db_connection()
                 cursor = conn.cursor()
+                inicio = time.perf_counter()
                 sucesso, erros = 0, 0
                 with st.spinner("Importando dados..."):
                     for index, row in df_upload.iterrows():
@@ -170,6 +137,7 @@ if tabela_selecionada == "Importar Colaboradores":
                             erros += 1
                 conn.commit()
                 conn.close()
+                registar_metricas_importacao('colaboradores', sucesso, erros, inicio)
                 st.success(f"Importação concluída! {sucesso} registos importados com sucesso.")
                 if erros > 0: st.error(f"{erros} registos continham erros.")
         except Exception as e: st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
@@ -179,17 +147,12 @@ elif tabela_selecionada == "Importar Aparelhos":
     st.markdown("---")
     st.subheader("Importar Novos Aparelhos")
 
-    conn = get_db_connection()
-    modelos_df = pd.read_sql_query("SELECT mo.id, ma.nome_marca || ' - ' || mo.nome_modelo as nome_completo FROM modelos mo JOIN marcas ma ON mo.marca_id = ma.id", conn)
-    status_df = pd.read_sql_query("SELECT nome_status FROM status", conn)
-    conn.close()
-    exemplo_modelo = modelos_df['nome_completo'].iloc[0] if not modelos_df.empty else "Samsung - Galaxy S24"
-    exemplo_status = status_df['nome_status'].iloc[0] if not status_df.empty else "Em estoque"
+    modelos_map = get_foreign_key_map("modelos", "ma.nome_marca || ' - ' || mo.nome_modelo", key_column="mo.id")
+    status_map = get_foreign_key_map("status", "nome_status")
+    exemplo_modelo = next(iter(modelos_map), "Samsung - Galaxy S24")
+    exemplo_status = "Em estoque" if "Em estoque" in status_map or not status_map else next(iter(status_map))
     df_modelo = pd.DataFrame({"numero_serie": ["ABC123456789"], "imei1": ["111111111111111"], "imei2": ["222222222222222"], "valor": [4999.90], "modelo_completo": [exemplo_modelo], "status_inicial": [exemplo_status]})
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_modelo.to_excel(writer, index=False, sheet_name='Aparelhos')
-    st.download_button(label="Baixar Planilha Modelo", data=output.getvalue(), file_name="modelo_aparelhos.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button(label="Baixar Planilha Modelo", data=planilha_modelo(df_modelo, 'Aparelhos'), file_name="modelo_aparelhos.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     uploaded_file = st.file_uploader("Escolha a planilha de Aparelhos (.xlsx)", type="xlsx", key="upload_aparelho")
     if uploaded_file:
@@ -201,6 +164,7 @@ elif tabela_selecionada == "Importar Aparelhos":
                 cursor = conn.cursor()
                 modelos_map = get_foreign_key_map("modelos", "ma.nome_marca || ' - ' || mo.nome_modelo", key_column="mo.id")
                 status_map = get_foreign_key_map("status", "nome_status")
+                inicio = time.perf_counter()
                 sucesso, erros = 0, 0
                 with st.spinner("Importando dados..."):
                     for index, row in df_upload.iterrows():
@@ -221,6 +185,7 @@ elif tabela_selecionada == "Importar Aparelhos":
                         except Exception as e:
                             conn.rollback(); st.error(f"Linha {index+2}: Erro inesperado - {e}. Pulando registo."); erros += 1
                 conn.close()
+                registar_metricas_importacao('aparelhos', sucesso, erros, inicio)
                 st.success(f"Importação concluída! {sucesso} registos importados com sucesso.")
                 if erros > 0: st.error(f"{erros} registos continham erros.")
         except Exception as e: st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
@@ -230,10 +195,7 @@ elif tabela_selecionada == "Importar Marcas":
     st.markdown("---")
     st.subheader("Importar Novas Marcas")
     df_modelo = pd.DataFrame({"nome_marca": ["Nome da Marca Exemplo"]})
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_modelo.to_excel(writer, index=False, sheet_name='Marcas')
-    st.download_button(label="Baixar Planilha Modelo", data=output.getvalue(), file_name="modelo_marcas.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button(label="Baixar Planilha Modelo", data=planilha_modelo(df_modelo, 'Marcas'), file_name="modelo_marcas.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     uploaded_file = st.file_uploader("Escolha a planilha de Marcas (.xlsx)", type="xlsx", key="upload_marca")
     if uploaded_file:
@@ -243,6 +205,7 @@ elif tabela_selecionada == "Importar Marcas":
             if st.button("Importar Dados de Marcas"):
                 conn = get_db_connection()
                 cursor = conn.cursor()
+                inicio = time.perf_counter()
                 sucesso, erros = 0, 0
                 with st.spinner("Importando dados..."):
                     for index, row in df_upload.iterrows():
@@ -257,6 +220,7 @@ elif tabela_selecionada == "Importar Marcas":
                             erros += 1
                 conn.commit()
                 conn.close()
+                registar_metricas_importacao('marcas', sucesso, erros, inicio)
                 st.success(f"Importação concluída! {sucesso} registos importados com sucesso.")
                 if erros > 0: st.error(f"{erros} registos continham erros.")
         except Exception as e: st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
@@ -270,10 +234,7 @@ elif tabela_selecionada == "Importar Contas Gmail":
     exemplo_setor = list(setores_map.keys())[0] if setores_map else "TI"
     exemplo_colaborador = list(colaboradores_map.keys())[0] if colaboradores_map else ""
     df_modelo = pd.DataFrame({"email": ["conta.exemplo@gmail.com"], "senha": ["senhaforte123"], "telefone_recuperacao": ["11999998888"], "email_recuperacao": ["recuperacao@email.com"], "nome_setor": [exemplo_setor], "nome_colaborador": [exemplo_colaborador]})
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_modelo.to_excel(writer, index=False, sheet_name='Contas_Gmail')
-    st.download_button(label="Baixar Planilha Modelo", data=output.getvalue(), file_name="modelo_contas_gmail.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button(label="Baixar Planilha Modelo", data=planilha_modelo(df_modelo, 'Contas_Gmail'), file_name="modelo_contas_gmail.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     uploaded_file = st.file_uploader("Escolha a planilha de Contas Gmail (.xlsx)", type="xlsx", key="upload_gmail")
     if uploaded_file:
@@ -283,6 +244,7 @@ elif tabela_selecionada == "Importar Contas Gmail":
             if st.button("Importar Dados de Contas Gmail"):
                 conn = get_db_connection()
                 cursor = conn.cursor()
+                inicio = time.perf_counter()
                 sucesso, erros = 0, 0
                 with st.spinner("Importando dados..."):
                     for index, row in df_upload.iterrows():
@@ -302,6 +264,7 @@ elif tabela_selecionada == "Importar Contas Gmail":
                             erros += 1
                 conn.commit()
                 conn.close()
+                registar_metricas_importacao('contas_gmail', sucesso, erros, inicio)
                 st.success(f"Importação concluída! {sucesso} registos importados com sucesso.")
                 if erros > 0: st.error(f"{erros} registos continham erros.")
         except Exception as e: st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
@@ -313,16 +276,13 @@ elif tabela_selecionada == "Importar Movimentações":
     st.warning("Esta funcionalidade é ideal para registar a entrega de aparelhos a colaboradores em massa.")
 
     conn = get_db_connection()
-    aparelhos_df = pd.read_sql_query("SELECT numero_serie FROM aparelhos WHERE status_id = (SELECT id FROM status WHERE nome_status = 'Em estoque') LIMIT 1", conn)
+    aparelhos_df = pd.read_sql_query("SELECT numero_serie FROM aparelhos WHERE status_id = ? LIMIT 1", conn, params=(get_foreign_key_map("status", "nome_status").get("Em estoque"),))
     colaboradores_df = pd.read_sql_query("SELECT nome_completo FROM colaboradores LIMIT 1", conn)
     conn.close()
     exemplo_ns = aparelhos_df['numero_serie'].iloc[0] if not aparelhos_df.empty else "NUMERO_DE_SERIE_DO_APARELHO"
     exemplo_colab = colaboradores_df['nome_completo'].iloc[0] if not colaboradores_df.empty else "Nome Completo do Colaborador"
     df_modelo = pd.DataFrame({"numero_serie_aparelho": [exemplo_ns], "nome_colaborador": [exemplo_colab], "localizacao": ["Mesa do Colaborador"], "observacoes": ["Entrega para novo colaborador."]})
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_modelo.to_excel(writer, index=False, sheet_name='Movimentacoes')
-    st.download_button(label="Baixar Planilha Modelo de Movimentações", data=output.getvalue(), file_name="modelo_movimentacoes.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button(label="Baixar Planilha Modelo de Movimentações", data=planilha_modelo(df_modelo, 'Movimentacoes'), file_name="modelo_movimentacoes.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     uploaded_file = st.file_uploader("Escolha a planilha de Movimentações (.xlsx)", type="xlsx", key="upload_mov")
     if uploaded_file:
@@ -335,6 +295,7 @@ elif tabela_selecionada == "Importar Movimentações":
                 aparelhos_map = get_foreign_key_map("aparelhos", "numero_serie")
                 colaboradores_map = get_foreign_key_map("colaboradores", "nome_completo")
                 status_em_uso_id = get_foreign_key_map("status", "nome_status").get("Em uso")
+                inicio = time.perf_counter()
                 sucesso, erros = 0, 0
                 with st.spinner("Processando movimentações..."):
                     for index, row in df_upload.iterrows():
@@ -354,7 +315,10 @@ elif tabela_selecionada == "Importar Movimentações":
                             st.error(f"Linha {index+2}: Erro inesperado - {e}. Pulando registo.")
                             erros += 1
                 conn.close()
+                registar_metricas_importacao('historico_movimentacoes', sucesso, erros, inicio)
                 st.success(f"Importação concluída! {sucesso} movimentações registadas com sucesso.")
                 if erros > 0: st.error(f"{erros} registos continham erros.")
         except Exception as e:
             st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
+
+perfil.finalizar_pagina()
@@ -1,101 +1,26 @@
 import streamlit as st
-import sqlite3
+import perfil
+import layout
 from datetime import datetime
 import io
+import time
+from setup_database import avancar_versoes, configurar_banco
+from database import DB_PATH, get_db_connection
+from catalogo import limpar_cache
+import metricas
 
 # --- Autenticação e Permissão ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
+perfil.iniciar_pagina("11_Backup_Restauracao")
+
 if st.session_state.get('user_role') != 'Administrador':
     st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
-    st.stop()
-
-# --- NOVO: Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    perfil.parar()
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções de Backup e Restauração ---
 
@@ -105,7 +30,7 @@ def gerar_backup_sql():
     Retorna o script como uma string.
     """
     try:
-        conn = sqlite3.connect('inventario.db')
+        conn = get_db_connection()
         script_sql = ""
         for line in conn.iterdump():
             script_sql += f'{line}\n'
@@ -122,11 +47,14 @@ def restaurar_backup_sql(sql_script):
     conn = None # Inicializa a variável de conexão
     try:
         # Conecta com um timeout maior para esperar por bloqueios
-        conn = sqlite3.connect('inventario.db', timeout=15.0)
+        conn = get_db_connection(timeout=15.0)
         cursor = conn.cursor()
         
         # Pede um bloqueio exclusivo no banco de dados para evitar conflitos
         cursor.execute('BEGIN EXCLUSIVE')
+
+        # Versões vistas até agora pelas caches de todos os processos (ver avancar_versoes)
+        versoes_anteriores = dict(cursor.execute("SELECT tabela, versao FROM versoes_tabelas").fetchall())
         
         # --- CORREÇÃO: Apagar tabelas existentes antes de restaurar ---
         # 1. Obter a lista de todas as tabelas
@@ -148,6 +76,12 @@ def restaurar_backup_sql(sql_script):
         cursor.executescript(sql_script)
         
         conn.commit()
+
+        # Um backup antigo pode não trazer as tabelas/gatilhos mais recentes; e os
+        # dados mudaram, por isso as caches (deste e dos outros processos) são invalidadas.
+        configurar_banco(DB_PATH, forcar=True)
+        avancar_versoes(conn, versoes_anteriores)
+        limpar_cache()
         return True
     except Exception as e:
         if conn:
@@ -168,7 +102,9 @@ st.warning("Esta ação irá criar uma cópia de segurança de todos os dados do
 
 if st.button("Gerar e Preparar Backup para Download"):
     with st.spinner("Gerando script de backup..."):
+        inicio = time.perf_counter()
         backup_script = gerar_backup_sql()
+        metricas.BACKUP_SEGUNDOS.observar(time.perf_counter() - inicio, operacao='gerar', resultado='sucesso' if backup_script else 'erro')
         if backup_script:
             st.session_state['backup_data'] = backup_script
             st.success("Backup gerado com sucesso! Clique no botão abaixo para baixar.")
@@ -200,7 +136,7 @@ if uploaded_file is not None:
     # Este botão agora apenas define o estado de confirmação e força um rerun.
     if st.button("Iniciar Restauração"):
         st.session_state.confirm_restore = True
-        st.rerun()
+        perfil.reiniciar()
         
     # Este bloco será executado numa nova execução do script, mostrando a confirmação.
     if st.session_state.get('confirm_restore'):
@@ -208,17 +144,19 @@ if uploaded_file is not None:
         col1, col2 = st.columns(2)
         if col1.button("Sim, quero restaurar", type="primary"):
             with st.spinner("Restaurando banco de dados... A aplicação será reiniciada."):
-                if restaurar_backup_sql(sql_script):
+                inicio = time.perf_counter()
+                restaurado = restaurar_backup_sql(sql_script)
+                metricas.BACKUP_SEGUNDOS.observar(time.perf_counter() - inicio, operacao='restaurar', resultado='sucesso' if restaurado else 'erro')
+                if restaurado:
                     st.success("Restauração concluída com sucesso! A aplicação será reiniciada.")
                     st.session_state.confirm_restore = False
-                    st.rerun()
+                    perfil.reiniciar()
                 else:
                     st.error("A restauração falhou. Verifique os logs para mais detalhes.")
                     st.session_state.confirm_restore = False
         
         if col2.button("Não, cancelar"):
             st.session_state.confirm_restore = False
-            st.rerun()
-
-
+            perfil.reiniciar()
 
+perfil.finalizar_pagina()
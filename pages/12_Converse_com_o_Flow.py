@@ -1,159 +1,39 @@
 import streamlit as st
+import perfil
+import layout
 import sqlite3
 import json
 import pandas as pd
 from auth import show_login_form, logout
 import asyncio
-import httpx
+import time
 from datetime import date, datetime
+from database import get_db_connection
+from catalogo import id_por_nome, status_id
+from consultas import pesquisar_aparelhos_por_filtros, pesquisar_movimentacoes_por_filtros
+from importacao_tardia import importar_tardiamente
+import metricas
+
+httpx = importar_tardiamente("httpx") # Só é carregado na primeira pergunta ao Flow
 
 # --- Autenticação e Configuração da Página ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-st.set_page_config(page_title="Converse com o Flow", layout="wide")
-
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo Principal */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a { margin-right: 15px; text-decoration: none; }
-    .sidebar-footer img {
-        width: 25px; height: 25px; filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover { filter: grayscale(0) opacity(1); }
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img { filter: grayscale(1) opacity(0.6) invert(1); }
-        .sidebar-footer img:hover { filter: opacity(1) invert(1); }
-    }
-
-    /* --- NOVO: Estilos para a Logo do Chat --- */
-    .flow-title {
-        display: flex;
-        align-items: center;
-        padding-bottom: 10px;
-    }
-    .flow-title .icon {
-        font-size: 2.5em;
-        margin-right: 15px;
-    }
-    .flow-title h1 {
-        font-family: 'Courier New', monospace;
-        font-size: 3em;
-        font-weight: bold;
-        margin: 0;
-        padding: 0;
-        line-height: 1;
-    }
-    .flow-title .text-chat { color: #003366; }
-    .flow-title .text-flow { color: #E30613; }
-    @media (prefers-color-scheme: dark) {
-        .flow-title .text-chat { color: #FFFFFF; }
-        .flow-title .text-flow { color: #FF4B4B; }
-    }
-</style>
-""", unsafe_allow_html=True)
+perfil.iniciar_pagina("12_Converse_com_o_Flow")
 
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+st.set_page_config(page_title="Converse com o Flow", layout="wide")
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar('chat')
 
 # --- Funções do Executor de Ações ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def executar_pesquisa_aparelho(filtros):
     """Executa uma pesquisa na base de dados com base nos filtros fornecidos pela IA."""
     if not filtros:
         return "Por favor, forneça um critério de pesquisa, como o nome do colaborador ou o número de série."
 
-    conn = get_db_connection()
-    query = """
-        SELECT a.numero_serie, mo.nome_modelo, c.nome_completo as responsavel, s.nome_status
-        FROM aparelhos a
-        LEFT JOIN modelos mo ON a.modelo_id = mo.id
-        LEFT JOIN status s ON a.status_id = s.id
-        LEFT JOIN (
-            SELECT aparelho_id, colaborador_id
-            FROM historico_movimentacoes
-            WHERE (aparelho_id, data_movimentacao) IN (
-                SELECT aparelho_id, MAX(data_movimentacao)
-                FROM historico_movimentacoes
-                GROUP BY aparelho_id
-            )
-        ) h ON a.id = h.aparelho_id
-        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
-    """
-    params = []
-    where_clauses = []
-
-    if filtros.get("nome_colaborador"):
-        where_clauses.append("c.nome_completo LIKE ?")
-        params.append(f"%{filtros['nome_colaborador']}%")
-    
-    if filtros.get("numero_serie"):
-        where_clauses.append("a.numero_serie LIKE ?")
-        params.append(f"%{filtros['numero_serie']}%")
-
-    if where_clauses:
-        query += " WHERE " + " AND ".join(where_clauses)
-
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
+    return pesquisar_aparelhos_por_filtros(filtros)
 
 def executar_criar_colaborador(dados):
     """Adiciona um novo colaborador ao banco de dados."""
@@ -189,23 +69,22 @@ def executar_criar_aparelho(dados):
     conn = get_db_connection()
     try:
         modelo_completo = f"{dados['marca']} - {dados['modelo']}"
-        modelo_id_row = conn.execute("SELECT mo.id FROM modelos mo JOIN marcas ma ON mo.marca_id = ma.id WHERE (ma.nome_marca || ' - ' || mo.nome_modelo) = ?", (modelo_completo,)).fetchone()
-        if not modelo_id_row:
+        modelo_id = id_por_nome('modelos', modelo_completo, conn)
+        if not modelo_id:
             return f"Erro: O modelo '{modelo_completo}' não foi encontrado nos cadastros."
         
-        modelo_id = modelo_id_row[0]
-        status_id = conn.execute("SELECT id FROM status WHERE nome_status = 'Em estoque'").fetchone()[0]
+        status_estoque_id = status_id('Em estoque', conn)
 
         cursor = conn.cursor()
         cursor.execute("BEGIN TRANSACTION;")
         cursor.execute(
             "INSERT INTO aparelhos (numero_serie, imei1, imei2, valor, modelo_id, status_id, data_cadastro) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (dados['numero_serie'], dados.get('imei1'), dados.get('imei2'), float(dados['valor']), modelo_id, status_id, date.today())
+            (dados['numero_serie'], dados.get('imei1'), dados.get('imei2'), float(dados['valor']), modelo_id, status_estoque_id, date.today())
         )
         aparelho_id = cursor.lastrowid
         cursor.execute(
             "INSERT INTO historico_movimentacoes (data_movimentacao, aparelho_id, status_id, localizacao_atual, observacoes) VALUES (?, ?, ?, ?, ?)",
-            (datetime.now(), aparelho_id, status_id, "Estoque Interno", "Entrada via assistente Flow.")
+            (datetime.now(), aparelho_id, status_estoque_id, "Estoque Interno", "Entrada via assistente Flow.")
         )
         conn.commit()
         return f"Aparelho '{modelo_completo}' (N/S: {dados['numero_serie']}) criado com sucesso!"
@@ -223,36 +102,7 @@ def executar_pesquisa_movimentacoes(filtros):
     if not filtros:
         return "Por favor, forneça um critério de pesquisa (colaborador, N/S ou data)."
 
-    conn = get_db_connection()
-    query = """
-        SELECT h.data_movimentacao, a.numero_serie, mo.nome_modelo, c.nome_completo as colaborador, s.nome_status, h.observacoes
-        FROM historico_movimentacoes h
-        JOIN aparelhos a ON h.aparelho_id = a.id
-        JOIN status s ON h.status_id = s.id
-        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
-        LEFT JOIN modelos mo ON a.modelo_id = mo.id
-    """
-    params = []
-    where_clauses = []
-
-    if filtros.get("nome_colaborador"):
-        where_clauses.append("c.nome_completo LIKE ?")
-        params.append(f"%{filtros['nome_colaborador']}%")
-    if filtros.get("numero_serie"):
-        where_clauses.append("a.numero_serie LIKE ?")
-        params.append(f"%{filtros['numero_serie']}%")
-    if filtros.get("data"):
-        where_clauses.append("date(h.data_movimentacao) = ?")
-        params.append(filtros['data'])
-
-    if where_clauses:
-        query += " WHERE " + " AND ".join(where_clauses)
-    
-    query += " ORDER BY h.data_movimentacao DESC"
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
+    return pesquisar_movimentacoes_por_filtros(filtros)
 
 def executar_criar_conta_gmail(dados):
     """Adiciona uma nova conta Gmail ao banco de dados."""
@@ -322,14 +172,17 @@ async def get_flow_response(prompt, user_name, current_action=None):
     
     try:
         apiKey = st.secrets["GEMINI_API_KEY"]
-    except KeyError:
+    except (KeyError, FileNotFoundError): # FileNotFoundError: não existe secrets.toml
+        metricas.GEMINI_ERROS.inc(tipo='ChaveAusente')
         return {"acao": "desconhecido", "dados": {"erro": "Chave de API não configurada."}}
 
     apiUrl = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent?key={apiKey}"
     
+    inicio = time.perf_counter()
     try:
         async with httpx.AsyncClient() as client:
             response = await client.post(apiUrl, headers={'Content-Type': 'application/json'}, json=payload, timeout=30)
+        metricas.GEMINI_SEGUNDOS.observar(time.perf_counter() - inicio, resultado=str(response.status_code))
         response.raise_for_status()
         result = response.json()
         
@@ -339,6 +192,7 @@ async def get_flow_response(prompt, user_name, current_action=None):
         else:
             return {"acao": "desconhecido", "dados": {"erro": f"Não consegui entender o pedido. Resposta da API: {result}"}}
     except Exception as e:
+        metricas.GEMINI_ERROS.inc(tipo=type(e).__name__)
         return {"acao": "desconhecido", "dados": {"erro": f"Ocorreu um erro de comunicação: {e}"}}
 
 def get_info_text():
@@ -456,7 +310,7 @@ if prompt := st.chat_input("Como posso ajudar?"):
             st.session_state.dados_recolhidos[campo] = prompt
             st.session_state.campo_para_corrigir = None
             apresentar_resumo()
-            st.rerun()
+            perfil.reiniciar()
 
         # Se estivermos num fluxo de cadastro
         elif st.session_state.conversa_em_andamento:
@@ -468,7 +322,7 @@ if prompt := st.chat_input("Como posso ajudar?"):
                 adicionar_mensagem("assistant", f"Entendido. Agora, qual é o **{proximo.replace('_', ' ')}**?")
             else: # Todos os campos foram recolhidos
                 apresentar_resumo()
-                st.rerun()
+                perfil.reiniciar()
         
         # Se não houver conversa em andamento, interpreta o comando inicial
         else:
@@ -504,7 +358,7 @@ if prompt := st.chat_input("Como posso ajudar?"):
             elif acao == 'limpar_chat':
                 st.session_state.messages = [{"role": "assistant", "content": "Chat limpo! Como posso ajudar a recomeçar?"}]
                 st.session_state.pending_action = None
-                st.rerun()
+                perfil.reiniciar()
 
             elif acao == 'logout':
                 adicionar_mensagem("assistant", "A encerrar a sessão...")
@@ -543,13 +397,13 @@ if st.session_state.pending_action:
                 adicionar_mensagem("assistant", f"✅ **Sucesso:** {resultado}")
 
             st.session_state.pending_action = None
-            st.rerun()
+            perfil.reiniciar()
 
     with col2:
         if st.button("Não, cancelar"):
             adicionar_mensagem("assistant", "Ação cancelada pelo utilizador.")
             st.session_state.pending_action = None
-            st.rerun()
+            perfil.reiniciar()
 
     with col3:
         if st.button("Corrigir uma informação"):
@@ -558,7 +412,7 @@ if st.session_state.pending_action:
             st.session_state.dados_para_corrigir = action_data["dados"]
             st.session_state.modo_correcao = True
             st.session_state.pending_action = None
-            st.rerun()
+            perfil.reiniciar()
 
 # --- Lógica de Correção (fora do loop principal) ---
 if st.session_state.get('modo_correcao'):
@@ -575,4 +429,6 @@ if st.session_state.get('modo_correcao'):
         adicionar_mensagem("assistant", f"Entendido. Por favor, insira o novo valor para **{campo_selecionado.replace('_', ' ')}**.")
         st.session_state.modo_correcao = False
         st.session_state.dados_recolhidos = dados_para_corrigir # Prepara para a correção
-        st.rerun()
+        perfil.reiniciar()
+
+perfil.finalizar_pagina()
@@ -0,0 +1,98 @@
+import streamlit as st
+import perfil
+import layout
+import json
+import os
+import pandas as pd
+from collections import deque
+from instrumentacao import LIMIAR_CONSULTA_LENTA_MS, LOG_CONSULTAS_LENTAS
+from importacao_tardia import importar_tardiamente
+
+px = importar_tardiamente("plotly.express")
+
+# --- Autenticação e Permissão ---
+if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
+    st.switch_page("app.py")
+
+if st.session_state.get('user_role') != 'Administrador':
+    st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
+    st.stop()
+
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
+
+# --- Funções de Apoio ---
+def carregar_consultas_lentas(max_linhas=5000):
+    """Lê as últimas entradas do log de consultas lentas."""
+    linhas = deque(maxlen=max_linhas)
+    # O log é rodado por tamanho (ver instrumentacao.TAMANHO_MAXIMO_LOG): lê a cópia anterior e depois a atual
+    for caminho in (f"{LOG_CONSULTAS_LENTAS}.1", LOG_CONSULTAS_LENTAS):
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as log:
+                linhas.extend(log)
+    return pd.DataFrame([json.loads(linha) for linha in linhas if linha.strip()])
+
+# --- UI ---
+st.title("Desempenho da Aplicação")
+st.markdown("---")
+
+tab1, tab2 = st.tabs(["Tempo por Página", "Consultas Lentas"])
+
+with tab1:
+    st.info(
+        f"O perfil mede cada execução das páginas (o Streamlit executa a página inteira a cada interação) "
+        f"e mantém as últimas {perfil.JANELA} amostras de cada página e secção. "
+        "As secções podem sobrepor-se: o tempo de SQL também está incluído nas secções que fazem consultas."
+    )
+    col1, col2 = st.columns([3, 1])
+    ativo = col1.toggle("Perfil de execução ativo (todas as sessões)", value=perfil.ATIVO)
+    if ativo != perfil.ATIVO:
+        perfil.ativar(ativo)
+        st.rerun()
+    if col2.button("Limpar Amostras"):
+        perfil.limpar()
+        st.rerun()
+
+    resumo_df = pd.DataFrame(perfil.resumo())
+    if resumo_df.empty:
+        st.warning("Ainda não há amostras. Ative o perfil e navegue pelas páginas.")
+    else:
+        totais_df = resumo_df[resumo_df['Secção'] == perfil.SECAO_TOTAL].sort_values('p95 (ms)', ascending=False)
+        st.markdown("###### Tempo total por execução (p95)")
+        fig = px.bar(totais_df, x='Página', y='p95 (ms)', text_auto=True, hover_data=['p50 (ms)', 'Máx (ms)', 'Execuções'])
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("###### Detalhe por secção")
+        pagina_filtro = st.selectbox("Página", options=["Todas"] + sorted(resumo_df['Página'].unique()))
+        if pagina_filtro != "Todas":
+            resumo_df = resumo_df[resumo_df['Página'] == pagina_filtro]
+        st.dataframe(resumo_df, hide_index=True, use_container_width=True)
+
+with tab2:
+    st.info(f"Instruções SQL com duração igual ou superior a {LIMIAR_CONSULTA_LENTA_MS:.0f} ms são registadas em '{LOG_CONSULTAS_LENTAS}' com o plano de execução.")
+    lentas_df = carregar_consultas_lentas()
+    if lentas_df.empty:
+        st.success("Nenhuma consulta lenta registada.")
+    else:
+        agrupado = lentas_df.groupby('sql').agg(
+            ocorrencias=('duracao_ms', 'size'),
+            media_ms=('duracao_ms', 'mean'),
+            max_ms=('duracao_ms', 'max'),
+            linhas=('linhas', 'max'),
+            origem=('funcao', 'last'),
+        ).reset_index().sort_values('max_ms', ascending=False)
+        st.markdown("###### Consultas agrupadas (mais lentas primeiro)")
+        st.dataframe(agrupado, hide_index=True, use_container_width=True, column_config={
+            "sql": "SQL Normalizado",
+            "ocorrencias": "Ocorrências",
+            "media_ms": st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("Máx (ms)", format="%.1f"),
+            "linhas": "Linhas (máx)",
+            "origem": "Origem",
+        })
+
+        sql_selecionado = st.selectbox("Ver plano de execução de:", options=agrupado['sql'])
+        ultimo = lentas_df[lentas_df['sql'] == sql_selecionado].iloc[-1]
+        st.code(sql_selecionado, language="sql")
+        st.code("\n".join(ultimo.get('plano') or []), language="text")
+        st.caption(f"Última ocorrência: {ultimo['data']} em {ultimo['pagina']} ({ultimo['funcao']}) - parâmetros: {ultimo['parametros'] or 'nenhum'}")
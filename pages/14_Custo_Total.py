@@ -0,0 +1,101 @@
+import streamlit as st
+import perfil
+import layout
+import io
+import pandas as pd
+from datetime import date
+from tco import obter_detalhe, obter_posse, obter_totais
+from importacao_tardia import importar_tardiamente
+
+px = importar_tardiamente("plotly.express")
+
+# --- Autenticação e Permissão ---
+if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
+    st.switch_page("app.py")
+
+perfil.iniciar_pagina("14_Custo_Total")
+
+if st.session_state.get('user_role') != 'Administrador':
+    st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
+    perfil.parar()
+
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
+
+# --- Funções de Apoio ---
+def formatar_reais(valor):
+    return f"R$ {valor:,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
+
+def planilha_tco(setores_df, colaboradores_df, data_inicio, data_fim):
+    """Função que gera o .xlsx do relatório; o download_button só a chama no clique (e só então lê os pares)."""
+    def gerar():
+        posse_df = obter_posse(data_inicio, data_fim)
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            setores_df.to_excel(writer, index=False, sheet_name='Por Setor')
+            colaboradores_df.drop(columns='colaborador_id').to_excel(writer, index=False, sheet_name='Por Colaborador')
+            posse_df.drop(columns=['colaborador_id', 'aparelho_id']).round(2).to_excel(writer, index=False, sheet_name='Detalhe')
+        return output.getvalue()
+    return gerar
+
+# --- UI ---
+st.title("Custo Total de Posse (TCO)")
+st.markdown("---")
+st.caption(
+    "Valor de aquisição repartido pelos dias em uso com cada colaborador, mais o custo dos reparos "
+    "enviados enquanto o aparelho estava com ele. O setor é o atual do colaborador."
+)
+
+col_periodo, col_filtro = st.columns([2, 1])
+with col_periodo:
+    periodo = st.date_input("Período (vazio = todo o histórico)", value=(), max_value=date.today(), format="DD/MM/YYYY")
+data_inicio, data_fim = (periodo[0], periodo[-1]) if periodo else (None, None)
+
+with perfil.secao("Carregar TCO"):
+    setores_df, colaboradores_df = obter_totais(data_inicio, data_fim)
+
+if colaboradores_df.empty:
+    st.info("Não há aparelhos em uso nem reparos atribuídos no período selecionado.")
+    perfil.parar()
+
+with col_filtro:
+    setor_filtro = st.selectbox("Setor", options=["Todos"] + sorted(setores_df['Setor']))
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Custo Total", formatar_reais(setores_df['Custo Total (R$)'].sum()))
+col2.metric("Valor Atribuído", formatar_reais(setores_df['Valor Atribuído (R$)'].sum()))
+col3.metric("Custo de Reparos", formatar_reais(setores_df['Custo de Reparos (R$)'].sum()))
+col4.metric("Colaboradores", f"{len(colaboradores_df):,}".replace(",", "."))
+
+st.download_button(
+    label="Baixar Relatório (.xlsx)", data=planilha_tco(setores_df, colaboradores_df, data_inicio, data_fim),
+    file_name=f"tco_{(data_inicio or 'inicio')}_{(data_fim or date.today())}.xlsx",
+    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+
+tab1, tab2 = st.tabs(["Por Setor", "Por Colaborador"])
+
+with tab1:
+    with perfil.secao("Gráficos (Plotly)"):
+        fig = px.bar(setores_df, x='Setor', y=['Valor Atribuído (R$)', 'Custo de Reparos (R$)'], labels={'value': 'R$', 'variable': 'Componente'})
+        st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(setores_df, hide_index=True, use_container_width=True)
+
+with tab2:
+    if setor_filtro != "Todos":
+        colaboradores_df = colaboradores_df[colaboradores_df['Setor'] == setor_filtro]
+    st.dataframe(colaboradores_df.drop(columns='colaborador_id'), hide_index=True, use_container_width=True)
+
+    st.markdown("###### Detalhe do Colaborador")
+    # Opções pelo id: colaboradores com o mesmo nome e setor continuam distintos
+    rotulos = dict(zip(
+        colaboradores_df['colaborador_id'].tolist(),
+        colaboradores_df['Colaborador'] + " (" + colaboradores_df['Setor'] + ") - " + colaboradores_df['Código'].fillna("sem código"),
+    ))
+    colaborador_id = st.selectbox("Selecione o colaborador", options=list(rotulos), format_func=rotulos.get, index=None, placeholder="Escolha um colaborador...")
+    if colaborador_id is not None:
+        with perfil.secao("Detalhe do colaborador"):
+            detalhe_df = obter_detalhe(colaborador_id, data_inicio, data_fim)
+        st.dataframe(detalhe_df, hide_index=True, use_container_width=True)
+
+perfil.finalizar_pagina()
@@ -0,0 +1,80 @@
+import streamlit as st
+import perfil
+import layout
+import io
+import pandas as pd
+from datetime import date
+from reconciliacao import conciliar_arquivo, relatorio, relatorio_excel
+
+# --- Autenticação e Permissão ---
+if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
+    st.switch_page("app.py")
+
+perfil.iniciar_pagina("15_Inventario_Fisico")
+
+if st.session_state.get('user_role') != 'Administrador':
+    st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
+    perfil.parar()
+
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
+
+# --- Funções de Apoio ---
+def planilha_modelo():
+    """Função que gera o .xlsx do modelo da contagem; o download_button só a chama no clique."""
+    def gerar():
+        df_modelo = pd.DataFrame({"codigo": ["350000000000001"], "localizacao": ["Estoque Interno"], "colaborador": [""]})
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df_modelo.to_excel(writer, index=False, sheet_name='Contagem')
+        return output.getvalue()
+    return gerar
+
+# --- UI ---
+st.title("Inventário Físico")
+st.markdown("---")
+
+st.info(
+    "Carregue a lista de números de série ou IMEIs lidos na contagem. As colunas 'localizacao' e "
+    "'colaborador' (nome ou código) são opcionais e, se preenchidas, são comparadas com o sistema."
+)
+st.caption("Para contagens grandes prefira .csv ou .txt (um código por linha): a leitura de .xlsx é bem mais lenta.")
+st.download_button(label="Baixar Planilha Modelo", data=planilha_modelo(), file_name="modelo_contagem.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+uploaded_file = st.file_uploader("Ficheiro da contagem", type=["xlsx", "csv", "txt"], key="upload_contagem")
+if uploaded_file and st.button("Conciliar Contagem", type="primary"):
+    try:
+        with st.spinner("A conciliar a contagem..."), perfil.secao("Conciliação"):
+            st.session_state['conciliacao'] = (uploaded_file.name, conciliar_arquivo(uploaded_file, uploaded_file.name))
+    except Exception as e:
+        st.error(f"Ocorreu um erro ao ler o ficheiro: {e}")
+
+if 'conciliacao' in st.session_state:
+    nome_arquivo, resultado = st.session_state['conciliacao']
+    st.markdown("---")
+    st.subheader(f"Resultado: {nome_arquivo}")
+    st.caption(f"{resultado['lidos']:,} códigos conciliados em {resultado['segundos']:.2f} s.".replace(",", "."))
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Encontrados", f"{resultado['encontrados']:,} / {resultado['esperados']:,}".replace(",", "."), help="Aparelhos lidos / aparelhos esperados na contagem")
+    col2.metric("Em Falta", f"{len(resultado['em_falta']):,}".replace(",", "."))
+    col3.metric("Não Cadastrados", f"{len(resultado['nao_cadastrados']):,}".replace(",", "."))
+    col4.metric("Divergências", f"{len(resultado['divergencias']):,}".replace(",", "."))
+    col5.metric("Lidos Mais de Uma Vez", f"{len(resultado['duplicados']):,}".replace(",", "."))
+
+    st.download_button(
+        label="Baixar Relatório (.xlsx)", data=lambda: relatorio_excel(resultado),
+        file_name=f"conciliacao_inventario_{date.today().isoformat()}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    folhas = relatorio(resultado)
+    folhas.pop('Resumo')
+    for tab, (nome, df) in zip(st.tabs(list(folhas)), folhas.items()):
+        with tab:
+            if df.empty:
+                st.success(f"Nenhum registo em '{nome}'.")
+            else:
+                st.dataframe(df, hide_index=True, use_container_width=True)
+
+perfil.finalizar_pagina()
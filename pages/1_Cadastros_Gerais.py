@@ -1,101 +1,25 @@
 import streamlit as st
+import perfil
+import layout
 import pandas as pd
 import sqlite3
+from database import get_db_connection
+from catalogo import obter_catalogo
+import depreciacao
 
 # --- Autenticação e Permissão ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
+perfil.iniciar_pagina("1_Cadastros_Gerais")
+
 # Apenas Administradores podem aceder a esta página
 if st.session_state.get('user_role') != 'Administrador':
     st.error("Acesso negado. Apenas administradores podem aceder a esta página.")
-    st.stop()
-
-# --- NOVO: Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    perfil.parar()
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Configurações da Página ---
 st.set_page_config(page_title="Cadastros Gerais", layout="wide")
@@ -104,17 +28,9 @@ st.markdown("---")
 
 # --- Funções de Banco de Dados ---
 
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 # --- Funções para Marcas ---
 def carregar_marcas():
-    conn = get_db_connection()
-    df = pd.read_sql_query("SELECT id, nome_marca FROM marcas ORDER BY nome_marca", conn)
-    conn.close()
-    return df
+    return pd.DataFrame(obter_catalogo('marcas').linhas, columns=['id', 'nome_marca'])
 
 def adicionar_marca(nome_marca):
     if not nome_marca:
@@ -138,15 +54,7 @@ def atualizar_marca(marca_id, nome_marca):
 
 # --- Funções para Modelos ---
 def carregar_modelos():
-    conn = get_db_connection()
-    df = pd.read_sql_query("""
-        SELECT m.id, m.nome_modelo, ma.nome_marca 
-        FROM modelos m
-        JOIN marcas ma ON m.marca_id = ma.id
-        ORDER BY ma.nome_marca, m.nome_modelo
-    """, conn)
-    conn.close()
-    return df
+    return pd.DataFrame(obter_catalogo('modelos').linhas, columns=['id', 'nome_modelo', 'nome_marca'])
 
 def adicionar_modelo(nome_modelo, marca_id):
     if not nome_modelo or not marca_id:
@@ -170,10 +78,7 @@ def atualizar_modelo(modelo_id, nome_modelo, marca_id):
 
 # --- Funções para Setores ---
 def carregar_setores():
-    conn = get_db_connection()
-    df = pd.read_sql_query("SELECT id, nome_setor FROM setores ORDER BY nome_setor", conn)
-    conn.close()
-    return df
+    return pd.DataFrame(obter_catalogo('setores').linhas, columns=['id', 'nome_setor'])
 
 def adicionar_setor(nome_setor):
     if not nome_setor:
@@ -198,7 +103,7 @@ def atualizar_setor(setor_id, nome_setor):
 
 # --- Interface do Usuário ---
 
-tab1, tab2 = st.tabs(["Marcas e Modelos", "Setores"])
+tab1, tab2, tab3 = st.tabs(["Marcas e Modelos", "Setores", "Depreciação"])
 
 with tab1:
     col1, col2 = st.columns(2)
@@ -218,7 +123,7 @@ with tab1:
                     if not row.equals(original_row):
                         if atualizar_marca(row['id'], row['nome_marca']):
                             st.toast(f"Marca '{row['nome_marca']}' atualizada!", icon="✅")
-                st.rerun()
+                perfil.reiniciar()
 
     with col2:
         st.subheader("Modelos")
@@ -252,7 +157,7 @@ with tab1:
                         nova_marca_id = marcas_dict[row['nome_marca']]
                         if atualizar_modelo(row['id'], row['nome_modelo'], nova_marca_id):
                             st.toast(f"Modelo '{row['nome_modelo']}' atualizado!", icon="✅")
-                st.rerun()
+                perfil.reiniciar()
 
 
 with tab2:
@@ -274,7 +179,54 @@ with tab2:
                     if not row.equals(original_row):
                         if atualizar_setor(row['id'], row['nome_setor']):
                             st.toast(f"Setor '{row['nome_setor']}' atualizado!", icon="✅")
-                st.rerun()
-
-
+                perfil.reiniciar()
 
+with tab3:
+    st.subheader("Regras de Depreciação")
+    st.caption("A regra do modelo prevalece sobre a da marca, e esta sobre a regra padrão. Aparelhos sem regra aplicável mantêm o valor de aquisição.")
+    col1_regra, col2_regra = st.columns(2)
+    with col1_regra:
+        marcas_df = carregar_marcas()
+        modelos_df = carregar_modelos()
+        alvos = {"Padrão": (None, None)}
+        alvos.update({f"Marca: {row['nome_marca']}": (row['id'], None) for _, row in marcas_df.iterrows()})
+        alvos.update({f"Modelo: {row['nome_marca']} - {row['nome_modelo']}": (None, row['id']) for _, row in modelos_df.iterrows()})
+
+        with st.form("form_regra_depreciacao"):
+            alvo_selecionado = st.selectbox("Aplicar a", options=alvos.keys())
+            metodo = st.selectbox("Método", options=depreciacao.METODOS.keys(), format_func=depreciacao.METODOS.get)
+            vida_util_meses = st.number_input("Vida útil (meses)", min_value=1, value=36, step=1)
+            taxa_anual = st.number_input("Taxa anual (%) - só Saldo Decrescente", min_value=0.0, max_value=100.0, value=40.0, step=5.0)
+            valor_residual = st.number_input("Valor residual (% do valor de aquisição)", min_value=0.0, max_value=100.0, value=10.0, step=5.0)
+            if st.form_submit_button("Salvar Regra"):
+                marca_id, modelo_id = alvos[alvo_selecionado]
+                depreciacao.definir_regra(metodo, int(vida_util_meses), valor_residual / 100, taxa_anual=taxa_anual / 100, marca_id=marca_id, modelo_id=modelo_id)
+                st.toast(f"Regra de '{alvo_selecionado}' guardada!", icon="✅")
+
+    with col2_regra:
+        regras_df = depreciacao.carregar_regras()
+        st.dataframe(
+            regras_df.drop(columns=['marca_id', 'modelo_id']).assign(metodo=regras_df['metodo'].map(depreciacao.METODOS)),
+            column_config={
+                "id": st.column_config.NumberColumn("ID"),
+                "alvo": "Aplicada a", "metodo": "Método", "vida_util_meses": "Vida Útil (meses)",
+                "taxa_anual": st.column_config.NumberColumn("Taxa Anual", format="%.2f"),
+                "valor_residual_pct": st.column_config.NumberColumn("Residual", format="%.2f"),
+            },
+            hide_index=True, use_container_width=True
+        )
+        if not regras_df.empty:
+            regras_dict = dict(zip(regras_df['alvo'], regras_df['id']))
+            regra_remover = st.selectbox("Remover regra", options=regras_dict.keys())
+            if st.button("Remover Regra"):
+                depreciacao.remover_regra(int(regras_dict[regra_remover]))
+                perfil.reiniciar()
+
+        resumo = depreciacao.resumo_frota()
+        st.markdown("###### Impacto na frota (hoje)")
+        mcol1, mcol2, mcol3 = st.columns(3)
+        mcol1.metric("Valor de Aquisição", f"R$ {resumo['valor_aquisicao']:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
+        mcol2.metric("Valor Contábil", f"R$ {resumo['valor_contabil']:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
+        mcol3.metric("Totalmente Depreciados", f"{resumo['totalmente_depreciados']:,}".replace(",", "."))
+
+perfil.finalizar_pagina()
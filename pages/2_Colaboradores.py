@@ -1,110 +1,25 @@
 import streamlit as st
+import perfil
+import layout
 import pandas as pd
 import sqlite3
 from datetime import date
 from auth import show_login_form
+from database import get_db_connection
+from catalogo import obter_catalogo
 
 # --- Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+perfil.iniciar_pagina("2_Colaboradores")
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções do DB ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def carregar_setores():
-    conn = get_db_connection()
-    setores = conn.execute("SELECT id, nome_setor FROM setores ORDER BY nome_setor").fetchall()
-    conn.close()
-    return setores
+    return obter_catalogo('setores').linhas
 
 def adicionar_colaborador(nome, cpf, gmail, setor_id, codigo):
     if not nome or not cpf or not codigo:
@@ -261,4 +176,6 @@ with col2:
                         
                         if atualizar_colaborador(col_id, novo_codigo, novo_nome, novo_cpf, novo_gmail, novo_setor_id):
                             st.toast(f"Colaborador '{novo_nome}' atualizado!", icon="✅")
-            st.rerun()
+            perfil.reiniciar()
+
+perfil.finalizar_pagina()
@@ -1,100 +1,28 @@
 import streamlit as st
-import pandas as pd
+import perfil
+import layout
 import sqlite3
-from datetime import date
+from datetime import date, datetime, timedelta
 from auth import show_login_form
+from database import get_db_connection
+from catalogo import obter_catalogo
+from consultas import ORDENACOES_INVENTARIO, carregar_inventario_completo, dias_ate_status, linha_do_tempo_aparelho, tempo_em_status
+from pesquisa import seletor_aparelho
+from importacao_tardia import importar_tardiamente
+
+px = importar_tardiamente("plotly.express")
 
 # --- Verificação de Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
+perfil.iniciar_pagina("3_Aparelhos")
+
 # --- Configurações da Página (Movido para o topo) ---
 st.set_page_config(page_title="Gestão de Aparelhos", layout="wide")
 
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Conteúdo Principal da Página ---
 st.title("Gestão de Aparelhos")
@@ -102,22 +30,8 @@ st.markdown("---")
 
 # --- Funções de Banco de Dados ---
 
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def carregar_dados_para_selects():
-    conn = get_db_connection()
-    modelos = conn.execute("""
-        SELECT m.id, m.nome_modelo, ma.nome_marca 
-        FROM modelos m 
-        JOIN marcas ma ON m.marca_id = ma.id 
-        ORDER BY ma.nome_marca, m.nome_modelo
-    """).fetchall()
-    status = conn.execute("SELECT id, nome_status FROM status ORDER BY nome_status").fetchall()
-    conn.close()
-    return modelos, status
+    return obter_catalogo('modelos').linhas, obter_catalogo('status').linhas
 
 def adicionar_aparelho_e_historico(serie, imei1, imei2, valor, modelo_id, status_id):
     conn = get_db_connection()
@@ -145,41 +59,6 @@ def adicionar_aparelho_e_historico(serie, imei1, imei2, valor, modelo_id, status
     finally:
         conn.close()
 
-def carregar_inventario_completo(order_by="a.data_cadastro DESC"):
-    """
-    Carrega uma visão completa do inventário, incluindo o responsável atual e permitindo ordenação.
-    """
-    conn = get_db_connection()
-    query = f"""
-        WITH UltimoResponsavel AS (
-            SELECT
-                h.aparelho_id,
-                h.colaborador_id,
-                ROW_NUMBER() OVER(PARTITION BY h.aparelho_id ORDER BY h.data_movimentacao DESC) as rn
-            FROM historico_movimentacoes h
-        )
-        SELECT 
-            a.id,
-            a.numero_serie,
-            ma.nome_marca || ' - ' || mo.nome_modelo as modelo_completo,
-            s.nome_status,
-            c.nome_completo as responsavel_atual,
-            a.valor,
-            a.imei1,
-            a.imei2,
-            a.data_cadastro
-        FROM aparelhos a
-        LEFT JOIN modelos mo ON a.modelo_id = mo.id
-        LEFT JOIN marcas ma ON mo.marca_id = ma.id
-        LEFT JOIN status s ON a.status_id = s.id
-        LEFT JOIN UltimoResponsavel ur ON a.id = ur.aparelho_id AND ur.rn = 1
-        LEFT JOIN colaboradores c ON ur.colaborador_id = c.id
-        ORDER BY {order_by}
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
-
 def atualizar_aparelho_completo(aparelho_id, serie, imei1, imei2, valor, modelo_id):
     """Atualiza todos os campos editáveis de um aparelho."""
     try:
@@ -250,39 +129,35 @@ with col2:
     with st.expander("Ver, Editar e Excluir Inventário de Aparelhos", expanded=True):
         
         # --- NOVO: Caixa de seleção para ordenação ---
-        sort_options = {
-            "Data de Entrada (Mais Recente)": "a.data_cadastro DESC",
-            "Número de Série (A-Z)": "a.numero_serie ASC",
-            "Modelo (A-Z)": "modelo_completo ASC",
-            "Status (A-Z)": "s.nome_status ASC",
-            "Responsável (A-Z)": "responsavel_atual ASC"
-        }
+        sort_options = ORDENACOES_INVENTARIO
         sort_selection = st.selectbox("Organizar por:", options=sort_options.keys())
 
         # Carrega os dados com a ordenação selecionada
-        inventario_df = carregar_inventario_completo(order_by=sort_options[sort_selection])
+        with perfil.secao("Carregar inventário"):
+            inventario_df = carregar_inventario_completo(order_by=sort_options[sort_selection])
         
-        edited_df = st.data_editor(
-            inventario_df,
-            column_config={
-                "id": st.column_config.NumberColumn("ID", disabled=True),
-                "numero_serie": st.column_config.TextColumn("N/S", required=True),
-                "modelo_completo": st.column_config.SelectboxColumn(
-                    "Modelo",
-                    options=modelos_dict.keys(),
-                    required=True
-                ),
-                "nome_status": st.column_config.TextColumn("Status Atual", disabled=True),
-                "responsavel_atual": st.column_config.TextColumn("Responsável Atual", disabled=True),
-                "valor": st.column_config.NumberColumn("Valor (R$)", format="R$ %.2f", required=True),
-                "imei1": st.column_config.TextColumn("IMEI 1"),
-                "imei2": st.column_config.TextColumn("IMEI 2"),
-                "data_cadastro": st.column_config.DateColumn("Data de Entrada", disabled=True),
-            },
-            hide_index=True,
-            num_rows="dynamic", # Permite adicionar e excluir linhas
-            key="aparelhos_editor"
-        )
+        with perfil.secao("Editor do inventário"):
+            edited_df = st.data_editor(
+                inventario_df,
+                column_config={
+                    "id": st.column_config.NumberColumn("ID", disabled=True),
+                    "numero_serie": st.column_config.TextColumn("N/S", required=True),
+                    "modelo_completo": st.column_config.SelectboxColumn(
+                        "Modelo",
+                        options=modelos_dict.keys(),
+                        required=True
+                    ),
+                    "nome_status": st.column_config.TextColumn("Status Atual", disabled=True),
+                    "responsavel_atual": st.column_config.TextColumn("Responsável Atual", disabled=True),
+                    "valor": st.column_config.NumberColumn("Valor (R$)", format="R$ %.2f", required=True),
+                    "imei1": st.column_config.TextColumn("IMEI 1"),
+                    "imei2": st.column_config.TextColumn("IMEI 2"),
+                    "data_cadastro": st.column_config.DateColumn("Data de Entrada", disabled=True),
+                },
+                hide_index=True,
+                num_rows="dynamic", # Permite adicionar e excluir linhas
+                key="aparelhos_editor"
+            )
         
         if st.button("Salvar Alterações"):
             # Lógica para Exclusão
@@ -305,4 +180,45 @@ with col2:
                         
                         if atualizar_aparelho_completo(aparelho_id, novo_serie, novo_imei1, novo_imei2, novo_valor, novo_modelo_id):
                             st.toast(f"Aparelho N/S '{row['numero_serie']}' atualizado!", icon="✅")
-            st.rerun()
+            perfil.reiniciar()
+
+st.markdown("---")
+st.subheader("Ciclo de Vida dos Aparelhos")
+tab_linha, tab_tempo = st.tabs(["Linha do Tempo do Aparelho", "Tempo por Status (Frota)"])
+
+with tab_linha:
+    aparelho_ciclo_id = seletor_aparelho("Aparelho:", chave="ciclo_aparelho", status_excluidos=(), mostrar_colaborador=True)
+    if not aparelho_ciclo_id:
+        st.info("Pesquise um aparelho para ver a sua linha do tempo.")
+    else:
+        with perfil.secao("Linha do tempo"):
+            linha_df = linha_do_tempo_aparelho(aparelho_ciclo_id)
+        if linha_df.empty:
+            st.info("Este aparelho ainda não tem movimentações.")
+        else:
+            grafico_df = linha_df.assign(fim=linha_df['fim'].fillna(datetime.now()), colaborador=linha_df['colaborador'].fillna('-'))
+            fig = px.timeline(grafico_df, x_start='inicio', x_end='fim', y='nome_status', color='nome_status', hover_data=['colaborador', 'dias'],
+                              labels={'nome_status': 'Status'})
+            st.plotly_chart(fig, use_container_width=True)
+            totais = linha_df.groupby('nome_status')['dias'].sum().round(1)
+            st.write(" | ".join(f"**{status}:** {dias:g} dias" for status, dias in totais.items()))
+            st.dataframe(linha_df.rename(columns={
+                'inicio': 'Início', 'fim': 'Fim', 'nome_status': 'Status', 'colaborador': 'Colaborador', 'dias': 'Dias',
+            }), hide_index=True, use_container_width=True)
+
+with tab_tempo:
+    col_inicio, col_fim = st.columns(2)
+    periodo_inicio = col_inicio.date_input("De:", value=date.today() - timedelta(days=365), key="ciclo_inicio")
+    periodo_fim = col_fim.date_input("Até:", value=date.today(), key="ciclo_fim")
+    with perfil.secao("Tempo por status"):
+        tempo_df = tempo_em_status(periodo_inicio, periodo_fim)
+        ate_entrega = dias_ate_status('Em estoque', 'Em uso', periodo_inicio, periodo_fim)
+    col1, col2 = st.columns(2)
+    col1.metric("Dias Médios em Estoque antes da Entrega", f"{ate_entrega['media']:.1f}" if ate_entrega['total'] else "-")
+    col2.metric("Entregas no Período", ate_entrega['total'])
+    if tempo_df.empty:
+        st.info("Não há movimentações no período selecionado.")
+    else:
+        st.dataframe(tempo_df, hide_index=True, use_container_width=True)
+
+perfil.finalizar_pagina()
@@ -1,98 +1,24 @@
 import streamlit as st
+import perfil
+import layout
+import replica
 import pandas as pd
-import sqlite3
-from datetime import datetime, date
 from auth import show_login_form
+from catalogo import obter_catalogo
+from consultas import carregar_historico_completo
+from movimentacoes import (
+    aparelhos_por_ids, aparelhos_por_series, colaboradores_por_identificador, registar_movimentacoes, separar_pares, separar_series
+)
+from pesquisa import seletor_aparelho, seletor_colaborador
 
 # --- Verificação de Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+perfil.iniciar_pagina("4_Movimentacoes")
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Configurações da Página ---
 st.title("Registar Movimentação de Aparelho")
@@ -100,146 +26,145 @@ st.markdown("---")
 
 # --- Funções de Banco de Dados ---
 
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def carregar_dados_para_selects():
-    """Carrega aparelhos, colaboradores e status para as caixas de seleção."""
-    conn = get_db_connection()
-    aparelhos = conn.execute("""
-        SELECT a.id, a.numero_serie, mo.nome_modelo, ma.nome_marca
-        FROM aparelhos a
-        JOIN modelos mo ON a.modelo_id = mo.id
-        JOIN marcas ma ON mo.marca_id = ma.id
-        WHERE a.status_id != (SELECT id FROM status WHERE nome_status = 'Baixado/Inutilizado')
-        ORDER BY ma.nome_marca, mo.nome_modelo, a.numero_serie
-    """).fetchall()
-
-    colaboradores = conn.execute("SELECT id, nome_completo FROM colaboradores ORDER BY nome_completo").fetchall()
-    status = conn.execute("SELECT id, nome_status FROM status ORDER BY nome_status").fetchall()
-    conn.close()
-    return aparelhos, colaboradores, status
+    """Carrega os status para as caixas de seleção (aparelhos e colaboradores são pesquisados sob demanda)."""
+    return obter_catalogo('status').linhas
 
 def registar_movimentacao(aparelho_id, colaborador_id, novo_status_id, novo_status_nome, localizacao, observacoes):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    data_hora_agora = datetime.now()
     try:
-        cursor.execute("BEGIN TRANSACTION;")
-        
-        id_colaborador_final = colaborador_id
-        if novo_status_nome == "Em manutenção":
-            ultimo_colaborador = cursor.execute("SELECT colaborador_id FROM historico_movimentacoes WHERE aparelho_id = ? AND colaborador_id IS NOT NULL ORDER BY data_movimentacao DESC LIMIT 1", (aparelho_id,)).fetchone()
-            if ultimo_colaborador:
-                id_colaborador_final = ultimo_colaborador[0]
-
-        cursor.execute(
-            "INSERT INTO historico_movimentacoes (data_movimentacao, aparelho_id, colaborador_id, status_id, localizacao_atual, observacoes) VALUES (?, ?, ?, ?, ?, ?)",
-            (data_hora_agora, aparelho_id, id_colaborador_final, novo_status_id, localizacao, observacoes)
-        )
-        cursor.execute(
-            "UPDATE aparelhos SET status_id = ? WHERE id = ?",
-            (novo_status_id, aparelho_id)
-        )
-        
-        if novo_status_nome == "Em manutenção":
-            cursor.execute("""
-                INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, data_envio, defeito_reportado, status_manutencao)
-                VALUES (?, ?, ?, ?, ?)
-            """, (aparelho_id, id_colaborador_final, date.today(), observacoes, 'Em Andamento'))
-
-        conn.commit()
-        st.success("Movimentação registada com sucesso!")
-        if novo_status_nome == "Em manutenção":
-            st.info("Uma Ordem de Serviço preliminar foi aberta. Aceda à página 'Manutenções' para adicionar o fornecedor.")
-
+        registar_movimentacoes([{
+            'aparelho_id': aparelho_id, 'colaborador_id': colaborador_id, 'status_id': novo_status_id,
+            'status_nome': novo_status_nome, 'localizacao': localizacao, 'observacoes': observacoes,
+        }])
     except Exception as e:
-        conn.rollback()
         st.error(f"Ocorreu um erro ao registar a movimentação: {e}")
-    finally:
-        conn.close()
-
-def carregar_historico_completo(status_filter=None, start_date=None, end_date=None):
-    """Carrega o histórico completo de movimentações, com filtros avançados."""
-    conn = get_db_connection()
-    query = """
-        SELECT 
-            h.id, h.data_movimentacao, a.numero_serie, mo.nome_modelo,
-            c.nome_completo as colaborador, s.nome_status,
-            h.localizacao_atual, h.observacoes
-        FROM historico_movimentacoes h
-        JOIN aparelhos a ON h.aparelho_id = a.id
-        JOIN status s ON h.status_id = s.id
-        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
-        LEFT JOIN modelos mo ON a.modelo_id = mo.id
-    """
-    params = []
-    where_clauses = []
-
-    if status_filter and status_filter != "Todos":
-        where_clauses.append("s.nome_status = ?")
-        params.append(status_filter)
-    
-    if start_date and end_date:
-        where_clauses.append("date(h.data_movimentacao) BETWEEN ? AND ?")
-        params.append(start_date.strftime('%Y-%m-%d'))
-        params.append(end_date.strftime('%Y-%m-%d'))
-    elif start_date:
-        where_clauses.append("date(h.data_movimentacao) >= ?")
-        params.append(start_date.strftime('%Y-%m-%d'))
-    elif end_date:
-        where_clauses.append("date(h.data_movimentacao) <= ?")
-        params.append(end_date.strftime('%Y-%m-%d'))
-
-    if where_clauses:
-        query += " WHERE " + " AND ".join(where_clauses)
-    
-    query += " ORDER BY h.data_movimentacao DESC"
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
+        return
+    st.success("Movimentação registada com sucesso!")
+    if novo_status_nome == "Em manutenção":
+        st.info("Uma Ordem de Serviço preliminar foi aberta. Aceda à página 'Manutenções' para adicionar o fornecedor.")
+
+def adicionar_ao_carrinho(aparelhos, colaboradores_por_serie=None):
+    """Junta aparelhos ao carrinho da movimentação em massa (um aparelho só entra uma vez)."""
+    carrinho = st.session_state['mov_massa_carrinho']
+    for ap in aparelhos:
+        colaborador = (colaboradores_por_serie or {}).get(ap['numero_serie'])
+        carrinho[ap['id']] = {
+            'N/S': ap['numero_serie'],
+            'Aparelho': f"{ap['nome_marca']} {ap['nome_modelo']}",
+            'Status Atual': ap['nome_status'],
+            'colaborador_id': colaborador['id'] if colaborador else None,
+            'Colaborador': colaborador['nome_completo'] if colaborador else "",
+        }
 
 # --- Interface do Usuário ---
 
-aparelhos_list, colaboradores_list, status_list = carregar_dados_para_selects()
-
-st.subheader("Formulário de Movimentação")
-
-with st.form("form_movimentacao", clear_on_submit=True):
-    aparelhos_dict = {f"{ap['nome_marca']} {ap['nome_modelo']} (S/N: {ap['numero_serie']})": ap['id'] for ap in aparelhos_list}
-    aparelho_selecionado_str = st.selectbox(
-        "Selecione o Aparelho*",
-        options=aparelhos_dict.keys(),
-        help="Clique na lista e comece a digitar para pesquisar."
-    )
-
-    colaboradores_dict = {col['nome_completo']: col['id'] for col in colaboradores_list}
-    opcoes_colaborador_com_nenhum = {"Nenhum": None}
-    opcoes_colaborador_com_nenhum.update(colaboradores_dict)
-    
-    colaborador_selecionado_str = st.selectbox(
-        "Atribuir ao Colaborador",
-        options=opcoes_colaborador_com_nenhum.keys(),
-        help="Clique na lista e comece a digitar para pesquisar."
-    )
-    
-    status_dict = {s['nome_status']: s['id'] for s in status_list}
-    novo_status_str = st.selectbox("Novo Status do Aparelho*", options=status_dict.keys())
-    nova_localizacao = st.text_input("Nova Localização", placeholder="Ex: Mesa do colaborador, Assistência Técnica XYZ")
-    observacoes = st.text_area("Observações", placeholder="Ex: Devolução com tela trincada, Envio para troca de bateria.")
-
-    submitted = st.form_submit_button("Registar Movimentação")
-    if submitted:
-        if not aparelho_selecionado_str or not novo_status_str:
-            st.error("Aparelho e Novo Status são campos obrigatórios.")
-        else:
-            aparelho_id = aparelhos_dict[aparelho_selecionado_str]
-            colaborador_id = opcoes_colaborador_com_nenhum[colaborador_selecionado_str]
-            novo_status_id = status_dict[novo_status_str]
-            registar_movimentacao(aparelho_id, colaborador_id, novo_status_id, novo_status_str, nova_localizacao, observacoes)
+status_list = carregar_dados_para_selects()
+
+tab_individual, tab_massa = st.tabs(["Movimentação Individual", "Movimentação em Massa"])
+
+with tab_individual:
+    st.subheader("Formulário de Movimentação")
+
+    # A pesquisa fica fora do formulário para que a lista seja atualizada a cada termo digitado
+    col_aparelho, col_colaborador = st.columns(2)
+    with col_aparelho:
+        aparelho_id = seletor_aparelho("Selecione o Aparelho*", chave="mov_aparelho")
+    with col_colaborador:
+        colaborador_id = seletor_colaborador("Atribuir ao Colaborador", chave="mov_colaborador")
+
+    with st.form("form_movimentacao", clear_on_submit=True):
+        status_dict = {s['nome_status']: s['id'] for s in status_list}
+        novo_status_str = st.selectbox("Novo Status do Aparelho*", options=status_dict.keys())
+        nova_localizacao = st.text_input("Nova Localização", placeholder="Ex: Mesa do colaborador, Assistência Técnica XYZ")
+        observacoes = st.text_area("Observações", placeholder="Ex: Devolução com tela trincada, Envio para troca de bateria.")
+
+        submitted = st.form_submit_button("Registar Movimentação")
+        if submitted:
+            if not aparelho_id or not novo_status_str:
+                st.error("Aparelho e Novo Status são campos obrigatórios.")
+            else:
+                novo_status_id = status_dict[novo_status_str]
+                registar_movimentacao(aparelho_id, colaborador_id, novo_status_id, novo_status_str, nova_localizacao, observacoes)
+
+with tab_massa:
+    st.info("Para entregas a equipas novas: junte vários aparelhos (pesquisa, N/S colados ou lidos por leitor) e registe todos numa única transação.")
+    if 'mov_massa_carrinho' not in st.session_state:
+        st.session_state['mov_massa_carrinho'] = {} # aparelho_id -> linha da tabela
+
+    registadas = st.session_state.pop('mov_massa_registadas', None)
+    if registadas:
+        st.success(f"{registadas} movimentação(ões) registada(s) com sucesso!")
+
+    st.markdown("##### 1. Aparelhos")
+    origem = st.radio("Como adicionar os aparelhos:", ["Colar/ler N/S", "Colar pares N/S e colaborador", "Pesquisar"], horizontal=True, key="mov_massa_origem")
+    if origem == "Pesquisar":
+        aparelho_pesquisado = seletor_aparelho("Aparelho:", chave="mov_massa_aparelho")
+        if st.button("Adicionar ao carrinho", disabled=aparelho_pesquisado is None):
+            adicionar_ao_carrinho(aparelhos_por_ids([aparelho_pesquisado]))
+    else:
+        pares = origem == "Colar pares N/S e colaborador"
+        with st.form("form_mov_massa_series", clear_on_submit=True):
+            texto = st.text_area(
+                "Um aparelho por linha" if not pares else "Uma linha por aparelho: N/S e código, CPF ou nome do colaborador (separados por tabulação, ';' ou ',')",
+                placeholder="SN001\nSN002\nSN003" if not pares else "SN001;1023\nSN002;Maria Souza",
+                height=150,
+            )
+            if st.form_submit_button("Adicionar ao carrinho"):
+                colaboradores_por_serie = {}
+                if pares:
+                    lista_pares = separar_pares(texto)
+                    series = list(dict.fromkeys(serie for serie, _ in lista_pares))
+                    por_identificador, nao_encontrados_colab, ambiguos_colab = colaboradores_por_identificador([ident for _, ident in lista_pares])
+                    colaboradores_por_serie = {serie: por_identificador.get(ident.strip()) for serie, ident in lista_pares if ident}
+                    if nao_encontrados_colab:
+                        st.warning(f"Colaboradores não encontrados: {', '.join(nao_encontrados_colab[:20])}")
+                    if ambiguos_colab:
+                        st.warning(f"Identificadores de mais de um colaborador (use o código ou o CPF): {', '.join(ambiguos_colab[:20])}")
+                else:
+                    series = separar_series(texto)
+                aparelhos, nao_encontradas = aparelhos_por_series(series)
+                adicionar_ao_carrinho(aparelhos, colaboradores_por_serie)
+                st.success(f"{len(aparelhos)} aparelho(s) adicionados ao carrinho.")
+                if nao_encontradas:
+                    st.warning(f"N/S não encontrados (ou baixados): {', '.join(nao_encontradas[:20])}{' ...' if len(nao_encontradas) > 20 else ''}")
+
+    carrinho = st.session_state['mov_massa_carrinho']
+    if not carrinho:
+        st.info("O carrinho está vazio.")
+    else:
+        col_total, col_limpar = st.columns([4, 1])
+        col_total.write(f"**{len(carrinho)} aparelho(s) no carrinho**")
+        if col_limpar.button("Esvaziar carrinho"):
+            st.session_state['mov_massa_carrinho'] = {}
+            perfil.reiniciar()
+        st.dataframe(pd.DataFrame(carrinho.values()).drop(columns=['colaborador_id']), hide_index=True, use_container_width=True)
+
+        st.markdown("##### 2. Destino")
+        colaborador_comum = seletor_colaborador("Colaborador (para os aparelhos sem colaborador indicado)", chave="mov_massa_colaborador")
+        with st.form("form_mov_massa"):
+            status_dict = {s['nome_status']: s['id'] for s in status_list}
+            nomes_status = list(status_dict.keys())
+            status_massa = st.selectbox("Novo Status dos Aparelhos*", options=nomes_status, index=nomes_status.index("Em uso") if "Em uso" in nomes_status else 0)
+            localizacao_massa = st.text_input("Nova Localização", placeholder="Ex: Mesa do colaborador, Armário da equipa comercial")
+            observacoes_massa = st.text_area("Observações", placeholder="Ex: Entrega à equipa de vendas (turma de março).")
+            if st.form_submit_button(f"Registar {len(carrinho)} movimentação(ões)", type="primary"):
+                movimentos = [{
+                    'aparelho_id': aparelho_id,
+                    'colaborador_id': linha['colaborador_id'] or colaborador_comum,
+                    'status_id': status_dict[status_massa],
+                    'status_nome': status_massa,
+                    'localizacao': localizacao_massa,
+                    'observacoes': observacoes_massa,
+                } for aparelho_id, linha in carrinho.items()]
+                try:
+                    with st.spinner("A registar as movimentações..."):
+                        registadas = registar_movimentacoes(movimentos)
+                except Exception as e:
+                    st.error(f"Nenhuma movimentação foi gravada. Ocorreu um erro: {e}")
+                else:
+                    st.session_state['mov_massa_registadas'] = registadas
+                    st.session_state['mov_massa_carrinho'] = {}
+                    perfil.reiniciar()
 
 st.markdown("---")
 
@@ -256,15 +181,21 @@ with st.expander("Ver e Filtrar Histórico de Movimentações", expanded=True):
     data_fim = col_data2.date_input("Até:", value=None, format="DD/MM/YYYY")
 
     # Carrega os dados com os filtros aplicados
-    historico_df = carregar_historico_completo(status_filter=status_filtro, start_date=data_inicio, end_date=data_fim)
+    with perfil.secao("Carregar histórico"):
+        historico_df = carregar_historico_completo(status_filter=status_filtro, start_date=data_inicio, end_date=data_fim)
     
     st.markdown("###### Resultados")
-    st.dataframe(historico_df, use_container_width=True, hide_index=True, column_config={
-        "data_movimentacao": "Data e Hora",
-        "numero_serie": "N/S do Aparelho",
-        "nome_modelo": "Modelo",
-        "colaborador": "Colaborador",
-        "nome_status": "Status Registado",
-        "localizacao_atual": "Localização",
-        "observacoes": "Observações"
-    })
+    if replica.disponivel():
+        st.caption(f"Relatório lido da réplica de leitura (atualizada há {replica.atraso():.0f} s).")
+    with perfil.secao("Tabela do histórico"):
+        st.dataframe(historico_df, use_container_width=True, hide_index=True, column_config={
+            "data_movimentacao": "Data e Hora",
+            "numero_serie": "N/S do Aparelho",
+            "nome_modelo": "Modelo",
+            "colaborador": "Colaborador",
+            "nome_status": "Status Registado",
+            "localizacao_atual": "Localização",
+            "observacoes": "Observações"
+        })
+
+perfil.finalizar_pagina()
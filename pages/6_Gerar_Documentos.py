@@ -1,110 +1,26 @@
 import streamlit as st
-import sqlite3
+import perfil
+import layout
 from datetime import datetime
 from auth import show_login_form
-from fpdf import FPDF
-import io
-import os
+from database import get_db_connection
+from catalogo import obter_catalogo, status_id
+from termos import (
+    ITENS_CHECKLIST, OPCOES_ESTADO, buscar_dados_termo, buscar_entregas_para_lote,
+    LIMITE_ARQUIVO, checklist_padrao, gerar_lote_zip, ler_termo_arquivado, listar_termos_arquivados,
+    nome_ficheiro_termo, obter_ou_gerar_termo, ZipDoLote
+)
 
 # --- Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer { text-align: center; padding-top: 20px; padding-bottom: 20px; }
-    .sidebar-footer a { margin-right: 15px; text-decoration: none; }
-    .sidebar-footer img { width: 25px; height: 25px; filter: grayscale(1) opacity(0.5); transition: filter 0.3s; }
-    .sidebar-footer img:hover { filter: grayscale(0) opacity(1); }
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img { filter: grayscale(1) opacity(0.6) invert(1); }
-        .sidebar-footer img:hover { filter: opacity(1) invert(1); }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+perfil.iniciar_pagina("6_Gerar_Documentos")
 
-# --- Barra Lateral ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub"><img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg"></a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn"><img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg"></a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-# --- Classe para gerar o PDF ---
-class PDF(FPDF):
-    def header(self):
-        # Título do Documento
-        self.set_y(self.get_y() + 5) # Move o cursor para baixo
-        self.set_font('Arial', 'B', 16)
-        self.set_text_color(0, 51, 102) # Azul Mirasol
-        self.cell(0, 10, 'TERMO DE RESPONSABILIDADE', 0, 1, 'C')
-        self.set_font('Arial', 'I', 10)
-        self.set_text_color(227, 6, 19) # Vermelho Mirasol
-        self.cell(0, 5, 'PROTOCOLO DE RECEBIMENTO E DEVOLUÇÃO', 0, 1, 'C')
-        self.ln(10)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
-
-    def section_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.set_fill_color(0, 51, 102)
-        self.set_text_color(255, 255, 255)
-        self.cell(0, 8, title, 0, 1, 'L', fill=True)
-        self.ln(2)
-        self.set_text_color(0, 0, 0)
-
-    def info_line(self, label, value):
-        self.set_font('Arial', 'B', 10)
-        self.cell(30, 7, f" {label}:", 0, 0)
-        self.set_font('Arial', '', 10)
-        self.cell(0, 7, f" {value}", 0, 1)
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções do DB ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def carregar_movimentacoes_entrega():
     conn = get_db_connection()
     movs = conn.execute("""
@@ -112,136 +28,197 @@ def carregar_movimentacoes_entrega():
         FROM historico_movimentacoes h
         JOIN aparelhos a ON h.aparelho_id = a.id
         JOIN colaboradores c ON h.colaborador_id = c.id
-        WHERE h.status_id = (SELECT id FROM status WHERE nome_status = 'Em uso')
+        WHERE h.status_id = ?
         ORDER BY h.data_movimentacao DESC
-    """).fetchall()
+    """, (status_id('Em uso', conn),)).fetchall()
     conn.close()
     return movs
 
-def buscar_dados_termo(mov_id):
-    conn = get_db_connection()
-    dados = conn.execute("""
-        SELECT
-            c.nome_completo, c.cpf, s.nome_setor, c.gmail, c.codigo as codigo_colaborador,
-            m.nome_marca, mo.nome_modelo, a.imei1, a.imei2,
-            h.id as protocolo, h.data_movimentacao
-        FROM historico_movimentacoes h
-        JOIN colaboradores c ON h.colaborador_id = c.id
-        JOIN setores s ON c.setor_id = s.id
-        JOIN aparelhos a ON h.aparelho_id = a.id
-        JOIN modelos mo ON a.modelo_id = mo.id
-        JOIN marcas m ON mo.marca_id = m.id
-        WHERE h.id = ?
-    """, (mov_id,)).fetchone()
-    conn.close()
-    return dict(dados) if dados else None
-
-def gerar_pdf_termo(dados, checklist_data):
-    pdf = PDF()
-    pdf.set_auto_page_break(auto=False)
-    pdf.add_page()
-    
-    pdf.set_font('Arial', 'B', 10)
-    pdf.cell(95, 7, f"CÓDIGO: {dados['protocolo']}", 1, 0, 'C')
-    pdf.cell(95, 7, f"DATA: {dados['data_movimentacao']}", 1, 1, 'C')
-    pdf.ln(5)
-
-    pdf.section_title('DADOS DO COLABORADOR')
-    pdf.info_line('NOME', dados['nome_completo'])
-    pdf.info_line('CPF', dados['cpf'])
-    pdf.info_line('SETOR', dados['nome_setor'])
-    pdf.info_line('EMAIL', dados['gmail'])
-    pdf.ln(5)
-
-    pdf.section_title('DADOS DO SMARTPHONE')
-    pdf.info_line('MARCA', dados['nome_marca'])
-    pdf.info_line('MODELO', dados['nome_modelo'])
-    pdf.info_line('IMEI 1', dados['imei1'])
-    pdf.info_line('IMEI 2', dados['imei2'])
-    pdf.ln(5)
-
-    pdf.section_title('DOCUMENTAÇÃO')
-    pdf.set_font('Arial', '', 8)
-    texto_doc = "Declaro para os devidos fins que os materiais registados nesta ficha encontram-se em meu poder para uso em minhas atividades, cabendo-me a responsabilidade por sua guarda e conservação... (Art. 462 CLT). Declaro estar ciente e de acordo com a utilização de meus dados pessoais neste documento, para fins de controle."
-    pdf.multi_cell(0, 4, texto_doc, 0, 'J')
-    pdf.ln(5)
-
-    pdf.section_title('CHECKLIST DE RECEBIMENTO')
-    pdf.set_font('Arial', 'B', 10)
-    pdf.cell(95, 6, 'ITEM', 'B', 0, 'L')
-    pdf.cell(47.5, 6, 'ENTREGA', 'B', 0, 'C')
-    pdf.cell(47.5, 6, 'ESTADO', 'B', 1, 'C')
-    pdf.set_font('Arial', '', 10)
-    for item, detalhes in checklist_data.items():
-        pdf.cell(95, 6, item, 'B', 0)
-        pdf.cell(47.5, 6, 'SIM' if detalhes['entregue'] else 'NÃO', 'B', 0, 'C')
-        pdf.cell(47.5, 6, detalhes['estado'], 'B', 1, 'C')
-    pdf.ln(20)
-
-    pdf.cell(0, 10, '_________________________________________', 0, 1, 'C')
-    pdf.cell(0, 5, dados['nome_completo'], 0, 1, 'C')
-    
-    return bytes(pdf.output())
-
 # --- UI ---
 st.title("Gerar Termo de Responsabilidade")
-movimentacoes = carregar_movimentacoes_entrega()
-
-if not movimentacoes:
-    st.info("Nenhuma movimentação de entrega encontrada para gerar termos.")
-else:
-    mov_dict = {f"{datetime.fromisoformat(m['data_movimentacao']).strftime('%d/%m/%Y')} - {m['nome_completo']} (S/N: {m['numero_serie']})": m['id'] for m in movimentacoes}
-    mov_selecionada_str = st.selectbox("1. Selecione a entrega para gerar o termo:", options=mov_dict.keys())
-    
-    dados_termo = buscar_dados_termo(mov_dict[mov_selecionada_str])
-
-    if dados_termo:
-        st.markdown("---")
-        st.subheader("2. Confira e Edite as Informações (Checkout)")
+tab1, tab2, tab3 = st.tabs(["Termo Individual", "Geração em Lote", "Arquivo de Termos"])
+
+with tab1:
+    movimentacoes = carregar_movimentacoes_entrega()
+
+    if not movimentacoes:
+        st.info("Nenhuma movimentação de entrega encontrada para gerar termos.")
+    else:
+        mov_dict = {f"{datetime.fromisoformat(m['data_movimentacao']).strftime('%d/%m/%Y')} - {m['nome_completo']} (S/N: {m['numero_serie']})": m['id'] for m in movimentacoes}
+        mov_selecionada_str = st.selectbox("1. Selecione a entrega para gerar o termo:", options=mov_dict.keys())
         
-        with st.form("checkout_form"):
-            dados_termo['protocolo'] = st.text_input("Código do Termo", value=dados_termo['protocolo'])
-            dados_termo['data_movimentacao'] = st.text_input("Data", value=datetime.fromisoformat(dados_termo['data_movimentacao']).strftime('%d/%m/%Y'))
-            
-            st.markdown("##### Dados do Colaborador")
-            dados_termo['nome_completo'] = st.text_input("Nome", value=dados_termo['nome_completo'])
-            dados_termo['cpf'] = st.text_input("CPF", value=dados_termo['cpf'])
-            
-            setores_options = [s['nome_setor'] for s in get_db_connection().execute("SELECT nome_setor FROM setores").fetchall()]
-            current_sector_index = setores_options.index(dados_termo['nome_setor']) if dados_termo['nome_setor'] in setores_options else 0
-            dados_termo['nome_setor'] = st.selectbox("Setor", options=setores_options, index=current_sector_index)
-            
-            dados_termo['gmail'] = st.text_input("Email", value=dados_termo['gmail'])
+        mov_id = mov_dict[mov_selecionada_str]
+        dados_termo = buscar_dados_termo(mov_id)
 
-            st.markdown("##### Dados do Smartphone")
-            dados_termo['imei1'] = st.text_input("IMEI 1", value=dados_termo['imei1'])
-            dados_termo['imei2'] = st.text_input("IMEI 2", value=dados_termo['imei2'])
-            
+        if dados_termo:
             st.markdown("---")
-            st.subheader("3. Preencha o Checklist de Entrega")
+            st.subheader("2. Confira e Edite as Informações (Checkout)")
             
-            checklist_data = {}
-            itens_checklist = ["Tela", "Carcaça", "Bateria", "Botões", "USB", "Chip", "Carregador", "Cabo USB", "Capa", "Película"]
-            opcoes_estado = ["NOVO NA CAIXA", "BOM", "REGULAR", "AVARIADO"]
-            
-            for item in itens_checklist:
-                col1, col2 = st.columns(2)
-                entregue = col1.checkbox(f"{item}", value=True, key=f"entregue_{item}")
-                estado = col2.selectbox(f"Estado de {item}", options=opcoes_estado, key=f"estado_{item}")
-                checklist_data[item] = {'entregue': entregue, 'estado': estado}
-
-            submitted = st.form_submit_button("Gerar e Baixar PDF")
-            if submitted:
-                pdf_bytes = gerar_pdf_termo(dados_termo, checklist_data)
-                st.session_state['pdf_gerado'] = pdf_bytes
-                st.session_state['pdf_filename'] = f"Termo_{dados_termo['nome_completo'].replace(' ', '_')}.pdf"
-
-if 'pdf_gerado' in st.session_state and st.session_state['pdf_gerado']:
-    st.download_button(
-        label="Baixar Termo em PDF",
-        data=st.session_state['pdf_gerado'],
-        file_name=st.session_state['pdf_filename'],
-        mime="application/pdf"
-    )
-    st.session_state['pdf_gerado'] = None
-
+            with st.form("checkout_form"):
+                dados_termo['protocolo'] = st.text_input("Código do Termo", value=dados_termo['protocolo'])
+                dados_termo['data_movimentacao'] = st.text_input("Data", value=datetime.fromisoformat(dados_termo['data_movimentacao']).strftime('%d/%m/%Y'))
+                
+                st.markdown("##### Dados do Colaborador")
+                dados_termo['nome_completo'] = st.text_input("Nome", value=dados_termo['nome_completo'])
+                dados_termo['cpf'] = st.text_input("CPF", value=dados_termo['cpf'])
+                
+                setores_options = list(obter_catalogo('setores').ids.keys())
+                current_sector_index = setores_options.index(dados_termo['nome_setor']) if dados_termo['nome_setor'] in setores_options else 0
+                dados_termo['nome_setor'] = st.selectbox("Setor", options=setores_options, index=current_sector_index)
+                
+                dados_termo['gmail'] = st.text_input("Email", value=dados_termo['gmail'])
+
+                st.markdown("##### Dados do Smartphone")
+                dados_termo['imei1'] = st.text_input("IMEI 1", value=dados_termo['imei1'])
+                dados_termo['imei2'] = st.text_input("IMEI 2", value=dados_termo['imei2'])
+                
+                st.markdown("---")
+                st.subheader("3. Preencha o Checklist de Entrega")
+                
+                checklist_data = {}
+                for item in ITENS_CHECKLIST:
+                    col1, col2 = st.columns(2)
+                    entregue = col1.checkbox(f"{item}", value=True, key=f"entregue_{item}")
+                    estado = col2.selectbox(f"Estado de {item}", options=OPCOES_ESTADO, key=f"estado_{item}")
+                    checklist_data[item] = {'entregue': entregue, 'estado': estado}
+
+                submitted = st.form_submit_button("Gerar e Baixar PDF")
+                if submitted:
+                    pdf_bytes, veio_do_arquivo = obter_ou_gerar_termo(
+                        dados_termo, checklist_data, mov_id, gerado_por=st.session_state['user_name']
+                    )
+                    if veio_do_arquivo:
+                        st.info("Este termo já tinha sido gerado com os mesmos dados e foi obtido do arquivo.")
+                    st.session_state['pdf_gerado'] = pdf_bytes
+                    st.session_state['pdf_filename'] = f"Termo_{dados_termo['nome_completo'].replace(' ', '_')}.pdf"
+
+    if 'pdf_gerado' in st.session_state and st.session_state['pdf_gerado']:
+        st.download_button(
+            label="Baixar Termo em PDF",
+            data=st.session_state['pdf_gerado'],
+            file_name=st.session_state['pdf_filename'],
+            mime="application/pdf"
+        )
+        st.session_state['pdf_gerado'] = None
+
+with tab2:
+    st.subheader("Gerar Termos de Várias Entregas")
+    st.info("Os termos são gerados em paralelo e reunidos num único ficheiro ZIP. Todos usam o mesmo checklist.")
+
+    with st.form("lote_form"):
+        col1, col2, col3 = st.columns(3)
+        data_inicio = col1.date_input("Entregas a partir de", value=None, format="DD/MM/YYYY")
+        data_fim = col2.date_input("Até", value=None, format="DD/MM/YYYY")
+        setores = obter_catalogo('setores').ids
+        setor_selecionado = col3.selectbox("Setor", options=["Todos"] + list(setores.keys()))
+        ids_texto = st.text_input(
+            "Códigos das movimentações (opcional)",
+            placeholder="Ex: 120, 121, 135"
+        )
+
+        st.markdown("##### Checklist aplicado a todos os termos")
+        itens_entregues = st.multiselect("Itens entregues", options=ITENS_CHECKLIST, default=ITENS_CHECKLIST)
+        estado_itens = st.selectbox("Estado dos itens", options=OPCOES_ESTADO)
+
+        gerar_lote = st.form_submit_button("Gerar ZIP com os Termos", type="primary")
+
+    if gerar_lote:
+        mov_ids = [int(parte) for parte in ids_texto.replace(';', ',').split(',') if parte.strip().isdigit()]
+        entregas = buscar_entregas_para_lote(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            setor_id=setores.get(setor_selecionado),
+            mov_ids=mov_ids
+        )
+
+        if not entregas:
+            st.warning("Nenhuma entrega encontrada com os filtros aplicados.")
+        else:
+            # Remove o ZIP do lote anterior antes de gerar um novo (o de um lote que fica
+            # na sessão é apagado quando a sessão termina)
+            zip_anterior = st.session_state.pop('lote_zip', None)
+            if zip_anterior:
+                zip_anterior.apagar()
+            zip_lote = ZipDoLote()
+
+            barra = st.progress(0, text=f"A gerar {len(entregas)} termos...")
+            erros = gerar_lote_zip(
+                entregas,
+                checklist_padrao(itens_entregues, estado_itens),
+                zip_lote.caminho,
+                ao_progredir=lambda feitos, total: barra.progress(feitos / total, text=f"{feitos} de {total} termos gerados"),
+                gerado_por=st.session_state['user_name']
+            )
+
+            st.session_state['lote_zip'] = zip_lote
+            st.session_state['lote_gerados'] = len(entregas) - len(erros)
+            st.session_state['lote_erros'] = erros
+
+    if st.session_state.get('lote_zip'):
+        st.success(f"{st.session_state['lote_gerados']} termo(s) gerado(s) com sucesso.")
+        if st.session_state['lote_erros']:
+            st.error(f"{len(st.session_state['lote_erros'])} termo(s) não puderam ser gerados:")
+            st.dataframe(
+                [{"Código": protocolo, "Colaborador": nome, "Erro": erro} for protocolo, nome, erro in st.session_state['lote_erros']],
+                hide_index=True, use_container_width=True
+            )
+        if st.session_state['lote_gerados']:
+            # O ZIP só é lido do disco no clique, não a cada execução da página
+            st.download_button(
+                label="Baixar Termos (ZIP)",
+                data=st.session_state['lote_zip'].ler,
+                file_name=f"Termos_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                mime="application/zip"
+            )
+
+with tab3:
+    st.subheader("Termos Gerados")
+    st.info("Todos os termos gerados ficam guardados e podem ser baixados novamente sem serem refeitos.")
+
+    col1, col2, col3 = st.columns(3)
+    pesquisa_arquivo = col1.text_input("Pesquisar por colaborador ou N/S", key="arquivo_pesquisa", placeholder="Digite o início do nome ou do N/S e pressione Enter")
+    arquivo_inicio = col2.date_input("Gerados a partir de", value=None, format="DD/MM/YYYY", key="arquivo_inicio")
+    arquivo_fim = col3.date_input("Até", value=None, format="DD/MM/YYYY", key="arquivo_fim")
+
+    termos_arquivados = listar_termos_arquivados(pesquisa_arquivo, arquivo_inicio, arquivo_fim)
+    if not termos_arquivados:
+        st.warning("Nenhum termo arquivado encontrado.")
+    else:
+        if len(termos_arquivados) == LIMITE_ARQUIVO:
+            st.caption(f"São mostrados os {LIMITE_ARQUIVO} termos mais recentes. Refine a pesquisa ou o período para encontrar outros.")
+        st.dataframe(
+            [{
+                "Código": t['movimentacao_id'],
+                "Colaborador": t['nome_completo'],
+                "N/S": t['numero_serie'],
+                "Data da Entrega": datetime.fromisoformat(t['data_movimentacao']).strftime('%d/%m/%Y'),
+                "Gerado em": datetime.fromisoformat(t['data_geracao']).strftime('%d/%m/%Y %H:%M'),
+                "Gerado por": t['gerado_por'],
+            } for t in termos_arquivados],
+            hide_index=True, use_container_width=True
+        )
+
+        # Opções pelo id do termo: dois termos gerados no mesmo minuto continuam distintos
+        termos_dict = {t['id']: t for t in termos_arquivados}
+        termo_id = st.selectbox(
+            "Selecione o termo para baixar", options=list(termos_dict),
+            format_func=lambda termo_id: (
+                f"{termos_dict[termo_id]['movimentacao_id']} - {termos_dict[termo_id]['nome_completo']} (S/N: {termos_dict[termo_id]['numero_serie']})"
+                f" - gerado em {datetime.fromisoformat(termos_dict[termo_id]['data_geracao']).strftime('%d/%m/%Y %H:%M')}"
+            ),
+            help=f"São mostrados até {LIMITE_ARQUIVO} resultados. Refine a pesquisa para encontrar outros termos."
+        )
+        termo = termos_dict[termo_id]
+        pdf_arquivado = ler_termo_arquivado(termo['hash_conteudo'])
+        if pdf_arquivado is None:
+            st.error("O ficheiro deste termo não foi encontrado no arquivo.")
+        else:
+            st.download_button(
+                label="Baixar Termo Arquivado",
+                data=pdf_arquivado,
+                file_name=nome_ficheiro_termo({'protocolo': termo['movimentacao_id'], 'nome_completo': termo['nome_completo']}),
+                mime="application/pdf",
+                key="baixar_termo_arquivado"
+            )
+
+perfil.finalizar_pagina()
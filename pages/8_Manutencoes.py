@@ -1,129 +1,28 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
+import perfil
+import layout
 from datetime import date, datetime
 from auth import show_login_form
+from database import get_db_connection
+from catalogo import status_id
+from pesquisa import seletor_aparelho, seletor_fornecedor
+from fornecedores import obter_ou_criar_fornecedor
+from consultas import carregar_manutencoes_em_andamento
+from analise_manutencao import ROTULOS_IDADE, SLA_DIAS, obter_analise
+from importacao_tardia import importar_tardiamente
+
+px = importar_tardiamente("plotly.express")
 
 # --- Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-# --- NOVO: Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+perfil.iniciar_pagina("8_Manutencoes")
 
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções do DB ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def carregar_aparelhos_para_manutencao():
-    conn = get_db_connection()
-    aparelhos = conn.execute("""
-        WITH UltimoHistorico AS (
-            SELECT
-                aparelho_id, colaborador_id,
-                ROW_NUMBER() OVER(PARTITION BY aparelho_id ORDER BY data_movimentacao DESC) as rn
-            FROM historico_movimentacoes
-        )
-        SELECT
-            a.id, a.numero_serie, mo.nome_modelo, ma.nome_marca,
-            c.nome_completo as ultimo_colaborador
-        FROM aparelhos a
-        JOIN modelos mo ON a.modelo_id = mo.id
-        JOIN marcas ma ON mo.marca_id = ma.id
-        LEFT JOIN UltimoHistorico uh ON a.id = uh.aparelho_id AND uh.rn = 1
-        LEFT JOIN colaboradores c ON uh.colaborador_id = c.id
-        WHERE a.status_id != (SELECT id FROM status WHERE nome_status = 'Em manutenção')
-          AND a.status_id != (SELECT id FROM status WHERE nome_status = 'Baixado/Inutilizado')
-        ORDER BY ma.nome_marca, mo.nome_modelo
-    """).fetchall()
-    conn.close()
-    return aparelhos
-
 def abrir_ordem_servico(aparelho_id, fornecedor, defeito):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -137,13 +36,14 @@ def abrir_ordem_servico(aparelho_id, fornecedor, defeito):
         """, (aparelho_id,)).fetchone()
         ultimo_colaborador_id = ultimo_colaborador[0] if ultimo_colaborador else None
         
-        status_manutencao_id = cursor.execute("SELECT id FROM status WHERE nome_status = 'Em manutenção'").fetchone()[0]
+        status_manutencao_id = status_id('Em manutenção', conn)
+        fornecedor_id = obter_ou_criar_fornecedor(fornecedor, conn)
 
         # 1. Cria o registo na tabela de manutenções
         cursor.execute("""
-            INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, fornecedor, data_envio, defeito_reportado, status_manutencao)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (aparelho_id, ultimo_colaborador_id, fornecedor, date.today(), defeito, 'Em Andamento'))
+            INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, fornecedor, fornecedor_id, data_envio, defeito_reportado, status_manutencao)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (aparelho_id, ultimo_colaborador_id, fornecedor, fornecedor_id, date.today(), defeito, 'Em Andamento'))
 
         # 2. Atualiza o status do aparelho
         cursor.execute("UPDATE aparelhos SET status_id = ? WHERE id = ?", (status_manutencao_id, aparelho_id))
@@ -162,26 +62,13 @@ def abrir_ordem_servico(aparelho_id, fornecedor, defeito):
     finally:
         conn.close()
 
-def carregar_manutencoes_em_andamento():
-    conn = get_db_connection()
-    df = pd.read_sql_query("""
-        SELECT m.id, a.numero_serie, mo.nome_modelo, m.fornecedor, m.data_envio, m.defeito_reportado
-        FROM manutencoes m
-        JOIN aparelhos a ON m.aparelho_id = a.id
-        JOIN modelos mo ON a.modelo_id = mo.id
-        WHERE m.status_manutencao = 'Em Andamento'
-        ORDER BY m.data_envio ASC
-    """, conn)
-    conn.close()
-    return df
-
 def fechar_ordem_servico(manutencao_id, solucao, custo, novo_status_nome):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("BEGIN TRANSACTION;")
         aparelho_id = cursor.execute("SELECT aparelho_id FROM manutencoes WHERE id = ?", (manutencao_id,)).fetchone()[0]
-        novo_status_id = cursor.execute("SELECT id FROM status WHERE nome_status = ?", (novo_status_nome,)).fetchone()[0]
+        novo_status_id = status_id(novo_status_nome, conn)
         status_manutencao = 'Concluída' if novo_status_nome == 'Em estoque' else 'Sem Reparo'
         
         cursor.execute("""
@@ -209,7 +96,8 @@ def fechar_ordem_servico(manutencao_id, solucao, custo, novo_status_nome):
 def atualizar_manutencao(manutencao_id, fornecedor, defeito):
     conn = get_db_connection()
     try:
-        conn.execute("UPDATE manutencoes SET fornecedor = ?, defeito_reportado = ? WHERE id = ?", (fornecedor, defeito, manutencao_id))
+        fornecedor_id = obter_ou_criar_fornecedor(fornecedor, conn)
+        conn.execute("UPDATE manutencoes SET fornecedor = ?, fornecedor_id = ?, defeito_reportado = ? WHERE id = ?", (fornecedor, fornecedor_id, defeito, manutencao_id))
         conn.commit()
         return True
     except Exception as e:
@@ -222,32 +110,29 @@ def atualizar_manutencao(manutencao_id, fornecedor, defeito):
 st.title("Fluxo de Manutenção")
 st.markdown("---")
 
-tab1, tab2 = st.tabs(["Abrir Ordem de Serviço", "Acompanhar e Fechar O.S."])
+tab1, tab2, tab3 = st.tabs(["Abrir Ordem de Serviço", "Acompanhar e Fechar O.S.", "Análise de Manutenções"])
 
 with tab1:
     st.subheader("1. Enviar Aparelho para Manutenção")
-    aparelhos_list = carregar_aparelhos_para_manutencao()
-    
-    aparelhos_dict = {f"{ap['nome_marca']} {ap['nome_modelo']} (S/N: {ap['numero_serie']}) - [Com: {ap['ultimo_colaborador'] or 'Ninguém'}]": ap['id'] for ap in aparelhos_list}
+    aparelho_id = seletor_aparelho(
+        "Selecione o Aparelho*",
+        chave="os_aparelho",
+        status_excluidos=("Em manutenção", "Baixado/Inutilizado"),
+        mostrar_colaborador=True
+    )
 
-    if not aparelhos_dict:
-        st.info("Nenhum aparelho disponível para enviar para manutenção.")
+    if not aparelho_id:
+        st.info("Nenhum aparelho disponível para enviar para manutenção com esse critério de pesquisa.")
     else:
+        fornecedor = seletor_fornecedor("Fornecedor / Assistência Técnica*", chave="os_fornecedor")
         with st.form("form_nova_os"):
-            aparelho_selecionado_str = st.selectbox(
-                "Selecione o Aparelho*",
-                options=aparelhos_dict.keys(),
-                help="Clique na lista e comece a digitar para pesquisar."
-            )
-            fornecedor = st.text_input("Fornecedor / Assistência Técnica*")
             defeito = st.text_area("Defeito Reportado*")
             if st.form_submit_button("Abrir Ordem de Serviço"):
-                if not all([aparelho_selecionado_str, fornecedor, defeito]):
+                if not all([aparelho_id, fornecedor, defeito]):
                     st.error("Todos os campos são obrigatórios.")
                 else:
-                    aparelho_id = aparelhos_dict[aparelho_selecionado_str]
                     abrir_ordem_servico(aparelho_id, fornecedor, defeito)
-                    st.rerun()
+                    perfil.reiniciar()
 
 with tab2:
     st.subheader("2. Ordens de Serviço em Andamento")
@@ -275,7 +160,7 @@ with tab2:
                     if not row.equals(original_row):
                         if atualizar_manutencao(row['id'], row['fornecedor'], row['defeito_reportado']):
                             st.toast(f"O.S. Nº {row['id']} atualizada!", icon="✅")
-                st.rerun()
+                perfil.reiniciar()
 
     st.markdown("---")
     st.subheader("3. Fechar Ordem de Serviço")
@@ -301,4 +186,44 @@ with tab2:
                 else:
                     os_id = os_dict[os_selecionada_str]
                     fechar_ordem_servico(os_id, solucao, custo, novo_status_final)
-                    st.rerun()
+                    perfil.reiniciar()
+
+with tab3:
+    with perfil.secao("Análise de manutenções"):
+        analise = obter_analise()
+
+    envelhecimento_df = analise['envelhecimento']
+    fora_do_sla = int(envelhecimento_df['Total'].sum() - envelhecimento_df[ROTULOS_IDADE[0]].sum())
+    col1, col2, col3 = st.columns(3)
+    col1.metric(f"O.S. Abertas há mais de {SLA_DIAS} dias", fora_do_sla)
+    col2.metric("Custo Total de Reparos", f"R$ {analise['custo_modelo']['Custo Total (R$)'].sum():,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
+    col3.metric("MTBF Médio (dias)", f"{analise['mtbf']['MTBF (dias)'].mean():.0f}" if not analise['mtbf'].empty else "-")
+
+    st.markdown("###### Tempo de Retorno por Fornecedor")
+    tempos_df = analise['tempos_fornecedor']
+    if tempos_df.empty:
+        st.info("Ainda não há ordens de serviço fechadas.")
+    else:
+        fig = px.bar(tempos_df, x='Fornecedor', y=['p50 (dias)', 'p90 (dias)'], barmode='group', labels={'value': 'Dias', 'variable': 'Percentil'})
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(tempos_df, hide_index=True, use_container_width=True)
+
+    st.markdown("###### O.S. em Andamento por Idade")
+    if envelhecimento_df.empty:
+        st.info("Nenhuma ordem de serviço em andamento no momento.")
+    else:
+        st.dataframe(envelhecimento_df, hide_index=True, use_container_width=True)
+
+    st.markdown("###### Custo de Reparos")
+    col_modelo, col_setor = st.columns(2)
+    col_modelo.dataframe(analise['custo_modelo'], hide_index=True, use_container_width=True)
+    col_setor.dataframe(analise['custo_setor'], hide_index=True, use_container_width=True)
+
+    st.markdown("###### Reincidência de Falhas por Modelo")
+    st.dataframe(analise['reincidencia'], hide_index=True, use_container_width=True)
+
+    st.markdown("###### Tempo Médio Entre Falhas por Aparelho")
+    st.caption("Aparelhos com pelo menos duas idas à manutenção, do menor para o maior MTBF.")
+    st.dataframe(analise['mtbf'], hide_index=True, use_container_width=True)
+
+perfil.finalizar_pagina()
@@ -1,244 +1,239 @@
 import streamlit as st
-import sqlite3
+import perfil
+import layout
 import pandas as pd
-from datetime import datetime, date
-import json
+import hashlib
 from auth import show_login_form
+from consultas import DIMENSOES_DANOS, relatorio_danos
+from importacao_tardia import importar_tardiamente
+from pesquisa import seletor_aparelho_em_uso, seletor_colaborador
+from movimentacoes import (
+    DESTINOS_DEVOLUCAO, ITENS_CHECKLIST_DEVOLUCAO, OPCOES_ESTADO_DEVOLUCAO,
+    aparelhos_em_posse, colaboradores_por_identificador, contas_gmail_dos_colaboradores, devolver_aparelhos
+)
+
+px = importar_tardiamente("plotly.express")
 
 # --- Autenticação ---
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.switch_page("app.py")
 
-# --- Configuração de Layout (Header, Footer e CSS) ---
-st.markdown("""
-<style>
-    /* Estilos da Logo */
-    .logo-text {
-        font-family: 'Courier New', monospace;
-        font-size: 28px;
-        font-weight: bold;
-        padding-top: 20px;
-    }
-    /* Cor para o tema claro (padrão) */
-    .logo-asset { color: #003366; }
-    .logo-flow { color: #E30613; }
-
-    /* Cor para o tema escuro (usando media query) */
-    @media (prefers-color-scheme: dark) {
-        .logo-asset { color: #FFFFFF; }
-        .logo-flow { color: #FF4B4B; }
-    }
-
-    /* Estilos para o footer na barra lateral */
-    .sidebar-footer {
-        text-align: center;
-        padding-top: 20px;
-        padding-bottom: 20px;
-    }
-    .sidebar-footer a {
-        margin-right: 15px;
-        text-decoration: none;
-    }
-    .sidebar-footer img {
-        width: 25px;
-        height: 25px;
-        filter: grayscale(1) opacity(0.5);
-        transition: filter 0.3s;
-    }
-    .sidebar-footer img:hover {
-        filter: grayscale(0) opacity(1);
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .sidebar-footer img {
-            filter: grayscale(1) opacity(0.6) invert(1);
-        }
-        .sidebar-footer img:hover {
-            filter: opacity(1) invert(1);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header (Logo no canto superior esquerdo) ---
-st.markdown(
-    """
-    <div class="logo-text">
-        <span class="logo-asset">ASSET</span><span class="logo-flow">FLOW</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+perfil.iniciar_pagina("9_Devolucoes")
 
-# --- Barra Lateral (Agora contém informações e o footer) ---
-with st.sidebar:
-    st.write(f"Bem-vindo, **{st.session_state['user_name']}**!")
-    st.write(f"Cargo: **{st.session_state['user_role']}**")
-    if st.button("Logout"):
-        from auth import logout
-        logout()
-
-    # Footer (Ícones agora no fundo da barra lateral)
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="sidebar-footer">
-            <a href="https://github.com/caufreitxs026" target="_blank" title="GitHub">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/github.svg">
-            </a>
-            <a href="https://linkedin.com/in/cauafreitas" target="_blank" title="LinkedIn">
-                <img src="https://raw.githubusercontent.com/FortAwesome/Font-Awesome/6.x/svgs/brands/linkedin.svg">
-            </a>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+# --- Layout (Header, Barra Lateral e CSS) ---
+layout.aplicar()
 
 # --- Funções do DB ---
-def get_db_connection():
-    conn = sqlite3.connect('inventario.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def carregar_aparelhos_em_uso():
-    """Carrega apenas os aparelhos que estão atualmente com status 'Em uso'."""
-    conn = get_db_connection()
-    aparelhos = conn.execute("""
-        SELECT
-            a.id as aparelho_id,
-            a.numero_serie,
-            mo.nome_modelo,
-            ma.nome_marca,
-            c.id as colaborador_id,
-            c.nome_completo as colaborador_nome
-        FROM aparelhos a
-        JOIN historico_movimentacoes h ON a.id = h.aparelho_id
-        JOIN (
-            SELECT aparelho_id, MAX(data_movimentacao) as max_data
-            FROM historico_movimentacoes
-            GROUP BY aparelho_id
-        ) hm ON h.aparelho_id = hm.aparelho_id AND h.data_movimentacao = hm.max_data
-        JOIN colaboradores c ON h.colaborador_id = c.id
-        JOIN status s ON a.status_id = s.id
-        JOIN modelos mo ON a.modelo_id = mo.id
-        JOIN marcas ma ON mo.marca_id = ma.id
-        WHERE s.nome_status = 'Em uso'
-        ORDER BY c.nome_completo
-    """).fetchall()
-    conn.close()
-    return aparelhos
-
 def processar_devolucao(aparelho_id, colaborador_id, checklist_data, destino_final, observacoes):
     """Processa a devolução, atualiza status e integra-se com a manutenção se necessário."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("BEGIN TRANSACTION;")
-
-        id_colaborador_final = None
-        localizacao = ""
-        
-        if destino_final == "Devolver ao Estoque":
-            novo_status_nome = "Em estoque"
-            localizacao = "Estoque Interno"
-        elif destino_final == "Enviar para Manutenção":
-            novo_status_nome = "Em manutenção"
-            id_colaborador_final = colaborador_id # Mantém o vínculo
-            localizacao = "Triagem Manutenção"
-        else: # Baixar/Inutilizar
-            novo_status_nome = "Baixado/Inutilizado"
-            localizacao = "Descarte"
-
-        novo_status_id = cursor.execute("SELECT id FROM status WHERE nome_status = ?", (novo_status_nome,)).fetchone()[0]
-        checklist_json = json.dumps(checklist_data)
-
-        # 1. Insere o novo registo no histórico com os detalhes da devolução
-        cursor.execute("""
-            INSERT INTO historico_movimentacoes 
-            (data_movimentacao, aparelho_id, colaborador_id, status_id, localizacao_atual, observacoes, checklist_devolucao)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (datetime.now(), aparelho_id, id_colaborador_final, novo_status_id, localizacao, observacoes, checklist_json))
-
-        # 2. Atualiza o status principal do aparelho
-        cursor.execute("UPDATE aparelhos SET status_id = ? WHERE id = ?", (novo_status_id, aparelho_id))
-
-        # 3. INTEGRAÇÃO: Se o destino for manutenção, abre uma O.S. preliminar
-        if destino_final == "Enviar para Manutenção":
-            cursor.execute("""
-                INSERT INTO manutencoes (aparelho_id, colaborador_id_no_envio, data_envio, defeito_reportado, status_manutencao)
-                VALUES (?, ?, ?, ?, ?)
-            """, (aparelho_id, colaborador_id, date.today(), observacoes, 'Em Andamento'))
-
-        conn.commit()
-        st.success(f"Devolução processada com sucesso! Novo status do aparelho: {novo_status_nome}.")
-        
-        if destino_final == "Enviar para Manutenção":
-            st.info("Uma Ordem de Serviço preliminar foi aberta. Aceda à página 'Manutenções' para adicionar o fornecedor e outros detalhes.")
-        
-        return True
-
+        resultado = devolver_aparelhos([{
+            'aparelho_id': aparelho_id, 'colaborador_id': colaborador_id, 'destino': destino_final,
+            'checklist': checklist_data, 'observacoes': observacoes,
+        }])
     except Exception as e:
-        conn.rollback()
         st.error(f"Ocorreu um erro ao processar a devolução: {e}")
         return False
-    finally:
-        conn.close()
+
+    if resultado['ignorados']:
+        st.warning("Este aparelho já não está 'Em uso' (foi devolvido noutra sessão).")
+        return False
+
+    st.success(f"Devolução processada com sucesso! Novo status do aparelho: {DESTINOS_DEVOLUCAO[destino_final][0]}.")
+    if destino_final == "Enviar para Manutenção":
+        st.info("Uma Ordem de Serviço preliminar foi aberta. Aceda à página 'Manutenções' para adicionar o fornecedor e outros detalhes.")
+    return True
+
+@st.cache_data(ttl=600)
+def carregar_relatorio_danos(agrupar_por, data_inicio, data_fim):
+    return relatorio_danos(agrupar_por, data_inicio, data_fim)
+
+def ler_identificadores(ficheiro):
+    """Lê a primeira coluna reconhecida (codigo, cpf ou nome_completo) de uma planilha .xlsx ou .csv."""
+    df = pd.read_csv(ficheiro, dtype=str) if ficheiro.name.lower().endswith('.csv') else pd.read_excel(ficheiro, dtype=str)
+    colunas = {coluna.strip().lower(): coluna for coluna in df.columns}
+    for nome in ('codigo', 'cpf', 'nome_completo'):
+        if nome in colunas:
+            return df[colunas[nome]].dropna().tolist()
+    return None
 
 # --- UI ---
 st.title("Fluxo de Devolução e Triagem")
 st.markdown("---")
 
-# Etapa 1: Selecionar o aparelho
-st.subheader("1. Selecione o Aparelho a Ser Devolvido")
-aparelhos_em_uso = carregar_aparelhos_em_uso()
-
-if not aparelhos_em_uso:
-    st.info("Não há aparelhos com o status 'Em uso' para serem devolvidos no momento.")
-else:
-    aparelhos_dict = {
-        f"{ap['colaborador_nome']} - {ap['nome_marca']} {ap['nome_modelo']} (S/N: {ap['numero_serie']})": ap
-        for ap in aparelhos_em_uso
-    }
-    
-    aparelho_selecionado_str = st.selectbox(
-        "Selecione o aparelho e colaborador:",
-        options=aparelhos_dict.keys(),
-        help="Clique na lista e comece a digitar para pesquisar."
-    )
-    
-    aparelho_selecionado_data = aparelhos_dict[aparelho_selecionado_str]
-    aparelho_id = aparelho_selecionado_data['aparelho_id']
-    colaborador_id = aparelho_selecionado_data['colaborador_id']
-
-    st.markdown("---")
-
-    # Etapa 2 e 3: Checklist e Decisão
-    st.subheader("2. Realize a Inspeção e Decida o Destino Final")
-    with st.form("form_devolucao"):
-        st.markdown("##### Checklist de Devolução")
-        
-        checklist_data = {}
-        itens_checklist = ["Tela", "Carcaça", "Bateria", "Botões", "USB", "Chip", "Carregador", "Cabo USB", "Capa", "Película"]
-        opcoes_estado = ["Bom", "Riscado", "Quebrado", "Faltando"]
-        
-        for item in itens_checklist:
-            col1, col2 = st.columns(2)
-            entregue = col1.checkbox(f"{item}", value=True, key=f"entregue_{item}")
-            estado = col2.selectbox(f"Estado de {item}", options=opcoes_estado, key=f"estado_{item}")
-            checklist_data[item] = {'entregue': entregue, 'estado': estado}
-        
-        observacoes = st.text_area("Observações Gerais da Devolução", placeholder="Ex: Tela com risco profundo no canto superior direito.")
-        
+tab_individual, tab_massa, tab_danos = st.tabs(["Devolução Individual", "Devolução em Massa (Desligamentos)", "Análise de Danos"])
+
+with tab_individual:
+    # Etapa 1: Selecionar o aparelho
+    st.subheader("1. Selecione o Aparelho a Ser Devolvido")
+    aparelho_selecionado_data = seletor_aparelho_em_uso("Selecione o aparelho e colaborador:", chave="dev_aparelho")
+
+    if not aparelho_selecionado_data:
+        st.info("Não há aparelhos com o status 'Em uso' que correspondam à pesquisa.")
+    else:
+        aparelho_id = aparelho_selecionado_data['aparelho_id']
+        colaborador_id = aparelho_selecionado_data['colaborador_id']
+
+        st.markdown("---")
+
+        # Etapa 2 e 3: Checklist e Decisão
+        st.subheader("2. Realize a Inspeção e Decida o Destino Final")
+        with st.form("form_devolucao"):
+            st.markdown("##### Checklist de Devolução")
+
+            checklist_data = {}
+            for item in ITENS_CHECKLIST_DEVOLUCAO:
+                col1, col2 = st.columns(2)
+                entregue = col1.checkbox(f"{item}", value=True, key=f"entregue_{item}")
+                estado = col2.selectbox(f"Estado de {item}", options=OPCOES_ESTADO_DEVOLUCAO, key=f"estado_{item}")
+                checklist_data[item] = {'entregue': entregue, 'estado': estado}
+
+            observacoes = st.text_area("Observações Gerais da Devolução", placeholder="Ex: Tela com risco profundo no canto superior direito.")
+
+            st.markdown("---")
+            st.markdown("##### Destino Final do Aparelho")
+            destino_final = st.radio(
+                "Selecione o destino do aparelho após a inspeção:",
+                list(DESTINOS_DEVOLUCAO.keys()),
+                horizontal=True
+            )
+
+            submitted = st.form_submit_button("Processar Devolução")
+            if submitted:
+                if processar_devolucao(aparelho_id, colaborador_id, checklist_data, destino_final, observacoes):
+                    perfil.reiniciar()
+
+with tab_massa:
+    st.info("Devolve de uma só vez todos os aparelhos 'Em uso' de um ou mais colaboradores (ex: desligamentos), numa única transação.")
+
+    if 'dev_massa_colaboradores' not in st.session_state:
+        st.session_state['dev_massa_colaboradores'] = {} # id -> nome
+
+    resultado_anterior = st.session_state.pop('dev_massa_resultado', None)
+    if resultado_anterior:
+        resumo = ", ".join(f"{quantidade} - {destino}" for destino, quantidade in resultado_anterior['por_destino'].items())
+        st.success(f"Devolução em massa concluída: {resumo or 'nenhum aparelho'}. Contas Gmail desvinculadas: {resultado_anterior['contas_desvinculadas']}.")
+        if resultado_anterior['ignorados']:
+            st.warning(f"{len(resultado_anterior['ignorados'])} aparelho(s) já não estavam 'Em uso' e foram ignorados.")
+
+    # Etapa 1: Colaboradores
+    st.subheader("1. Colaboradores a Desligar")
+    origem = st.radio("Como indicar os colaboradores:", ["Pesquisar", "Carregar planilha"], horizontal=True, key="dev_massa_origem")
+    if origem == "Pesquisar":
+        colaborador_escolhido = seletor_colaborador("Colaborador:", chave="dev_massa_colab", permitir_nenhum=False)
+        if st.button("Adicionar à lista", disabled=colaborador_escolhido is None):
+            # O rótulo da lista de seleção já traz o nome (e o código) do colaborador
+            st.session_state['dev_massa_colaboradores'][colaborador_escolhido] = st.session_state["dev_massa_colab"]
+    else:
+        ficheiro = st.file_uploader("Planilha (.xlsx ou .csv) com uma coluna 'codigo', 'cpf' ou 'nome_completo'", type=["xlsx", "csv"], key="dev_massa_ficheiro")
+        if ficheiro is not None and st.button("Adicionar colaboradores da planilha"):
+            identificadores = ler_identificadores(ficheiro)
+            if identificadores is None:
+                st.error("A planilha precisa de uma coluna 'codigo', 'cpf' ou 'nome_completo'.")
+            else:
+                por_identificador, nao_encontrados, ambiguos = colaboradores_por_identificador(identificadores)
+                colaboradores = {linha['id']: linha['nome_completo'] for linha in por_identificador.values()}
+                st.session_state['dev_massa_colaboradores'].update(colaboradores)
+                st.success(f"{len(colaboradores)} colaborador(es) adicionados à lista.")
+                if nao_encontrados:
+                    st.warning(f"Sem correspondência: {', '.join(nao_encontrados[:20])}{' ...' if len(nao_encontrados) > 20 else ''}")
+                if ambiguos:
+                    st.warning(f"Correspondem a mais de um colaborador (use o código ou o CPF): {', '.join(ambiguos[:20])}")
+
+    selecionados = st.session_state['dev_massa_colaboradores']
+    if not selecionados:
+        st.info("Adicione colaboradores para ver os aparelhos a devolver.")
+    else:
+        col_lista, col_limpar = st.columns([4, 1])
+        col_lista.write(f"**{len(selecionados)} colaborador(es):** " + "; ".join(selecionados.values()))
+        if col_limpar.button("Limpar lista"):
+            st.session_state['dev_massa_colaboradores'] = {}
+            perfil.reiniciar()
+
+        with perfil.secao("Aparelhos em posse"):
+            aparelhos = aparelhos_em_posse(list(selecionados.keys()))
+            contas = contas_gmail_dos_colaboradores(list(selecionados.keys()))
+
         st.markdown("---")
-        st.markdown("##### Destino Final do Aparelho")
-        destino_final = st.radio(
-            "Selecione o destino do aparelho após a inspeção:",
-            ["Devolver ao Estoque", "Enviar para Manutenção", "Baixar/Inutilizar"],
-            horizontal=True
-        )
-
-        submitted = st.form_submit_button("Processar Devolução")
-        if submitted:
-            if processar_devolucao(aparelho_id, colaborador_id, checklist_data, destino_final, observacoes):
-                st.rerun()
+        st.subheader("2. Inspeção e Destino")
+        if not aparelhos:
+            st.info("Nenhum destes colaboradores tem aparelhos 'Em uso'.")
+
+        # Valores comuns, que preenchem a tabela; cada linha pode depois ser ajustada
+        col_destino, col_estado = st.columns(2)
+        destino_comum = col_destino.selectbox("Destino comum:", list(DESTINOS_DEVOLUCAO.keys()), key="dev_massa_destino")
+        estado_comum = col_estado.selectbox("Estado comum dos itens do checklist:", OPCOES_ESTADO_DEVOLUCAO, key="dev_massa_estado")
+        observacoes_comuns = st.text_input("Observações comuns:", value="Devolução por desligamento.", key="dev_massa_obs")
+
+        tabela = pd.DataFrame([{
+            'aparelho_id': ap['aparelho_id'],
+            'colaborador_id': ap['colaborador_id'],
+            'Colaborador': ap['colaborador_nome'],
+            'Aparelho': f"{ap['nome_marca']} {ap['nome_modelo']}",
+            'N/S': ap['numero_serie'],
+            'Destino': destino_comum,
+            **{item: estado_comum for item in ITENS_CHECKLIST_DEVOLUCAO},
+            'Observações': observacoes_comuns,
+        } for ap in aparelhos])
+
+        if aparelhos:
+            # O editor guarda as edições por linha enquanto a chave não muda: a chave inclui os
+            # aparelhos da lista (pela ordem das linhas), para que as edições não passem para outros aparelhos
+            aparelhos_lista = hashlib.sha1(",".join(str(i) for i in tabela['aparelho_id']).encode()).hexdigest()[:12]
+            editado = st.data_editor(
+                tabela,
+                key=f"dev_massa_tabela_{destino_comum}_{estado_comum}_{aparelhos_lista}",
+                hide_index=True,
+                use_container_width=True,
+                disabled=['Colaborador', 'Aparelho', 'N/S'],
+                column_order=['Colaborador', 'Aparelho', 'N/S', 'Destino', *ITENS_CHECKLIST_DEVOLUCAO, 'Observações'],
+                column_config={
+                    'Destino': st.column_config.SelectboxColumn(options=list(DESTINOS_DEVOLUCAO.keys()), required=True),
+                    **{item: st.column_config.SelectboxColumn(options=OPCOES_ESTADO_DEVOLUCAO, required=True) for item in ITENS_CHECKLIST_DEVOLUCAO},
+                },
+            )
+
+        desvincular = st.checkbox(f"Desvincular as {len(contas)} conta(s) Gmail destes colaboradores", value=bool(contas), disabled=not contas)
+        if contas:
+            st.caption(", ".join(conta['email'] for conta in contas))
+
+        if st.button(f"Processar {len(aparelhos)} devolução(ões)", type="primary", disabled=not aparelhos and not (contas and desvincular)):
+            devolucoes = [{
+                'aparelho_id': int(linha['aparelho_id']),
+                'colaborador_id': int(linha['colaborador_id']),
+                'destino': linha['Destino'],
+                'checklist': {item: {'entregue': linha[item] != "Faltando", 'estado': linha[item]} for item in ITENS_CHECKLIST_DEVOLUCAO},
+                'observacoes': linha['Observações'],
+            } for linha in editado.to_dict('records')] if aparelhos else []
+            try:
+                with st.spinner("A processar as devoluções..."):
+                    resultado = devolver_aparelhos(devolucoes, desvincular_contas_de=list(selecionados.keys()) if desvincular else ())
+            except Exception as e:
+                st.error(f"Nenhuma devolução foi gravada. Ocorreu um erro: {e}")
+            else:
+                st.session_state['dev_massa_resultado'] = resultado
+                st.session_state['dev_massa_colaboradores'] = {}
+                perfil.reiniciar()
+
+with tab_danos:
+    st.info("Taxa de danos nas devoluções, a partir dos itens do checklist. Conta como dano um item 'Quebrado', 'Faltando' ou não entregue.")
+    col_dim, col_inicio, col_fim = st.columns(3)
+    agrupar_por = col_dim.selectbox("Agrupar por:", list(DIMENSOES_DANOS.keys()), format_func=lambda d: DIMENSOES_DANOS[d][1], key="danos_dimensao")
+    data_inicio = col_inicio.date_input("De:", value=None, key="danos_inicio")
+    data_fim = col_fim.date_input("Até:", value=None, key="danos_fim")
+
+    with perfil.secao("Relatório de danos"):
+        danos_df = carregar_relatorio_danos(agrupar_por, data_inicio, data_fim)
+
+    if danos_df.empty:
+        st.warning("Não há devoluções com checklist no período selecionado.")
+    else:
+        coluna = DIMENSOES_DANOS[agrupar_por][1]
+        fig = px.bar(danos_df.head(20), x=coluna, y='taxa_dano', text_auto=True, labels={'taxa_dano': 'Taxa de dano (%)'}, hover_data=['devolucoes', 'quebrados', 'faltando'])
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(danos_df.rename(columns={
+            'itens_inspecionados': 'Itens Inspecionados', 'devolucoes': 'Devoluções', 'riscados': 'Riscados',
+            'quebrados': 'Quebrados', 'faltando': 'Faltando', 'taxa_dano': 'Taxa de Dano (%)',
+        }), hide_index=True, use_container_width=True)
+
+perfil.finalizar_pagina()
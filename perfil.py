@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import instrumentacao
+from importacao_tardia import importar_tardiamente
+
+np = importar_tardiamente("numpy") # Só é usado no resumo da página de Desempenho
+st = importar_tardiamente("streamlit") # Só em parar() e reiniciar()
+
+# --- Perfil de Execução das Páginas ---
+# O Streamlit executa o script da página inteiro a cada interação. Quando o perfil
+# está ativo, cada execução é medida (total, secções marcadas com 'secao' e tempo
+# gasto em SQL) e as últimas JANELA amostras de cada página/secção ficam em memória
+# para o painel de desempenho (pages/13_Desempenho.py).
+#
+# Uso numa página:
+#     perfil.iniciar_pagina("3_Aparelhos")
+#     with perfil.secao("Inventário"):
+#         ...
+#     perfil.finalizar_pagina()
+#
+# st.stop() e st.rerun() interrompem o script antes de finalizar_pagina; as páginas
+# usam perfil.parar() e perfil.reiniciar(), que registam a execução antes de sair.
+
+ATIVO = os.environ.get('ASSETFLOW_PERFIL', '0') == '1'
+JANELA = int(os.environ.get('ASSETFLOW_PERFIL_JANELA', 200))
+
+SECAO_TOTAL = 'Total da execução'
+SECAO_SQL = 'SQL (todas as consultas)'
+
+# Cada sessão do Streamlit corre o seu script numa thread própria
+_local = threading.local()
+_amostras = defaultdict(lambda: deque(maxlen=JANELA)) # (pagina, secao) -> durações em ms
+_lock = threading.Lock()
+
+def ativar(ativo=True):
+    """Liga ou desliga o perfil para todas as sessões deste processo."""
+    global ATIVO
+    ATIVO = ativo
+
+def iniciar_pagina(pagina):
+    """Marca o início de uma execução da página (no topo do script)."""
+    _local.execucao = {
+        'pagina': pagina,
+        'inicio': time.perf_counter(),
+        'secoes': defaultdict(float),
+    } if ATIVO else None
+
+@contextmanager
+def secao(nome):
+    """Mede um bloco da página; sem perfil ativo não faz nada."""
+    execucao = getattr(_local, 'execucao', None)
+    if execucao is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        execucao['secoes'][nome] += (time.perf_counter() - inicio) * 1000
+
+def finalizar_pagina():
+    """Guarda as medições da execução atual (no fim do script)."""
+    execucao = getattr(_local, 'execucao', None)
+    _local.execucao = None
+    if execucao is None:
+        return
+    total = (time.perf_counter() - execucao['inicio']) * 1000
+    pagina = execucao['pagina']
+    with _lock:
+        _amostras[(pagina, SECAO_TOTAL)].append(total)
+        for nome, duracao in execucao['secoes'].items():
+            _amostras[(pagina, nome)].append(duracao)
+
+def parar():
+    """Regista a execução atual e termina o script (st.stop)."""
+    finalizar_pagina()
+    st.stop()
+
+def reiniciar():
+    """Regista a execução atual e volta a executar o script (st.rerun)."""
+    finalizar_pagina()
+    st.rerun()
+
+def _somar_consulta(registo):
+    """Observador de instrumentacao: acumula o tempo de SQL da execução atual."""
+    execucao = getattr(_local, 'execucao', None)
+    if execucao is not None:
+        execucao['secoes'][SECAO_SQL] += registo['duracao_ms']
+
+instrumentacao.observadores_consultas.append(_somar_consulta)
+
+def resumo():
+    """Estatísticas por página e secção sobre a janela de amostras (p50, p95, máximo)."""
+    with _lock:
+        copia = {chave: list(valores) for chave, valores in _amostras.items()}
+    linhas = []
+    for (pagina, nome), valores in sorted(copia.items()):
+        amostras = np.array(valores)
+        p50, p95 = np.percentile(amostras, [50, 95])
+        linhas.append({
+            'Página': pagina,
+            'Secção': nome,
+            'Execuções': len(valores),
+            'p50 (ms)': round(float(p50), 1),
+            'p95 (ms)': round(float(p95), 1),
+            'Máx (ms)': round(float(amostras.max()), 1),
+        })
+    return linhas
+
+def limpar():
+    """Descarta todas as amostras."""
+    with _lock:
+        _amostras.clear()
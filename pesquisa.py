@@ -0,0 +1,263 @@
+import streamlit as st
+from database import get_db_connection
+from fornecedores import chave_fornecedor
+
+# Número máximo de opções enviadas ao navegador por pesquisa
+LIMITE_RESULTADOS = 20
+
+# --- Consultas de Pesquisa por Prefixo ---
+# Todas as consultas usam LIKE 'termo%' sobre colunas com índice COLLATE NOCASE
+# (ver setup_database.criar_indices) e terminam em LIMIT, para que o custo dependa
+# apenas do número de resultados e não do tamanho das tabelas.
+
+def _padrao_prefixo(termo):
+    """Converte o texto digitado num padrão LIKE de prefixo, escapando os curingas."""
+    termo = (termo or "").strip()
+    termo = termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{termo}%"
+
+def pesquisar_aparelhos(termo, status_excluidos=("Baixado/Inutilizado",), limite=LIMITE_RESULTADOS):
+    """Pesquisa aparelhos pelo início do N/S ou do IMEI 1, incluindo o último colaborador."""
+    padrao = _padrao_prefixo(termo)
+    marcadores = ", ".join("?" for _ in status_excluidos) or "NULL"
+    filtro_status = f"status_id NOT IN (SELECT id FROM status WHERE nome_status IN ({marcadores}))"
+
+    candidatos = f"""
+        SELECT id FROM (
+            SELECT id FROM aparelhos
+            WHERE numero_serie LIKE ? ESCAPE '\\' AND {filtro_status}
+            ORDER BY numero_serie COLLATE NOCASE LIMIT ?
+        )
+    """
+    params = [padrao, *status_excluidos, limite]
+    if (termo or "").strip():
+        candidatos += f"""
+            UNION
+            SELECT id FROM (
+                SELECT id FROM aparelhos
+                WHERE imei1 LIKE ? ESCAPE '\\' AND {filtro_status}
+                ORDER BY imei1 COLLATE NOCASE LIMIT ?
+            )
+        """
+        params += [padrao, *status_excluidos, limite]
+
+    conn = get_db_connection()
+    aparelhos = conn.execute(f"""
+        SELECT
+            a.id, a.numero_serie, a.imei1, mo.nome_modelo, ma.nome_marca,
+            (SELECT c.nome_completo
+             FROM historico_movimentacoes h
+             LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+             WHERE h.aparelho_id = a.id
+             ORDER BY h.data_movimentacao DESC, h.id DESC LIMIT 1) as ultimo_colaborador
+        FROM aparelhos a
+        JOIN modelos mo ON a.modelo_id = mo.id
+        JOIN marcas ma ON mo.marca_id = ma.id
+        WHERE a.id IN ({candidatos})
+        ORDER BY a.numero_serie COLLATE NOCASE
+        LIMIT ?
+    """, (*params, limite)).fetchall()
+    conn.close()
+    return aparelhos
+
+def pesquisar_colaboradores(termo, limite=LIMITE_RESULTADOS):
+    """Pesquisa colaboradores pelo início do nome ou do código."""
+    padrao = _padrao_prefixo(termo)
+    conn = get_db_connection()
+    colaboradores = conn.execute("""
+        SELECT id, nome_completo, codigo FROM colaboradores
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id FROM colaboradores WHERE nome_completo LIKE ? ESCAPE '\\'
+                ORDER BY nome_completo COLLATE NOCASE LIMIT ?
+            )
+            UNION
+            SELECT id FROM (
+                SELECT id FROM colaboradores WHERE codigo LIKE ? ESCAPE '\\'
+                ORDER BY codigo COLLATE NOCASE LIMIT ?
+            )
+        )
+        ORDER BY nome_completo COLLATE NOCASE
+        LIMIT ?
+    """, (padrao, limite, padrao, limite, limite)).fetchall()
+    conn.close()
+    return colaboradores
+
+def pesquisar_aparelhos_em_uso(termo, limite=LIMITE_RESULTADOS):
+    """
+    Pesquisa aparelhos 'Em uso' pelo início do N/S ou do nome do colaborador que
+    os detém, devolvendo o colaborador da última movimentação de cada aparelho.
+    """
+    padrao = _padrao_prefixo(termo)
+    conn = get_db_connection()
+    aparelhos = conn.execute("""
+        WITH em_uso AS (SELECT id FROM status WHERE nome_status = 'Em uso'),
+        candidatos AS (
+            SELECT id FROM (
+                SELECT a.id FROM aparelhos a
+                WHERE a.numero_serie LIKE ? ESCAPE '\\' AND a.status_id = (SELECT id FROM em_uso)
+                ORDER BY a.numero_serie COLLATE NOCASE LIMIT ?
+            )
+            UNION
+            SELECT aparelho_id FROM (
+                SELECT h.aparelho_id
+                FROM colaboradores c
+                JOIN historico_movimentacoes h ON h.colaborador_id = c.id
+                JOIN aparelhos a ON a.id = h.aparelho_id AND a.status_id = (SELECT id FROM em_uso)
+                WHERE c.nome_completo LIKE ? ESCAPE '\\'
+                  AND h.id = (SELECT id FROM historico_movimentacoes
+                              WHERE aparelho_id = h.aparelho_id
+                              ORDER BY data_movimentacao DESC, id DESC LIMIT 1)
+                ORDER BY c.nome_completo COLLATE NOCASE LIMIT ?
+            )
+        )
+        SELECT
+            a.id as aparelho_id, a.numero_serie, mo.nome_modelo, ma.nome_marca,
+            c.id as colaborador_id, c.nome_completo as colaborador_nome
+        FROM candidatos
+        JOIN aparelhos a ON a.id = candidatos.id
+        JOIN historico_movimentacoes h ON h.id = (
+            SELECT id FROM historico_movimentacoes
+            WHERE aparelho_id = a.id
+            ORDER BY data_movimentacao DESC, id DESC LIMIT 1
+        )
+        JOIN colaboradores c ON h.colaborador_id = c.id
+        JOIN modelos mo ON a.modelo_id = mo.id
+        JOIN marcas ma ON mo.marca_id = ma.id
+        ORDER BY c.nome_completo COLLATE NOCASE, a.numero_serie COLLATE NOCASE
+        LIMIT ?
+    """, (padrao, limite, padrao, limite, limite)).fetchall()
+    conn.close()
+    return aparelhos
+
+def pesquisar_fornecedores(termo, limite=LIMITE_RESULTADOS):
+    """Pesquisa fornecedores pelo início do nome ou da chave normalizada (sem acentos nem maiúsculas)."""
+    padrao = _padrao_prefixo(termo)
+    padrao_chave = _padrao_prefixo(chave_fornecedor(termo))
+    conn = get_db_connection()
+    fornecedores = conn.execute("""
+        SELECT id, nome FROM fornecedores
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id FROM fornecedores WHERE nome LIKE ? ESCAPE '\\'
+                ORDER BY nome COLLATE NOCASE LIMIT ?
+            )
+            UNION
+            SELECT id FROM (
+                SELECT id FROM fornecedores WHERE chave LIKE ? ESCAPE '\\'
+                ORDER BY chave COLLATE NOCASE LIMIT ?
+            )
+        )
+        ORDER BY nome COLLATE NOCASE
+        LIMIT ?
+    """, (padrao, limite, padrao_chave, limite, limite)).fetchall()
+    conn.close()
+    return fornecedores
+
+def obter_colaborador_id_por_codigo(codigo):
+    """Devolve o id do único colaborador com o código indicado (sem distinguir maiúsculas) ou None."""
+    if not codigo or not str(codigo).strip():
+        return None
+    conn = get_db_connection()
+    colaboradores = conn.execute(
+        "SELECT id FROM colaboradores WHERE codigo = ? COLLATE NOCASE LIMIT 2",
+        (str(codigo).strip(),)
+    ).fetchall()
+    conn.close()
+    return colaboradores[0]['id'] if len(colaboradores) == 1 else None
+
+# --- Componentes de Interface (Typeahead) ---
+
+def rotulo_aparelho(ap, mostrar_colaborador=False):
+    """Formata a descrição de um aparelho para as listas de seleção."""
+    rotulo = f"{ap['nome_marca']} {ap['nome_modelo']} (S/N: {ap['numero_serie']})"
+    if mostrar_colaborador:
+        rotulo += f" - [Com: {ap['ultimo_colaborador'] or 'Ninguém'}]"
+    return rotulo
+
+def seletor_aparelho(rotulo, chave, status_excluidos=("Baixado/Inutilizado",), mostrar_colaborador=False):
+    """
+    Campo de pesquisa + lista de seleção de aparelhos. Apenas os primeiros
+    resultados que correspondem ao texto digitado são enviados ao navegador.
+    Devolve o id do aparelho selecionado ou None.
+    """
+    termo = st.text_input(
+        "Pesquisar aparelho",
+        key=f"{chave}_termo",
+        placeholder="Digite o início do N/S ou do IMEI e pressione Enter"
+    )
+    aparelhos = pesquisar_aparelhos(termo, status_excluidos=status_excluidos)
+    opcoes = {rotulo_aparelho(ap, mostrar_colaborador): ap['id'] for ap in aparelhos}
+    selecionado = st.selectbox(
+        rotulo,
+        options=list(opcoes.keys()),
+        key=chave,
+        help=f"São mostrados até {LIMITE_RESULTADOS} resultados. Refine a pesquisa para encontrar outros aparelhos."
+    )
+    return opcoes.get(selecionado)
+
+def seletor_colaborador(rotulo, chave, permitir_nenhum=True):
+    """
+    Campo de pesquisa + lista de seleção de colaboradores.
+    Devolve o id do colaborador selecionado ou None.
+    """
+    termo = st.text_input(
+        "Pesquisar colaborador",
+        key=f"{chave}_termo",
+        placeholder="Digite o início do nome ou do código e pressione Enter"
+    )
+    colaboradores = pesquisar_colaboradores(termo)
+    opcoes = {"Nenhum": None} if permitir_nenhum else {}
+    opcoes.update({f"{c['nome_completo']} ({c['codigo']})" if c['codigo'] else c['nome_completo']: c['id'] for c in colaboradores})
+    selecionado = st.selectbox(
+        rotulo,
+        options=list(opcoes.keys()),
+        key=chave,
+        help=f"São mostrados até {LIMITE_RESULTADOS} resultados. Refine a pesquisa para encontrar outros colaboradores."
+    )
+    return opcoes.get(selecionado)
+
+def seletor_fornecedor(rotulo, chave):
+    """
+    Campo de pesquisa + lista de seleção de fornecedores. O texto digitado também
+    aparece como opção, para registar um fornecedor novo (que é associado a um
+    existente se for uma variante do mesmo nome, ver fornecedores.py).
+    Devolve o nome escolhido ou None.
+    """
+    termo = st.text_input(
+        "Pesquisar fornecedor",
+        key=f"{chave}_termo",
+        placeholder="Digite o início do nome e pressione Enter"
+    ).strip()
+    opcoes = [f['nome'] for f in pesquisar_fornecedores(termo)]
+    if termo and termo.casefold() not in (nome.casefold() for nome in opcoes):
+        opcoes.append(termo)
+    return st.selectbox(
+        rotulo,
+        options=opcoes,
+        key=chave,
+        help=f"São mostrados até {LIMITE_RESULTADOS} resultados. Se o fornecedor não existir, digite o nome completo na pesquisa."
+    )
+
+def seletor_aparelho_em_uso(rotulo, chave):
+    """
+    Campo de pesquisa + lista de seleção de aparelhos 'Em uso' e respetivo colaborador.
+    Devolve a linha selecionada (aparelho_id, colaborador_id, ...) ou None.
+    """
+    termo = st.text_input(
+        "Pesquisar por N/S ou nome do colaborador",
+        key=f"{chave}_termo",
+        placeholder="Digite o início do N/S ou do nome e pressione Enter"
+    )
+    aparelhos = pesquisar_aparelhos_em_uso(termo)
+    opcoes = {
+        f"{ap['colaborador_nome']} - {ap['nome_marca']} {ap['nome_modelo']} (S/N: {ap['numero_serie']})": ap
+        for ap in aparelhos
+    }
+    selecionado = st.selectbox(
+        rotulo,
+        options=list(opcoes.keys()),
+        key=chave,
+        help=f"São mostrados até {LIMITE_RESULTADOS} resultados. Refine a pesquisa para encontrar outros aparelhos."
+    )
+    return opcoes.get(selecionado)
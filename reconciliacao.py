@@ -0,0 +1,195 @@
+import csv
+import io
+import os
+import time
+
+import pandas as pd
+
+import database
+
+# --- Inventário Físico (Conciliação da Contagem) ---
+# A contagem trimestral é uma lista de números de série ou IMEIs lidos com o
+# scanner (opcionalmente com a localização e o responsável encontrados). A
+# conciliação junta essa lista com o estado atual de todos os aparelhos numa única
+# junção por hash do pandas (merge sobre os códigos normalizados), em vez de
+# procurar linha a linha, e devolve:
+#   em_falta         -> aparelhos que deviam estar na contagem e não foram lidos
+#   nao_cadastrados  -> códigos lidos que não são N/S nem IMEI de nenhum aparelho
+#   divergencias     -> aparelhos lidos cujo status, localização ou responsável
+#                       no sistema não batem com a contagem
+#   duplicados       -> aparelhos lidos mais de uma vez (pelo N/S e pelo IMEI, p.ex.)
+#
+# O responsável e a localização atuais vêm do intervalo aberto (fim IS NULL) de
+# 'intervalos_status', que aponta para a última movimentação do aparelho.
+
+# Aparelhos nestes status não estão fisicamente na empresa e não se esperam na contagem
+STATUS_FORA_DA_CONTAGEM = ('Em manutenção', 'Baixado/Inutilizado')
+
+# Cabeçalhos aceites no ficheiro da contagem (o primeiro encontrado é usado)
+COLUNAS_CODIGO = ('codigo', 'numero_serie', 'serie', 'imei', 'n/s')
+COLUNAS_LOCALIZACAO = ('localizacao', 'local')
+COLUNAS_COLABORADOR = ('colaborador', 'responsavel')
+
+CONSULTA_ESTADO_ATUAL = """
+    SELECT a.id AS aparelho_id, a.numero_serie, a.imei1, a.imei2,
+           ma.nome_marca || ' - ' || mo.nome_modelo AS modelo, s.nome_status,
+           c.nome_completo AS responsavel, c.codigo AS codigo_responsavel, h.localizacao_atual
+    FROM aparelhos a
+    JOIN status s ON a.status_id = s.id
+    LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    LEFT JOIN marcas ma ON mo.marca_id = ma.id
+    LEFT JOIN intervalos_status i ON i.aparelho_id = a.id AND i.fim IS NULL
+    LEFT JOIN historico_movimentacoes h ON i.movimentacao_id = h.id
+    LEFT JOIN colaboradores c ON i.colaborador_id = c.id
+"""
+
+def _normalizar(serie):
+    """Códigos e textos comparáveis: sem espaços nas pontas e em maiúsculas ('' para vazio)."""
+    return serie.fillna('').astype(str).str.strip().str.upper()
+
+def _coluna(df, nomes):
+    return next((coluna for coluna in df.columns if coluna in nomes), None)
+
+def _ler_tabela(arquivo, texto, extensao, cabecalho):
+    if extensao == '.txt':
+        return pd.DataFrame({'codigo': texto.splitlines()})
+    if extensao == '.csv':
+        try:
+            separador = csv.Sniffer().sniff(texto[:4096], delimiters=',;\t').delimiter
+        except csv.Error: # Uma só coluna
+            separador = ','
+        return pd.read_csv(io.StringIO(texto), dtype=str, sep=separador, header=cabecalho)
+    arquivo.seek(0)
+    return pd.read_excel(arquivo, dtype=str, header=cabecalho)
+
+def ler_contagem(arquivo, nome_arquivo):
+    """
+    Lê o ficheiro da contagem (.xlsx, .csv ou .txt com um código por linha) para um
+    DataFrame com 'linha', 'codigo' e, se vierem no ficheiro, 'localizacao' e 'colaborador'.
+    Sem cabeçalho reconhecido (exportação direta do scanner), a primeira linha já é
+    um código e a primeira coluna é a dos códigos.
+    """
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    texto = None
+    if extensao in ('.txt', '.csv'):
+        conteudo = arquivo.read()
+        texto = conteudo.decode('utf-8-sig') if isinstance(conteudo, bytes) else conteudo
+    df = _ler_tabela(arquivo, texto, extensao, 0)
+    df.columns = [str(coluna).strip().lower() for coluna in df.columns]
+    tem_cabecalho = extensao != '.txt' and any(coluna in COLUNAS_CODIGO + COLUNAS_LOCALIZACAO + COLUNAS_COLABORADOR for coluna in df.columns)
+    if extensao != '.txt' and not tem_cabecalho:
+        df = _ler_tabela(arquivo, texto, extensao, None)
+
+    primeira = 2 if tem_cabecalho else 1 # Número da linha no ficheiro
+    contagem = pd.DataFrame({'linha': range(primeira, primeira + len(df))})
+    contagem['codigo'] = df[(_coluna(df, COLUNAS_CODIGO) if tem_cabecalho else None) or df.columns[0]].to_numpy()
+    if tem_cabecalho:
+        for destino, nomes in (('localizacao', COLUNAS_LOCALIZACAO), ('colaborador', COLUNAS_COLABORADOR)):
+            origem = _coluna(df, nomes)
+            if origem:
+                contagem[destino] = df[origem].to_numpy()
+    contagem['codigo'] = _normalizar(contagem['codigo'])
+    return contagem[contagem['codigo'] != ''].reset_index(drop=True)
+
+def carregar_estado_atual(conn):
+    """Todos os aparelhos com o status, o responsável e a localização atuais."""
+    return pd.read_sql_query(CONSULTA_ESTADO_ATUAL, conn)
+
+def _codigos(estado):
+    """Tabela de junção código -> aparelho, com o N/S e os dois IMEIs de cada aparelho."""
+    codigos = pd.concat(
+        [pd.DataFrame({'codigo': _normalizar(estado[coluna]), 'aparelho_id': estado['aparelho_id']}) for coluna in ('numero_serie', 'imei1', 'imei2')],
+        ignore_index=True,
+    )
+    return codigos[codigos['codigo'] != ''].drop_duplicates('codigo')
+
+def conciliar(contagem, estado):
+    """Compara a contagem (de ler_contagem) com o estado atual (de carregar_estado_atual)."""
+    lidos = contagem.merge(_codigos(estado), on='codigo', how='left')
+
+    nao_cadastrados = lidos[lidos['aparelho_id'].isna()].drop(columns='aparelho_id')
+    lidos = lidos.dropna(subset=['aparelho_id']).astype({'aparelho_id': estado['aparelho_id'].dtype})
+
+    repetidos = lidos[lidos['aparelho_id'].duplicated(keep=False)]
+    vezes = repetidos.groupby('aparelho_id')['linha'].agg(['size', lambda linhas: ', '.join(map(str, linhas))])
+    vezes.columns = ['leituras', 'linhas']
+    duplicados = estado.merge(vezes, left_on='aparelho_id', right_index=True)
+
+    encontrados = estado.merge(lidos.drop_duplicates('aparelho_id'), on='aparelho_id')
+    esperados = ~estado['nome_status'].isin(STATUS_FORA_DA_CONTAGEM)
+    em_falta = estado[esperados & ~estado['aparelho_id'].isin(encontrados['aparelho_id'])]
+
+    # Motivos de divergência, avaliados para todos os aparelhos encontrados de uma vez
+    motivos = pd.DataFrame(index=encontrados.index)
+    motivos['status'] = encontrados['nome_status'].isin(STATUS_FORA_DA_CONTAGEM)
+    if 'localizacao' in encontrados:
+        contada = _normalizar(encontrados['localizacao'])
+        motivos['localização'] = (contada != '') & (contada != _normalizar(encontrados['localizacao_atual']))
+    if 'colaborador' in encontrados:
+        contado = _normalizar(encontrados['colaborador'])
+        motivos['responsável'] = (contado != '') & (contado != _normalizar(encontrados['responsavel'])) & (contado != _normalizar(encontrados['codigo_responsavel']))
+    divergentes = motivos.any(axis=1)
+    divergencias = encontrados[divergentes].copy()
+    texto = pd.Series('', index=divergencias.index)
+    for motivo in motivos.columns:
+        texto += motivos.loc[divergentes, motivo].map({True: f"{motivo}, ", False: ''})
+    divergencias['motivo'] = texto.str.rstrip(', ').str.capitalize()
+
+    return {
+        'lidos': len(contagem),
+        'encontrados': len(encontrados),
+        'esperados': int(esperados.sum()),
+        'em_falta': em_falta.reset_index(drop=True),
+        'nao_cadastrados': nao_cadastrados.reset_index(drop=True),
+        'divergencias': divergencias.reset_index(drop=True),
+        'duplicados': duplicados.reset_index(drop=True),
+    }
+
+def conciliar_arquivo(arquivo, nome_arquivo):
+    """Lê a contagem, carrega o estado atual do banco principal e concilia. Inclui a duração em 'segundos'."""
+    inicio = time.perf_counter()
+    contagem = ler_contagem(arquivo, nome_arquivo)
+    conn = database.get_db_connection()
+    try:
+        estado = carregar_estado_atual(conn)
+    finally:
+        conn.close()
+    resultado = conciliar(contagem, estado)
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+# --- Relatório ---
+COLUNAS_RELATORIO = {
+    'linha': 'Linha', 'codigo': 'Código Lido', 'numero_serie': 'N/S', 'imei1': 'IMEI 1', 'imei2': 'IMEI 2',
+    'modelo': 'Modelo', 'nome_status': 'Status no Sistema', 'responsavel': 'Responsável no Sistema',
+    'localizacao_atual': 'Localização no Sistema', 'colaborador': 'Responsável na Contagem',
+    'localizacao': 'Localização na Contagem', 'motivo': 'Divergência', 'leituras': 'Leituras', 'linhas': 'Linhas',
+}
+
+def _para_relatorio(df, colunas):
+    return df[[coluna for coluna in colunas if coluna in df]].rename(columns=COLUNAS_RELATORIO)
+
+def relatorio(resultado):
+    """Folhas do relatório (nome -> DataFrame com cabeçalhos legíveis), começando pelo resumo."""
+    estado = ['numero_serie', 'imei1', 'imei2', 'modelo', 'nome_status', 'responsavel', 'localizacao_atual']
+    resumo = pd.DataFrame({
+        'Indicador': ["Códigos lidos", "Aparelhos encontrados", "Aparelhos esperados", "Em falta",
+                      "Não cadastrados", "Divergências", "Lidos mais de uma vez"],
+        'Quantidade': [resultado['lidos'], resultado['encontrados'], resultado['esperados'], len(resultado['em_falta']),
+                       len(resultado['nao_cadastrados']), len(resultado['divergencias']), len(resultado['duplicados'])],
+    })
+    return {
+        'Resumo': resumo,
+        'Em Falta': _para_relatorio(resultado['em_falta'], estado),
+        'Não Cadastrados': _para_relatorio(resultado['nao_cadastrados'], ['linha', 'codigo', 'colaborador', 'localizacao']),
+        'Divergências': _para_relatorio(resultado['divergencias'], ['linha', 'codigo', 'motivo', *estado, 'colaborador', 'localizacao']),
+        'Duplicados': _para_relatorio(resultado['duplicados'], ['leituras', 'linhas', *estado]),
+    }
+
+def relatorio_excel(resultado):
+    """Relatório da conciliação em .xlsx, uma folha por lista."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for nome, df in relatorio(resultado).items():
+            df.to_excel(writer, index=False, sheet_name=nome)
+    return output.getvalue()
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import database
+import metricas
+from instrumentacao import ConexaoInstrumentada
+
+# --- Réplica de Leitura para Relatórios ---
+# O dashboard, o histórico de movimentações e o inventário completo fazem leituras
+# longas que, no mesmo ficheiro, atrasam as escritas (registo de movimentações,
+# devoluções). Com a réplica ativa, uma thread por processo copia o banco principal
+# para um ficheiro à parte com a API de backup online do SQLite, sempre que o log
+# de alterações (log_alteracoes) avança, e essas consultas passam a ler a cópia.
+#
+# A cópia é feita em passos de PAGINAS_POR_PASSO páginas para não segurar o banco
+# principal, escrita num ficheiro temporário e trocada de forma atómica
+# (os.replace); as conexões já abertas continuam a ler a versão anterior.
+#
+# Variáveis de ambiente:
+#   ASSETFLOW_REPLICA                 -> caminho do ficheiro da réplica (sem ele, tudo lê do banco principal)
+#   ASSETFLOW_REPLICA_INTERVALO       -> segundos entre verificações do log de alterações (padrão 10)
+#   ASSETFLOW_REPLICA_ATRASO_MAXIMO   -> acima deste atraso (s), as leituras voltam ao banco principal (padrão 300)
+
+CAMINHO = os.environ.get('ASSETFLOW_REPLICA')
+INTERVALO = float(os.environ.get('ASSETFLOW_REPLICA_INTERVALO', 10))
+ATRASO_MAXIMO = float(os.environ.get('ASSETFLOW_REPLICA_ATRASO_MAXIMO', 300))
+PAGINAS_POR_PASSO = 1024 # ~4 MB por passo com páginas de 4 KB
+
+_estado = {'seq': None, 'atualizada_em': None}
+_lock = threading.Lock()
+_pedido = threading.Event()
+_iniciada = False
+
+def ativa():
+    return bool(CAMINHO)
+
+def atraso():
+    """Segundos desde a última vez que a réplica foi confirmada igual ao banco principal (None se nunca)."""
+    atualizada_em = _estado['atualizada_em']
+    return None if atualizada_em is None else time.time() - atualizada_em
+
+def disponivel():
+    """True se as consultas de relatório estão a ler da réplica (ativa, já copiada e atual)."""
+    atraso_atual = atraso()
+    return ativa() and atraso_atual is not None and atraso_atual <= ATRASO_MAXIMO
+
+def sincronizar(forcar=False):
+    """
+    Copia o banco principal para a réplica se o log de alterações avançou desde a
+    última cópia. Devolve True se copiou.
+    """
+    with _lock:
+        inicio = time.perf_counter()
+        origem = database.get_db_connection(timeout=30.0)
+        try:
+            # Lido antes da cópia: escritas durante a cópia levam a uma nova cópia no ciclo seguinte
+            seq = origem.execute("SELECT COALESCE(MAX(seq), 0) FROM log_alteracoes").fetchone()[0]
+            if not forcar and seq == _estado['seq'] and os.path.exists(CAMINHO):
+                _estado['atualizada_em'] = time.time()
+                metricas.REPLICA_SINCRONIZACOES.inc(resultado='sem_alteracoes')
+                return False
+
+            temporario = f"{CAMINHO}.{os.getpid()}.tmp"
+            destino = sqlite3.connect(temporario)
+            try:
+                origem.backup(destino, pages=PAGINAS_POR_PASSO, sleep=0.005)
+            finally:
+                destino.close()
+            os.replace(temporario, CAMINHO)
+        finally:
+            origem.close()
+
+        _estado['seq'] = seq
+        _estado['atualizada_em'] = time.time()
+        metricas.REPLICA_SINCRONIZACOES.inc(resultado='copiada')
+        metricas.REPLICA_SINCRONIZACAO_SEGUNDOS.observar(time.perf_counter() - inicio)
+        return True
+
+def pedir_sincronizacao():
+    """Acorda a thread da réplica (ex: depois de uma escrita que o utilizador quer ver no relatório)."""
+    _pedido.set()
+
+def _sincronizar_periodicamente():
+    while True:
+        try:
+            sincronizar()
+        except (sqlite3.Error, OSError):
+            metricas.REPLICA_SINCRONIZACOES.inc(resultado='erro') # Tenta de novo no ciclo seguinte
+        _pedido.wait(INTERVALO)
+        _pedido.clear()
+
+def iniciar():
+    """Inicia, uma única vez por processo, a thread que mantém a réplica atualizada."""
+    global _iniciada
+    if not ativa():
+        return
+    with _lock:
+        if _iniciada:
+            return
+        _iniciada = True
+    threading.Thread(target=_sincronizar_periodicamente, name='assetflow-replica', daemon=True).start()
+
+def get_replica_connection():
+    """
+    Conexão só de leitura à réplica, para consultas de relatório. Sem réplica
+    configurada, ainda por copiar ou atrasada mais do que ATRASO_MAXIMO, devolve
+    uma conexão ao banco principal.
+    """
+    iniciar()
+    if not disponivel():
+        return database.get_db_connection()
+    conn = sqlite3.connect(f"{Path(CAMINHO).absolute().as_uri()}?mode=ro", uri=True, factory=ConexaoInstrumentada)
+    conn.row_factory = sqlite3.Row
+    return conn
@@ -1,17 +1,22 @@
 import sqlite3
 import hashlib
 
+from fornecedores import associar_manutencoes_sem_fornecedor
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-def configurar_banco():
-    """
-    Verifica e atualiza a estrutura do banco de dados, adicionando novas tabelas/colunas
-    se necessário.
-    """
-    conn = sqlite3.connect('inventario.db')
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON;")
+def criar_tabelas(cursor):
+    """Garante que todas as tabelas principais do sistema existam."""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS status (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_status TEXT NOT NULL UNIQUE)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS setores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_setor TEXT NOT NULL UNIQUE)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS marcas (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_marca TEXT NOT NULL UNIQUE)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS modelos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_modelo TEXT NOT NULL, marca_id INTEGER NOT NULL, FOREIGN KEY (marca_id) REFERENCES marcas (id))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS colaboradores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_completo TEXT NOT NULL, cpf TEXT NOT NULL UNIQUE, gmail TEXT, setor_id INTEGER, data_cadastro DATE NOT NULL, codigo TEXT, FOREIGN KEY (setor_id) REFERENCES setores (id))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS aparelhos (id INTEGER PRIMARY KEY AUTOINCREMENT, numero_serie TEXT NOT NULL UNIQUE, imei1 TEXT, imei2 TEXT, valor REAL, modelo_id INTEGER NOT NULL, status_id INTEGER NOT NULL, data_cadastro DATE NOT NULL, FOREIGN KEY (modelo_id) REFERENCES modelos (id), FOREIGN KEY (status_id) REFERENCES status (id))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS historico_movimentacoes (id INTEGER PRIMARY KEY AUTOINCREMENT, data_movimentacao DATETIME NOT NULL, aparelho_id INTEGER NOT NULL, colaborador_id INTEGER, status_id INTEGER NOT NULL, localizacao_atual TEXT, observacoes TEXT, checklist_devolucao TEXT, FOREIGN KEY (aparelho_id) REFERENCES aparelhos (id), FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id), FOREIGN KEY (status_id) REFERENCES status (id))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS contas_gmail (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL UNIQUE, senha TEXT, telefone_recuperacao TEXT, email_recuperacao TEXT, setor_id INTEGER, colaborador_id INTEGER, FOREIGN KEY (setor_id) REFERENCES setores (id), FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id))''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS usuarios (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, login TEXT NOT NULL UNIQUE, senha TEXT NOT NULL, cargo TEXT NOT NULL CHECK(cargo IN ('Administrador', 'Editor', 'Leitor')))''')
 
     # --- Criação da Tabela de Manutenções ---
     cursor.execute('''
@@ -30,35 +35,461 @@ def configurar_banco():
             FOREIGN KEY (colaborador_id_no_envio) REFERENCES colaboradores (id)
         )
     ''')
-    print("Tabela 'manutencoes' verificada/criada com sucesso.")
 
-    # --- Verificação de outras tabelas e colunas (código anterior) ---
-    # ... (código omitido para brevidade, mas o ficheiro completo deve contê-lo) ...
+def criar_indices(cursor):
+    """
+    Cria os índices usados pelas pesquisas incrementais (typeahead) e pela
+    consulta do responsável atual de cada aparelho.
+    """
+    # Pesquisa por prefixo: o LIKE só usa o índice quando a colação é NOCASE
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_colaboradores_nome ON colaboradores (nome_completo COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_colaboradores_codigo ON colaboradores (codigo COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_aparelhos_serie ON aparelhos (numero_serie COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_aparelhos_imei1 ON aparelhos (imei1 COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_aparelhos_status ON aparelhos (status_id)")
 
-    conn.commit()
-    conn.close()
-    print("Banco de dados 'inventario.db' verificado e atualizado.")
+    # Última movimentação de um aparelho e aparelhos de um colaborador
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_aparelho_data ON historico_movimentacoes (aparelho_id, data_movimentacao)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_colaborador ON historico_movimentacoes (colaborador_id)")
 
-if __name__ == '__main__':
-    # Código completo para garantir a execução correta
-    conn = sqlite3.connect('inventario.db')
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON;")
-    
-    # Adiciona a tabela de manutenções
-    cursor.execute('''CREATE TABLE IF NOT EXISTS manutencoes (id INTEGER PRIMARY KEY AUTOINCREMENT, aparelho_id INTEGER NOT NULL, colaborador_id_no_envio INTEGER, fornecedor TEXT, data_envio DATE NOT NULL, defeito_reportado TEXT, data_retorno DATE, solucao_aplicada TEXT, custo_reparo REAL, status_manutencao TEXT NOT NULL, FOREIGN KEY (aparelho_id) REFERENCES aparelhos (id), FOREIGN KEY (colaborador_id_no_envio) REFERENCES colaboradores (id))''')
-    
-    # Garante que as outras tabelas existam
-    cursor.execute('''CREATE TABLE IF NOT EXISTS status (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_status TEXT NOT NULL UNIQUE)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS setores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_setor TEXT NOT NULL UNIQUE)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS marcas (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_marca TEXT NOT NULL UNIQUE)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS modelos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_modelo TEXT NOT NULL, marca_id INTEGER NOT NULL, FOREIGN KEY (marca_id) REFERENCES marcas (id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS colaboradores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome_completo TEXT NOT NULL, cpf TEXT NOT NULL UNIQUE, gmail TEXT, setor_id INTEGER, data_cadastro DATE NOT NULL, codigo TEXT, FOREIGN KEY (setor_id) REFERENCES setores (id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS aparelhos (id INTEGER PRIMARY KEY AUTOINCREMENT, numero_serie TEXT NOT NULL UNIQUE, imei1 TEXT, imei2 TEXT, valor REAL, modelo_id INTEGER NOT NULL, status_id INTEGER NOT NULL, data_cadastro DATE NOT NULL, FOREIGN KEY (modelo_id) REFERENCES modelos (id), FOREIGN KEY (status_id) REFERENCES status (id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS historico_movimentacoes (id INTEGER PRIMARY KEY AUTOINCREMENT, data_movimentacao DATETIME NOT NULL, aparelho_id INTEGER NOT NULL, colaborador_id INTEGER, status_id INTEGER NOT NULL, localizacao_atual TEXT, observacoes TEXT, checklist_devolucao TEXT, FOREIGN KEY (aparelho_id) REFERENCES aparelhos (id), FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id), FOREIGN KEY (status_id) REFERENCES status (id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS contas_gmail (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL UNIQUE, senha TEXT, telefone_recuperacao TEXT, email_recuperacao TEXT, setor_id INTEGER, colaborador_id INTEGER, FOREIGN KEY (setor_id) REFERENCES setores (id), FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id))''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS usuarios (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, login TEXT NOT NULL UNIQUE, senha TEXT NOT NULL, cargo TEXT NOT NULL CHECK(cargo IN ('Administrador', 'Editor', 'Leitor')))''')
+    # O.S. em andamento (consultas.carregar_manutencoes_em_andamento e alerta do dashboard):
+    # índice parcial, só com as O.S. abertas, para que o custo não cresça com o histórico
+    # fechado. As consultas têm de repetir a condição literal para o SQLite o usar.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencoes_abertas ON manutencoes (data_envio) WHERE status_manutencao = 'Em Andamento'")
+
+    # Reparos atribuídos a quem tinha o aparelho no envio (relatório de TCO)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencoes_colaborador ON manutencoes (colaborador_id_no_envio, aparelho_id, data_envio, custo_reparo)")
+
+def criar_fornecedores(cursor):
+    """
+    Cria o cadastro de fornecedores (nome e chave normalizada única, ver fornecedores.py)
+    e a coluna 'fornecedor_id' das manutenções, e associa as O.S. que só têm o nome em
+    texto livre, juntando as variantes do mesmo fornecedor.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fornecedores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            chave TEXT NOT NULL UNIQUE
+        )
+    ''')
+    # Autocomplete (pesquisa.pesquisar_fornecedores): prefixo do nome ou da chave sem acentos
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_nome ON fornecedores (nome COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_chave ON fornecedores (chave COLLATE NOCASE)")
+
+    colunas = [linha[1] for linha in cursor.execute("PRAGMA table_info(manutencoes)")]
+    if 'fornecedor_id' not in colunas:
+        cursor.execute("ALTER TABLE manutencoes ADD COLUMN fornecedor_id INTEGER REFERENCES fornecedores (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencoes_fornecedor ON manutencoes (fornecedor_id)")
+
+    associar_manutencoes_sem_fornecedor(cursor)
+
+# Usa o índice parcial idx_manutencoes_abertas
+CONTAGEM_MANUTENCOES_ABERTAS = "SELECT COUNT(*) FROM manutencoes WHERE status_manutencao = 'Em Andamento'"
+
+def criar_contadores(cursor):
+    """
+    Cria a tabela de contadores mantidos por gatilhos. 'manutencoes_abertas' é o
+    número de O.S. 'Em Andamento', atualizado ao abrir, fechar ou apagar uma O.S.;
+    é contado aqui e verificado uma vez por processo (corrigir_contadores).
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS contadores (nome TEXT PRIMARY KEY, valor INTEGER NOT NULL DEFAULT 0)")
+    cursor.execute(f"INSERT OR REPLACE INTO contadores (nome, valor) VALUES ('manutencoes_abertas', ({CONTAGEM_MANUTENCOES_ABERTAS}))")
+    gatilhos = {
+        'insert': ("AFTER INSERT ON manutencoes WHEN NEW.status_manutencao = 'Em Andamento'", "1"),
+        'update': ("AFTER UPDATE OF status_manutencao ON manutencoes "
+                   "WHEN (OLD.status_manutencao = 'Em Andamento') IS NOT (NEW.status_manutencao = 'Em Andamento')",
+                   "(NEW.status_manutencao = 'Em Andamento') - (OLD.status_manutencao = 'Em Andamento')"),
+        'delete': ("AFTER DELETE ON manutencoes WHEN OLD.status_manutencao = 'Em Andamento'", "-1"),
+    }
+    for operacao, (quando, incremento) in gatilhos.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_contador_manutencoes_abertas_{operacao}
+            {quando}
+            BEGIN
+                UPDATE contadores SET valor = valor + {incremento} WHERE nome = 'manutencoes_abertas';
+            END
+        """)
+
+def corrigir_contadores(caminho='inventario.db'):
+    """
+    Volta a contar 'manutencoes_abertas' e corrige o contador se se tiver desviado (ex:
+    O.S. alteradas por um cliente antes de os gatilhos existirem). Só escreve se houver
+    diferença. Chamada uma vez por processo por database.garantir_estrutura.
+    """
+    conn = sqlite3.connect(caminho, timeout=30.0)
+    try:
+        valor, contagem = conn.execute(
+            f"SELECT (SELECT valor FROM contadores WHERE nome = 'manutencoes_abertas'), ({CONTAGEM_MANUTENCOES_ABERTAS})"
+        ).fetchone()
+        if valor != contagem:
+            conn.execute(f"UPDATE contadores SET valor = ({CONTAGEM_MANUTENCOES_ABERTAS}) WHERE nome = 'manutencoes_abertas'")
+            conn.commit()
+    finally:
+        conn.close()
+
+def criar_regras_depreciacao(cursor):
+    """
+    Cria as regras de depreciação (ver depreciacao.py): uma regra padrão e, opcionalmente,
+    uma por marca ou por modelo, que têm precedência. A regra padrão criada com a
+    tabela é linear, 36 meses, com 10% de valor residual.
+    """
+    ja_existia = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'regras_depreciacao'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS regras_depreciacao (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            marca_id INTEGER,
+            modelo_id INTEGER,
+            metodo TEXT NOT NULL CHECK(metodo IN ('linear', 'saldo_decrescente')),
+            vida_util_meses INTEGER NOT NULL CHECK(vida_util_meses > 0),
+            taxa_anual REAL CHECK(taxa_anual IS NULL OR (taxa_anual > 0 AND taxa_anual < 1)), -- só no saldo decrescente
+            valor_residual_pct REAL NOT NULL DEFAULT 0 CHECK(valor_residual_pct >= 0 AND valor_residual_pct <= 1),
+            CHECK(marca_id IS NULL OR modelo_id IS NULL),
+            FOREIGN KEY (marca_id) REFERENCES marcas (id) ON DELETE CASCADE,
+            FOREIGN KEY (modelo_id) REFERENCES modelos (id) ON DELETE CASCADE
+        )
+    ''')
+    # Uma regra por alvo: padrão (ambos NULL), marca ou modelo
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_regras_depreciacao_alvo ON regras_depreciacao (IFNULL(marca_id, 0), IFNULL(modelo_id, 0))")
+    if not ja_existia:
+        cursor.execute("""
+            INSERT INTO regras_depreciacao (marca_id, modelo_id, metodo, vida_util_meses, valor_residual_pct)
+            VALUES (NULL, NULL, 'linear', 36, 0.1)
+        """)
+
+# Tabelas cujas alterações incrementam a versão em 'versoes_tabelas' (as de referência
+# para o catalogo.py; 'manutencoes' e 'fornecedores' para o analise_manutencao.py;
+# 'regras_depreciacao' e 'aparelhos' para o depreciacao.py; 'historico_movimentacoes'
+# e 'colaboradores' para o tco.py)
+TABELAS_VERSIONADAS = (
+    'status', 'setores', 'marcas', 'modelos', 'manutencoes', 'fornecedores',
+    'regras_depreciacao', 'aparelhos', 'historico_movimentacoes', 'colaboradores',
+)
+
+# Tabelas em que só a alteração destas colunas incrementa a versão (os aparelhos mudam
+# de status a cada movimentação, o que não interessa ao valor contábil)
+COLUNAS_VERSIONADAS = {
+    'aparelhos': ('valor', 'data_cadastro', 'modelo_id'),
+    'colaboradores': ('nome_completo', 'setor_id'),
+}
 
+def criar_versionamento(cursor):
+    """
+    Cria a tabela de versões e os gatilhos que a incrementam a cada escrita nas
+    tabelas versionadas. O catalogo.py, o analise_manutencao.py, o depreciacao.py e
+    o tco.py usam estas versões para invalidar as suas caches.
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS versoes_tabelas (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL DEFAULT 0)")
+    for tabela in TABELAS_VERSIONADAS:
+        cursor.execute("INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES (?, 0)", (tabela,))
+        for operacao in ('INSERT', 'UPDATE', 'DELETE'):
+            evento = operacao
+            if operacao == 'UPDATE' and tabela in COLUNAS_VERSIONADAS:
+                evento += f" OF {', '.join(COLUNAS_VERSIONADAS[tabela])}"
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{operacao.lower()}
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            """)
+
+def avancar_versoes(conn, versoes_anteriores):
+    """
+    Depois de restaurar um backup: cada versão em 'versoes_tabelas' passa a ser maior
+    que a anterior à restauração e que a restaurada. As caches dos outros processos,
+    guardadas com qualquer uma delas, deixam de corresponder e são recarregadas.
+    """
+    for tabela, versao in conn.execute("SELECT tabela, versao FROM versoes_tabelas").fetchall():
+        conn.execute(
+            "UPDATE versoes_tabelas SET versao = ? WHERE tabela = ?",
+            (max(versao, versoes_anteriores.get(tabela, 0)) + 1, tabela)
+        )
     conn.commit()
-    conn.close()
-    print("Banco de dados verificado.")
+
+def criar_arquivo_termos(cursor):
+    """Cria a tabela que liga os termos arquivados (por hash) às movimentações."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS termos_gerados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movimentacao_id INTEGER NOT NULL,
+            hash_conteudo TEXT NOT NULL,
+            versao_template INTEGER NOT NULL,
+            data_geracao DATETIME NOT NULL,
+            gerado_por TEXT,
+            UNIQUE (movimentacao_id, hash_conteudo),
+            FOREIGN KEY (movimentacao_id) REFERENCES historico_movimentacoes (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_termos_gerados_data ON termos_gerados (data_geracao)")
+
+# Colaborador responsável pelo aparelho antes da movimentação NEW (quem o devolve)
+_RESPONSAVEL_ANTERIOR = """
+    (SELECT colaborador_id FROM historico_movimentacoes
+     WHERE aparelho_id = {h}.aparelho_id AND colaborador_id IS NOT NULL
+       AND (data_movimentacao < {h}.data_movimentacao OR (data_movimentacao = {h}.data_movimentacao AND id < {h}.id))
+     ORDER BY data_movimentacao DESC, id DESC LIMIT 1)
+"""
+
+def criar_checklist_itens(cursor):
+    """
+    Cria a tabela normalizada dos checklists (um registo por item) usada nos
+    relatórios de danos. Os checklists de devolução continuam a ser gravados em JSON
+    em historico_movimentacoes.checklist_devolucao; um gatilho copia-os para esta
+    tabela. Os de entrega são gravados pelo termos.py ao gerar o termo. Na criação
+    da tabela, os checklists de devolução já existentes são importados do JSON.
+    'colaborador_id' é o responsável pelo aparelho: quem o recebe (entrega) ou
+    quem o devolve (devolução).
+    """
+    ja_existia = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'checklist_itens'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS checklist_itens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movimentacao_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL CHECK(tipo IN ('entrega', 'devolucao')),
+            item TEXT NOT NULL,
+            entregue INTEGER NOT NULL,
+            estado TEXT,
+            colaborador_id INTEGER,
+            UNIQUE (movimentacao_id, tipo, item),
+            FOREIGN KEY (movimentacao_id) REFERENCES historico_movimentacoes (id),
+            FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_checklist_itens_tipo_item ON checklist_itens (tipo, item, estado)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_checklist_itens_colaborador ON checklist_itens (colaborador_id)")
+
+    # O responsável é calculado uma vez por movimentação (subconsulta com LIMIT, que o
+    # SQLite não achata), não uma vez por item do checklist
+    inserir_do_json = """
+        INSERT OR REPLACE INTO checklist_itens (movimentacao_id, tipo, item, entregue, estado, colaborador_id)
+        SELECT d.id, 'devolucao', j.key, COALESCE(json_extract(j.value, '$.entregue'), 1), json_extract(j.value, '$.estado'), d.colaborador_id
+        FROM (
+            SELECT h.id, h.checklist_devolucao, """ + _RESPONSAVEL_ANTERIOR.format(h='h') + """ AS colaborador_id
+            FROM historico_movimentacoes h
+            WHERE {filtro} AND h.checklist_devolucao IS NOT NULL AND json_valid(h.checklist_devolucao)
+            LIMIT -1
+        ) d, json_each(d.checklist_devolucao) j
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_checklist_devolucao_insert
+        AFTER INSERT ON historico_movimentacoes
+        WHEN NEW.checklist_devolucao IS NOT NULL
+        BEGIN
+            {inserir_do_json.format(filtro='h.id = NEW.id')};
+        END
+    """)
+    if not ja_existia:
+        cursor.execute(inserir_do_json.format(filtro='1'))
+
+def criar_intervalos_status(cursor):
+    """
+    Cria 'intervalos_status': um intervalo por movimentação, do momento em que o
+    aparelho entrou no status até à movimentação seguinte (fim NULL no intervalo
+    atual), com o status seguinte. Os gatilhos em historico_movimentacoes mantêm os
+    intervalos ao inserir, alterar ou apagar uma movimentação, também fora de ordem;
+    na criação, a tabela é preenchida com LEAD() sobre o histórico existente.
+    """
+    ja_existia = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'intervalos_status'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS intervalos_status (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            movimentacao_id INTEGER NOT NULL UNIQUE,
+            aparelho_id INTEGER NOT NULL,
+            status_id INTEGER NOT NULL,
+            colaborador_id INTEGER,
+            inicio DATETIME NOT NULL,
+            fim DATETIME, -- NULL: status atual do aparelho
+            proximo_status_id INTEGER,
+            FOREIGN KEY (movimentacao_id) REFERENCES historico_movimentacoes (id) ON DELETE CASCADE,
+            FOREIGN KEY (aparelho_id) REFERENCES aparelhos (id),
+            FOREIGN KEY (status_id) REFERENCES status (id),
+            FOREIGN KEY (colaborador_id) REFERENCES colaboradores (id)
+        )
+    ''')
+    # Linha do tempo de um aparelho e vizinhos de uma movimentação
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_intervalos_aparelho ON intervalos_status (aparelho_id, inicio, movimentacao_id)")
+    # Tempo por status num período: cobre a consulta sem ler a tabela (substitui idx_intervalos_status_inicio)
+    cursor.execute("DROP INDEX IF EXISTS idx_intervalos_status_inicio")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_intervalos_status_periodo ON intervalos_status (status_id, inicio, fim, aparelho_id)")
+    # Duração das passagens de um status para outro (ex: estoque -> uso) terminadas num período
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_intervalos_transicao ON intervalos_status (status_id, proximo_status_id, fim)")
+    # Status, responsável e localização atuais de cada aparelho (conciliação do inventário físico)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_intervalos_atuais ON intervalos_status (aparelho_id) WHERE fim IS NULL")
+    # Posse por colaborador e aparelho (relatório de TCO): cobre a consulta sem ler a tabela
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_intervalos_posse ON intervalos_status (status_id, colaborador_id, aparelho_id, inicio, fim)")
+
+    # Intervalos vizinhos da movimentação {m} (NEW ou OLD), pela ordem (data, id) do histórico
+    anterior = """(SELECT id FROM intervalos_status WHERE aparelho_id = {m}.aparelho_id
+        AND (inicio < {m}.data_movimentacao OR (inicio = {m}.data_movimentacao AND movimentacao_id < {m}.id))
+        ORDER BY inicio DESC, movimentacao_id DESC LIMIT 1)"""
+    seguinte = """(SELECT inicio, status_id FROM intervalos_status WHERE aparelho_id = {m}.aparelho_id
+        AND (inicio > {m}.data_movimentacao OR (inicio = {m}.data_movimentacao AND movimentacao_id > {m}.id))
+        ORDER BY inicio, movimentacao_id LIMIT 1)"""
+    remover = f"""
+        DELETE FROM intervalos_status WHERE movimentacao_id = OLD.id;
+        UPDATE intervalos_status SET (fim, proximo_status_id) = (SELECT inicio, status_id FROM {seguinte.format(m='OLD')})
+        WHERE id = {anterior.format(m='OLD')};
+    """
+    inserir = f"""
+        UPDATE intervalos_status SET fim = NEW.data_movimentacao, proximo_status_id = NEW.status_id
+        WHERE id = {anterior.format(m='NEW')};
+        INSERT INTO intervalos_status (movimentacao_id, aparelho_id, status_id, colaborador_id, inicio, fim, proximo_status_id)
+        SELECT NEW.id, NEW.aparelho_id, NEW.status_id, NEW.colaborador_id, NEW.data_movimentacao, seguinte.inicio, seguinte.status_id
+        FROM (SELECT 1) LEFT JOIN {seguinte.format(m='NEW')} seguinte;
+    """
+    gatilhos = {
+        'insert': ("AFTER INSERT", inserir),
+        'update': ("AFTER UPDATE OF data_movimentacao, aparelho_id, status_id, colaborador_id", remover + inserir),
+        'delete': ("AFTER DELETE", remover),
+    }
+    for operacao, (evento, corpo) in gatilhos.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_intervalos_status_{operacao}")
+        cursor.execute(f"""
+            CREATE TRIGGER trg_intervalos_status_{operacao}
+            {evento} ON historico_movimentacoes
+            BEGIN
+                {corpo}
+            END
+        """)
+
+    if not ja_existia:
+        cursor.execute("""
+            INSERT INTO intervalos_status (movimentacao_id, aparelho_id, status_id, colaborador_id, inicio, fim, proximo_status_id)
+            SELECT id, aparelho_id, status_id, colaborador_id, data_movimentacao,
+                   LEAD(data_movimentacao) OVER aparelho, LEAD(status_id) OVER aparelho
+            FROM historico_movimentacoes
+            WINDOW aparelho AS (PARTITION BY aparelho_id ORDER BY data_movimentacao, id)
+        """)
+
+# Tabelas cujas escritas ficam registadas em 'log_alteracoes' (captura de alterações)
+TABELAS_AUDITADAS = (
+    'status', 'setores', 'marcas', 'modelos', 'colaboradores', 'aparelhos',
+    'historico_movimentacoes', 'contas_gmail', 'usuarios', 'manutencoes', 'fornecedores',
+    'regras_depreciacao',
+)
+
+def criar_log_alteracoes(cursor):
+    """
+    Cria o log de alterações (só de acréscimo) e os gatilhos que registam cada
+    INSERT/UPDATE/DELETE nas tabelas auditadas: tabela, id da linha, operação,
+    colunas alteradas (só nos UPDATE) e data. Os gatilhos não dependem de funções
+    da aplicação, para que qualquer cliente (sqlite3, scripts) continue a poder
+    escrever: o utilizador fica NULL e é preenchido pelo gatilho temporário que o
+    database.py cria em cada conexão da aplicação.
+    Os gatilhos são recriados com as colunas atuais só quando há migrações por aplicar
+    (ver configurar_banco): ao acrescentar uma coluna a uma tabela auditada, incremente
+    VERSAO_ESQUEMA, ou as alterações dessa coluna não entram no log.
+    Leitura das alterações: alteracoes.py.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            linha_id INTEGER NOT NULL,
+            operacao TEXT NOT NULL CHECK(operacao IN ('I', 'U', 'D')),
+            colunas TEXT, -- lista JSON das colunas alteradas (só em 'U')
+            data_alteracao DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+            utilizador TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_alteracoes_linha ON log_alteracoes (tabela, linha_id)")
+    # A única alteração permitida é a do gatilho temporário das conexões da aplicação (que
+    # registam utilizador_atual()): preencher o utilizador de um registo que ainda não o tem
+    cursor.execute("DROP TRIGGER IF EXISTS trg_log_alteracoes_imutavel")
+    cursor.execute("""
+        CREATE TRIGGER trg_log_alteracoes_imutavel
+        BEFORE UPDATE ON log_alteracoes
+        WHEN NOT (OLD.utilizador IS NULL AND NEW.seq IS OLD.seq AND NEW.tabela IS OLD.tabela
+                  AND NEW.linha_id IS OLD.linha_id AND NEW.operacao IS OLD.operacao
+                  AND NEW.colunas IS OLD.colunas AND NEW.data_alteracao IS OLD.data_alteracao
+                  AND EXISTS (SELECT 1 FROM pragma_function_list WHERE name = 'utilizador_atual'))
+        BEGIN
+            SELECT RAISE(ABORT, 'O log de alterações não pode ser modificado');
+        END
+    """)
+    # Só a purga (alteracoes.purgar_ate) apaga registos: regista a função
+    # purga_log_alteracoes() na sua conexão para se identificar
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_log_alteracoes_sem_remocao
+        BEFORE DELETE ON log_alteracoes
+        WHEN NOT EXISTS (SELECT 1 FROM pragma_function_list WHERE name = 'purga_log_alteracoes')
+        BEGIN
+            SELECT RAISE(ABORT, 'O log de alterações só pode ser apagado pela purga');
+        END
+    """)
+
+    for tabela in TABELAS_AUDITADAS:
+        colunas = [linha[1] for linha in cursor.execute(f"PRAGMA table_info({tabela})") if linha[1] != 'id']
+        houve_alteracao = " OR ".join(f"OLD.{coluna} IS NOT NEW.{coluna}" for coluna in colunas)
+        colunas_alteradas = ", ".join(f"CASE WHEN OLD.{coluna} IS NOT NEW.{coluna} THEN '{coluna}' END" for coluna in colunas)
+        gatilhos = {
+            'insert': ("", "NEW.id, 'I', NULL"),
+            'update': (f"WHEN {houve_alteracao}",
+                       f"NEW.id, 'U', (SELECT json_group_array(value) FROM json_each(json_array({colunas_alteradas})) WHERE value IS NOT NULL)"),
+            'delete': ("", "OLD.id, 'D', NULL"),
+        }
+        for operacao, (condicao, valores) in gatilhos.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_log_{tabela}_{operacao}")
+            cursor.execute(f"""
+                CREATE TRIGGER trg_log_{tabela}_{operacao}
+                AFTER {operacao.upper()} ON {tabela}
+                {condicao}
+                BEGIN
+                    INSERT INTO log_alteracoes (tabela, linha_id, operacao, colunas)
+                    VALUES ('{tabela}', {valores});
+                END
+            """)
+
+# Versão do esquema gravada em PRAGMA user_version depois das migrações. Incrementar
+# sempre que se acrescenta ou altera uma migração, para que os bancos existentes a apliquem
+# (também ao acrescentar colunas a uma tabela auditada: ver criar_log_alteracoes).
+VERSAO_ESQUEMA = 2
+
+def configurar_banco(caminho='inventario.db', forcar=False):
+    """
+    Verifica e atualiza a estrutura do banco de dados, adicionando novas tabelas,
+    colunas e índices se necessário. Pode ser executada várias vezes sem efeitos colaterais.
+    Um banco já na VERSAO_ESQUEMA não é tocado (nem escrito), exceto com forcar=True
+    (depois de restaurar um backup: o script não traz a user_version, que fica a do
+    banco substituído, mas pode não trazer as tabelas mais recentes). As migrações correm numa
+    transação IMMEDIATE: com vários processos a arrancar ao mesmo tempo, um migra e os
+    outros esperam pelo bloqueio e encontram o banco já atualizado.
+    """
+    conn = sqlite3.connect(caminho, timeout=30.0, isolation_level=None)
+    try:
+        if not forcar and conn.execute("PRAGMA user_version").fetchone()[0] == VERSAO_ESQUEMA:
+            return
+        # Bancos criados antes de os gatilhos de auditoria dispensarem esta função ainda a
+        # chamam até criar_log_alteracoes os recriar, no fim das migrações
+        conn.create_function('utilizador_atual', 0, lambda: None)
+        conn.execute("PRAGMA foreign_keys = ON;") # Sem efeito dentro de uma transação
+        conn.execute("BEGIN IMMEDIATE")
+        if not forcar and conn.execute("PRAGMA user_version").fetchone()[0] == VERSAO_ESQUEMA:
+            conn.rollback() # Outro processo migrou enquanto esperávamos pelo bloqueio
+            return
+        cursor = conn.cursor()
+
+        criar_tabelas(cursor)
+        criar_indices(cursor)
+        criar_fornecedores(cursor)
+        criar_contadores(cursor)
+        criar_regras_depreciacao(cursor)
+        criar_versionamento(cursor)
+        criar_arquivo_termos(cursor)
+        criar_checklist_itens(cursor)
+        criar_intervalos_status(cursor)
+        criar_log_alteracoes(cursor) # Sempre por último: os gatilhos usam as colunas atuais das tabelas
+
+        cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    configurar_banco()
+    print("Banco de dados 'inventario.db' verificado e atualizado.")
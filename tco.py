@@ -0,0 +1,198 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from catalogo import cache_por_versao
+from replica import get_replica_connection
+
+# --- Custo Total de Posse (TCO) ---
+# Junta, por colaborador e por setor, o valor de aquisição dos aparelhos, o custo dos
+# reparos e o tempo de posse. O tempo de posse vem dos intervalos 'Em uso' de
+# 'intervalos_status' (cortados ao período pedido) e o custo dos reparos das O.S.
+# enviadas enquanto o aparelho estava com o colaborador ('colaborador_id_no_envio').
+# O valor de cada aparelho é repartido pelos colaboradores na proporção dos dias de
+# posse no período, para que a soma por setor não conte o mesmo aparelho duas vezes.
+#
+# As datas são texto ISO ('AAAA-MM-DD[ HH:MM:SS]'), por isso os filtros do período
+# comparam as colunas diretamente e usam os índices idx_intervalos_posse e
+# idx_manutencoes_colaborador. Os totais por colaborador e por setor são agregados no
+# SQLite (só as linhas dos totais chegam ao pandas) e ficam em cache por período até a
+# versão das tabelas envolvidas (ou o dia) mudar; o detalhe de um colaborador é
+# consultado apenas para os aparelhos que passaram por ele.
+
+DEPENDENCIAS = ('historico_movimentacoes', 'manutencoes', 'aparelhos', 'colaboradores', 'setores', 'modelos', 'marcas')
+
+DIAS_POR_MES = 365.25 / 12
+
+# Pares (colaborador, aparelho) com os dias em uso, os reparos e o valor atribuído.
+# '{aparelhos}' restringe os aparelhos considerados (vazio = todos).
+PARES = """
+    WITH posse AS (
+        SELECT colaborador_id, aparelho_id,
+               SUM(MIN(julianday(COALESCE(fim, :agora)), julianday(:fim)) - MAX(julianday(inicio), julianday(:inicio))) AS dias,
+               0 AS reparos, 0 AS custo_reparos
+        FROM {intervalos}
+        WHERE status_id = (SELECT id FROM status WHERE nome_status = 'Em uso')
+          AND colaborador_id IS NOT NULL
+          AND inicio < :fim AND COALESCE(fim, :agora) > :inicio {aparelhos}
+        GROUP BY colaborador_id, aparelho_id
+    ),
+    reparos AS (
+        SELECT colaborador_id_no_envio, aparelho_id, 0, COUNT(*), COALESCE(SUM(custo_reparo), 0)
+        FROM manutencoes
+        WHERE colaborador_id_no_envio IS NOT NULL
+          AND data_envio >= :inicio AND data_envio < :fim {aparelhos}
+        GROUP BY colaborador_id_no_envio, aparelho_id
+    ),
+    pares AS (
+        SELECT t.colaborador_id, t.aparelho_id, SUM(t.dias) AS dias, SUM(t.reparos) AS reparos, SUM(t.custo_reparos) AS custo_reparos
+        FROM (SELECT * FROM posse UNION ALL SELECT * FROM reparos) t
+        GROUP BY t.colaborador_id, t.aparelho_id
+    ),
+    atribuidos AS (
+        SELECT p.*, COALESCE(a.valor, 0) AS valor,
+               COALESCE(COALESCE(a.valor, 0) * p.dias / NULLIF(SUM(p.dias) OVER (PARTITION BY p.aparelho_id), 0), 0) AS valor_atribuido
+        FROM pares p
+        JOIN aparelhos a ON p.aparelho_id = a.id
+    )
+"""
+
+TODOS_OS_PARES = PARES.format(intervalos='intervalos_status', aparelhos='')
+
+# Só os aparelhos que alguma vez passaram pelo colaborador (em uso ou enviados para
+# reparo); o período é aplicado às linhas de cada aparelho em 'posse' e 'reparos'.
+# Sem estatísticas (ANALYZE) o SQLite prefere percorrer todos os intervalos 'Em uso'
+# pelo status; INDEXED BY fá-lo procurar apenas os intervalos desses aparelhos.
+PARES_DO_COLABORADOR = PARES.format(
+    intervalos='intervalos_status INDEXED BY idx_intervalos_aparelho',
+    aparelhos="""
+          AND aparelho_id IN (
+              SELECT aparelho_id FROM intervalos_status
+              WHERE status_id = (SELECT id FROM status WHERE nome_status = 'Em uso') AND colaborador_id = :colaborador_id
+              UNION
+              SELECT aparelho_id FROM manutencoes WHERE colaborador_id_no_envio = :colaborador_id
+          )""",
+)
+
+CONSULTA_POSSE = TODOS_OS_PARES + """
+    SELECT
+        p.colaborador_id, c.nome_completo AS colaborador, COALESCE(s.nome_setor, 'Sem setor') AS setor,
+        p.aparelho_id, a.numero_serie, ma.nome_marca || ' - ' || mo.nome_modelo AS modelo,
+        p.valor, p.dias, p.reparos, p.custo_reparos, p.valor_atribuido
+    FROM atribuidos p
+    JOIN colaboradores c ON p.colaborador_id = c.id
+    LEFT JOIN setores s ON c.setor_id = s.id
+    JOIN aparelhos a ON p.aparelho_id = a.id
+    LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    LEFT JOIN marcas ma ON mo.marca_id = ma.id
+"""
+
+TOTAIS = """
+    COUNT(DISTINCT aparelho_id) AS aparelhos, SUM(dias) AS dias, SUM(valor_atribuido) AS valor_atribuido,
+    SUM(reparos) AS reparos, SUM(custo_reparos) AS custo_reparos
+"""
+
+# Totais por colaborador e por setor numa só instrução ('nivel' separa as linhas), para
+# que os pares sejam calculados uma única vez
+CONSULTA_TOTAIS = TODOS_OS_PARES + f""",
+    com_setor AS (
+        SELECT p.*, c.nome_completo AS colaborador, c.codigo, COALESCE(s.nome_setor, 'Sem setor') AS setor
+        FROM atribuidos p
+        JOIN colaboradores c ON p.colaborador_id = c.id
+        LEFT JOIN setores s ON c.setor_id = s.id
+    )
+    SELECT 'colaborador' AS nivel, colaborador_id, colaborador, codigo, setor, 1 AS colaboradores, {TOTAIS}
+    FROM com_setor GROUP BY colaborador_id
+    UNION ALL
+    SELECT 'setor', NULL, NULL, NULL, setor, COUNT(DISTINCT colaborador_id), {TOTAIS}
+    FROM com_setor GROUP BY setor
+"""
+
+CONSULTA_DETALHE = PARES_DO_COLABORADOR + """
+    SELECT a.numero_serie, ma.nome_marca || ' - ' || mo.nome_modelo AS modelo,
+           p.valor, p.dias, p.valor_atribuido, p.reparos, p.custo_reparos
+    FROM atribuidos p
+    JOIN aparelhos a ON p.aparelho_id = a.id
+    LEFT JOIN modelos mo ON a.modelo_id = mo.id
+    LEFT JOIN marcas ma ON mo.marca_id = ma.id
+    WHERE p.colaborador_id = :colaborador_id
+"""
+
+COLUNAS_TOTAIS = {
+    'aparelhos': 'Aparelhos', 'dias': 'Dias de Posse', 'valor_atribuido': 'Valor Atribuído (R$)',
+    'reparos': 'Reparos', 'custo_reparos': 'Custo de Reparos (R$)',
+}
+
+def _parametros(data_inicio=None, data_fim=None, agora=None, **outros):
+    agora = (agora or datetime.now()).isoformat(sep=' ')
+    return {
+        'agora': agora,
+        'inicio': (data_inicio or date(1900, 1, 1)).isoformat(),
+        'fim': (data_fim + timedelta(days=1)).isoformat() if data_fim else agora,
+        **outros,
+    }
+
+def carregar_posse(conn, data_inicio=None, data_fim=None, agora=None):
+    """
+    Uma linha por par (colaborador, aparelho) com os dias em uso no período, os
+    reparos atribuídos e a parte do valor do aparelho que cabe ao colaborador.
+    """
+    return pd.read_sql_query(CONSULTA_POSSE, conn, params=_parametros(data_inicio, data_fim, agora))
+
+# --- Agregações ---
+def _totais(df):
+    df = df.assign(custo_total=df['valor_atribuido'] + df['custo_reparos'])
+    df['custo_mes'] = df['custo_total'] / (df['dias'] / DIAS_POR_MES).where(df['dias'] > 0)
+    df = df.rename(columns={**COLUNAS_TOTAIS, 'custo_total': 'Custo Total (R$)', 'custo_mes': 'Custo por Mês de Posse (R$)'})
+    return df.round(2).sort_values('Custo Total (R$)', ascending=False).reset_index(drop=True)
+
+def carregar_totais(conn, data_inicio=None, data_fim=None, agora=None):
+    """
+    (por_setor, por_colaborador): TCO por setor, com o número de colaboradores com posse
+    ou reparos no período, e por colaborador (o setor é o atual do colaborador).
+    """
+    df = pd.read_sql_query(CONSULTA_TOTAIS, conn, params=_parametros(data_inicio, data_fim, agora))
+    setores = df[df['nivel'] == 'setor'].drop(columns=['nivel', 'colaborador_id', 'colaborador', 'codigo'])
+    colaboradores = df[df['nivel'] == 'colaborador'].drop(columns=['nivel', 'colaboradores'])
+    colaboradores = colaboradores.astype({'colaborador_id': 'int64'})
+    return (
+        _totais(setores).rename(columns={'setor': 'Setor', 'colaboradores': 'Colaboradores'}),
+        _totais(colaboradores).rename(columns={'colaborador': 'Colaborador', 'codigo': 'Código', 'setor': 'Setor'}),
+    )
+
+def detalhe_colaborador(conn, colaborador_id, data_inicio=None, data_fim=None, agora=None):
+    """Aparelhos de um colaborador no período, com dias de posse, valor atribuído e reparos."""
+    params = _parametros(data_inicio, data_fim, agora, colaborador_id=colaborador_id)
+    detalhe = pd.read_sql_query(CONSULTA_DETALHE, conn, params=params)
+    detalhe = detalhe.rename(columns={'numero_serie': 'N/S', 'modelo': 'Modelo', 'valor': 'Valor (R$)', **COLUNAS_TOTAIS})
+    return detalhe.round(2).sort_values('Dias de Posse', ascending=False).reset_index(drop=True)
+
+# --- Cache por Versão dos Dados ---
+
+def obter_totais(data_inicio=None, data_fim=None):
+    """carregar_totais() na réplica, recalculado só quando os dados (ou o dia) mudaram."""
+    conn = get_replica_connection()
+    try:
+        return cache_por_versao(
+            'tco', DEPENDENCIAS, (data_inicio, data_fim),
+            lambda conexao: carregar_totais(conexao, data_inicio, data_fim),
+            conn, diaria=True
+        )
+    finally:
+        conn.close()
+
+def obter_detalhe(colaborador_id, data_inicio=None, data_fim=None):
+    """detalhe_colaborador() na réplica (só os aparelhos do colaborador são consultados)."""
+    conn = get_replica_connection()
+    try:
+        return detalhe_colaborador(conn, colaborador_id, data_inicio, data_fim)
+    finally:
+        conn.close()
+
+def obter_posse(data_inicio=None, data_fim=None):
+    """carregar_posse() na réplica, para o relatório completo (sem cache: só é pedido na exportação)."""
+    conn = get_replica_connection()
+    try:
+        return carregar_posse(conn, data_inicio, data_fim)
+    finally:
+        conn.close()
@@ -0,0 +1,557 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from database import get_db_connection
+import metricas
+from catalogo import status_id
+from importacao_tardia import importar_tardiamente
+
+fpdf = importar_tardiamente("fpdf") # Só é carregado quando um termo tem de ser renderizado (não para os arquivados)
+
+# --- Geração do Termo de Responsabilidade ---
+# Módulo partilhado pela geração individual e em lote (pages/6_Gerar_Documentos.py).
+# As funções de renderização não dependem do Streamlit nem do banco de dados, para
+# poderem correr nos processos do ProcessPoolExecutor.
+
+ITENS_CHECKLIST = ["Tela", "Carcaça", "Bateria", "Botões", "USB", "Chip", "Carregador", "Cabo USB", "Capa", "Película"]
+OPCOES_ESTADO = ["NOVO NA CAIXA", "BOM", "REGULAR", "AVARIADO"]
+
+TEXTO_DOCUMENTACAO = "Declaro para os devidos fins que os materiais registados nesta ficha encontram-se em meu poder para uso em minhas atividades, cabendo-me a responsabilidade por sua guarda e conservação... (Art. 462 CLT). Declaro estar ciente e de acordo com a utilização de meus dados pessoais neste documento, para fins de controle."
+
+FONTE = 'helvetica'
+
+# --- Template Compilado do Termo ---
+
+class TemplateTermo:
+    """
+    Layout do termo calculado uma única vez por processo. O cabeçalho, o rodapé, as
+    barras de secção, os rótulos e as quebras de linha do texto legal ficam guardados
+    como primitivas de desenho com posições fixas; a cada documento só são
+    calculados e desenhados os campos do colaborador e do checklist.
+
+    Operações em 'self.operacoes':
+        ('fonte', estilo, tamanho)
+        ('cor_texto', r, g, b) / ('cor_preenchimento', r, g, b)
+        ('retangulo', x, y, largura, altura, estilo)
+        ('linha', x1, y1, x2, y2)
+        ('texto', x, y, texto)                              -> texto fixo
+        ('campo', x, y, largura, alinhamento, funcao)       -> funcao(dados, checklist_data)
+    """
+
+    def __init__(self):
+        self.operacoes = []
+        # Documento auxiliar usado apenas para medir textos durante a compilação
+        self._medidor = fpdf.FPDF()
+        self._medidor.add_page()
+        self._x = self._medidor.l_margin
+        self._y = self._medidor.t_margin
+        self._compilar()
+        del self._medidor
+
+    # --- Compilação (equivalentes de cell/ln/multi_cell que registam primitivas) ---
+
+    def _fonte(self, estilo, tamanho):
+        self._medidor.set_font(FONTE, estilo, tamanho)
+        self.operacoes.append(('fonte', estilo, tamanho))
+
+    def _cor_texto(self, r, g, b):
+        self.operacoes.append(('cor_texto', r, g, b))
+
+    def _salto(self, altura):
+        self._x = self._medidor.l_margin
+        self._y += altura
+
+    def _celula(self, largura, altura, conteudo='', borda=0, alinhamento='L', nova_linha=False, preencher=False):
+        m = self._medidor
+        if largura == 0:
+            largura = m.w - m.r_margin - self._x
+        if preencher:
+            self.operacoes.append(('retangulo', self._x, self._y, largura, altura, 'F'))
+        if borda == 1:
+            self.operacoes.append(('retangulo', self._x, self._y, largura, altura, 'D'))
+        elif borda == 'B':
+            self.operacoes.append(('linha', self._x, self._y + altura, self._x + largura, self._y + altura))
+        if conteudo:
+            # Mesma linha de base que o FPDF.cell usa para texto numa célula
+            base = self._y + 0.5 * altura + 0.3 * m.font_size
+            if callable(conteudo):
+                self.operacoes.append(('campo', self._x, base, largura, alinhamento, conteudo))
+            else:
+                dx = (largura - m.get_string_width(conteudo)) / 2 if alinhamento == 'C' else m.c_margin
+                self.operacoes.append(('texto', self._x + dx, base, conteudo))
+        if nova_linha:
+            self._salto(altura)
+        else:
+            self._x += largura
+
+    def _paragrafo_justificado(self, altura, texto):
+        """Quebra o texto em linhas e posiciona cada palavra uma única vez."""
+        m = self._medidor
+        linhas = m.multi_cell(0, altura, texto, align='J', dry_run=True, output=fpdf.enums.MethodReturnValue.LINES)
+        largura_util = m.w - m.l_margin - m.r_margin - 2 * m.c_margin
+        for i, linha in enumerate(linhas):
+            base = self._y + 0.5 * altura + 0.3 * m.font_size
+            x = m.l_margin + m.c_margin
+            palavras = linha.split(' ')
+            if i == len(linhas) - 1 or len(palavras) == 1:
+                self.operacoes.append(('texto', x, base, linha))
+            else:
+                larguras = [m.get_string_width(palavra) for palavra in palavras]
+                espaco = (largura_util - sum(larguras)) / (len(palavras) - 1)
+                for palavra, largura in zip(palavras, larguras):
+                    self.operacoes.append(('texto', x, base, palavra))
+                    x += largura + espaco
+            self._y += altura
+        self._x = m.l_margin
+
+    def _titulo_secao(self, titulo):
+        self._fonte('B', 12)
+        self.operacoes.append(('cor_preenchimento', 0, 51, 102))
+        self._cor_texto(255, 255, 255)
+        self._celula(0, 8, titulo, nova_linha=True, preencher=True)
+        self._salto(2)
+        self._cor_texto(0, 0, 0)
+
+    def _linha_info(self, rotulo, chave):
+        self._fonte('B', 10)
+        self._celula(30, 7, f" {rotulo}:")
+        self._fonte('', 10)
+        self._celula(0, 7, lambda dados, checklist: f" {dados[chave]}", nova_linha=True)
+
+    def _compilar(self):
+        # Cabeçalho
+        self._y += 5
+        self._fonte('B', 16)
+        self._cor_texto(0, 51, 102) # Azul Mirasol
+        self._celula(0, 10, 'TERMO DE RESPONSABILIDADE', alinhamento='C', nova_linha=True)
+        self._fonte('I', 10)
+        self._cor_texto(227, 6, 19) # Vermelho Mirasol
+        self._celula(0, 5, 'PROTOCOLO DE RECEBIMENTO E DEVOLUÇÃO', alinhamento='C', nova_linha=True)
+        self._salto(10)
+
+        self._fonte('B', 10)
+        self._celula(95, 7, lambda dados, checklist: f"CÓDIGO: {dados['protocolo']}", borda=1, alinhamento='C')
+        self._celula(95, 7, lambda dados, checklist: f"DATA: {dados['data_movimentacao']}", borda=1, alinhamento='C', nova_linha=True)
+        self._salto(5)
+
+        self._titulo_secao('DADOS DO COLABORADOR')
+        for rotulo, chave in (('NOME', 'nome_completo'), ('CPF', 'cpf'), ('SETOR', 'nome_setor'), ('EMAIL', 'gmail')):
+            self._linha_info(rotulo, chave)
+        self._salto(5)
+
+        self._titulo_secao('DADOS DO SMARTPHONE')
+        for rotulo, chave in (('MARCA', 'nome_marca'), ('MODELO', 'nome_modelo'), ('IMEI 1', 'imei1'), ('IMEI 2', 'imei2')):
+            self._linha_info(rotulo, chave)
+        self._salto(5)
+
+        self._titulo_secao('DOCUMENTAÇÃO')
+        self._fonte('', 8)
+        self._paragrafo_justificado(4, TEXTO_DOCUMENTACAO)
+        self._salto(5)
+
+        self._titulo_secao('CHECKLIST DE RECEBIMENTO')
+        self._fonte('B', 10)
+        self._celula(95, 6, 'ITEM', borda='B')
+        self._celula(47.5, 6, 'ENTREGA', borda='B', alinhamento='C')
+        self._celula(47.5, 6, 'ESTADO', borda='B', alinhamento='C', nova_linha=True)
+        self._fonte('', 10)
+        for item in ITENS_CHECKLIST:
+            self._celula(95, 6, item, borda='B')
+            self._celula(47.5, 6, lambda dados, checklist, item=item: 'SIM' if checklist[item]['entregue'] else 'NÃO', borda='B', alinhamento='C')
+            self._celula(47.5, 6, lambda dados, checklist, item=item: checklist[item]['estado'], borda='B', alinhamento='C', nova_linha=True)
+        self._salto(20)
+
+        self._celula(0, 10, '_________________________________________', alinhamento='C', nova_linha=True)
+        self._celula(0, 5, lambda dados, checklist: dados['nome_completo'], alinhamento='C', nova_linha=True)
+
+        # Rodapé (o termo tem sempre uma única página)
+        self._x, self._y = self._medidor.l_margin, self._medidor.h - 15
+        self._fonte('I', 8)
+        self._cor_texto(128, 128, 128)
+        self._celula(0, 10, 'Página 1', alinhamento='C')
+
+    # --- Renderização ---
+
+    def renderizar(self, dados, checklist_data):
+        """Desenha as primitivas compiladas com os dados de um colaborador e devolve os bytes do PDF."""
+        pdf = fpdf.FPDF()
+        pdf.set_auto_page_break(auto=False)
+        pdf.add_page()
+        for operacao, *args in self.operacoes:
+            if operacao == 'texto':
+                pdf.text(*args)
+            elif operacao == 'campo':
+                x, y, largura, alinhamento, funcao = args
+                texto = str(funcao(dados, checklist_data))
+                if alinhamento == 'C':
+                    x += (largura - pdf.get_string_width(texto)) / 2
+                else:
+                    x += pdf.c_margin
+                pdf.text(x, y, texto)
+            elif operacao == 'fonte':
+                pdf.set_font(FONTE, *args)
+            elif operacao == 'cor_texto':
+                pdf.set_text_color(*args)
+            elif operacao == 'cor_preenchimento':
+                pdf.set_fill_color(*args)
+            elif operacao == 'retangulo':
+                pdf.rect(*args)
+            elif operacao == 'linha':
+                pdf.line(*args)
+        return bytes(pdf.output())
+
+@lru_cache(maxsize=1)
+def obter_template():
+    """Template compilado, partilhado por todas as renderizações do processo."""
+    return TemplateTermo()
+
+def gerar_pdf_termo(dados, checklist_data):
+    return obter_template().renderizar(dados, checklist_data)
+
+def checklist_padrao(itens_entregues=ITENS_CHECKLIST, estado="NOVO NA CAIXA"):
+    """Checklist com o mesmo estado para todos os itens (usado na geração em lote)."""
+    return {item: {'entregue': item in itens_entregues, 'estado': estado} for item in ITENS_CHECKLIST}
+
+def nome_ficheiro_termo(dados):
+    """Nome do PDF dentro do ZIP; o protocolo garante que é único no lote."""
+    nome = re.sub(r'[^\w\-]+', '_', str(dados['nome_completo'])).strip('_')
+    return f"Termo_{dados['protocolo']}_{nome}.pdf"
+
+# --- Funções do DB ---
+_CONSULTA_DADOS_TERMO = """
+    SELECT
+        c.nome_completo, c.cpf, s.nome_setor, c.gmail, c.codigo as codigo_colaborador,
+        m.nome_marca, mo.nome_modelo, a.imei1, a.imei2,
+        h.id as protocolo, h.data_movimentacao
+    FROM historico_movimentacoes h
+    JOIN colaboradores c ON h.colaborador_id = c.id
+    JOIN setores s ON c.setor_id = s.id
+    JOIN aparelhos a ON h.aparelho_id = a.id
+    JOIN modelos mo ON a.modelo_id = mo.id
+    JOIN marcas m ON mo.marca_id = m.id
+"""
+
+def buscar_dados_termo(mov_id):
+    conn = get_db_connection()
+    dados = conn.execute(_CONSULTA_DADOS_TERMO + " WHERE h.id = ?", (mov_id,)).fetchone()
+    conn.close()
+    return dict(dados) if dados else None
+
+def buscar_entregas_para_lote(data_inicio=None, data_fim=None, setor_id=None, mov_ids=None):
+    """
+    Devolve os dados dos termos das entregas ('Em uso') que correspondem aos filtros,
+    já com a data formatada como no termo individual.
+    """
+    conn = get_db_connection()
+    where_clauses = ["h.status_id = ?"]
+    params = [status_id('Em uso', conn)]
+
+    if mov_ids:
+        where_clauses.append(f"h.id IN ({', '.join('?' for _ in mov_ids)})")
+        params.extend(mov_ids)
+    if data_inicio:
+        where_clauses.append("date(h.data_movimentacao) >= ?")
+        params.append(data_inicio.isoformat())
+    if data_fim:
+        where_clauses.append("date(h.data_movimentacao) <= ?")
+        params.append(data_fim.isoformat())
+    if setor_id:
+        where_clauses.append("c.setor_id = ?")
+        params.append(setor_id)
+
+    linhas = conn.execute(
+        _CONSULTA_DADOS_TERMO + " WHERE " + " AND ".join(where_clauses) + " ORDER BY h.data_movimentacao, h.id",
+        params
+    ).fetchall()
+    conn.close()
+
+    termos = []
+    for linha in linhas:
+        dados = dict(linha)
+        dados['data_movimentacao'] = datetime.fromisoformat(dados['data_movimentacao']).strftime('%d/%m/%Y')
+        termos.append(dados)
+    return termos
+
+# --- Arquivo de Termos (endereçado por conteúdo) ---
+# Cada PDF gerado é guardado em PASTA_ARQUIVO com o nome igual ao hash dos dados,
+# do checklist e da versão do template. Gerar de novo o mesmo termo devolve o
+# ficheiro já existente, e a tabela 'termos_gerados' liga cada ficheiro à
+# movimentação a que pertence, para consulta posterior (auditoria).
+
+# Incrementar sempre que o layout do TemplateTermo mudar, para não servir PDFs antigos
+TEMPLATE_VERSAO = 1
+PASTA_ARQUIVO = os.environ.get('ASSETFLOW_ARQUIVO_TERMOS', 'arquivo_termos')
+
+def chave_termo(dados, checklist_data):
+    """Hash SHA-256 do conteúdo do termo (os valores são comparados como aparecem no PDF)."""
+    conteudo = {
+        'template': TEMPLATE_VERSAO,
+        'dados': {chave: str(valor) for chave, valor in dados.items()},
+        'checklist': checklist_data,
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+def caminho_arquivo(chave):
+    return os.path.join(PASTA_ARQUIVO, chave[:2], f"{chave}.pdf")
+
+def ler_termo_arquivado(chave):
+    """Devolve os bytes de um termo arquivado, ou None se não existir."""
+    try:
+        with open(caminho_arquivo(chave), 'rb') as ficheiro:
+            return ficheiro.read()
+    except FileNotFoundError:
+        return None
+
+def _guardar_no_arquivo(chave, pdf_bytes):
+    """Escreve o PDF num ficheiro temporário e move-o, para nunca deixar ficheiros parciais."""
+    caminho = caminho_arquivo(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as ficheiro:
+        ficheiro.write(pdf_bytes)
+    os.replace(temporario, caminho)
+
+def registar_termos(registos, gerado_por=None, checklist_data=None):
+    """
+    Liga termos arquivados às movimentações. 'registos' é uma lista de (movimentacao_id, chave).
+    Com 'checklist_data', guarda também o checklist de entrega de cada movimentação em
+    'checklist_itens' (tipo 'entrega'), para comparar com o estado na devolução.
+    """
+    if not registos:
+        return
+    conn = get_db_connection()
+    agora = datetime.now()
+    conn.executemany(
+        "INSERT OR IGNORE INTO termos_gerados (movimentacao_id, hash_conteudo, versao_template, data_geracao, gerado_por) VALUES (?, ?, ?, ?, ?)",
+        [(mov_id, chave, TEMPLATE_VERSAO, agora, gerado_por) for mov_id, chave in registos]
+    )
+    if checklist_data:
+        conn.executemany(
+            """INSERT OR REPLACE INTO checklist_itens (movimentacao_id, tipo, item, entregue, estado, colaborador_id)
+               SELECT h.id, 'entrega', ?, ?, ?, h.colaborador_id FROM historico_movimentacoes h WHERE h.id = ?""",
+            [(item, int(bool(valores['entregue'])), valores['estado'], mov_id)
+             for mov_id, _ in registos for item, valores in checklist_data.items()]
+        )
+    conn.commit()
+    conn.close()
+
+def obter_ou_gerar_termo(dados, checklist_data, movimentacao_id, gerado_por=None):
+    """
+    Devolve (pdf_bytes, veio_do_arquivo). Um termo com o mesmo conteúdo já gerado
+    antes é lido do disco em vez de ser renderizado de novo.
+    """
+    chave = chave_termo(dados, checklist_data)
+    pdf_bytes = ler_termo_arquivado(chave)
+    veio_do_arquivo = pdf_bytes is not None
+    metricas.CACHE_PEDIDOS.inc(cache='arquivo_termos')
+    if not veio_do_arquivo:
+        metricas.CACHE_FALHAS.inc(cache='arquivo_termos')
+        inicio = time.perf_counter()
+        pdf_bytes = gerar_pdf_termo(dados, checklist_data)
+        metricas.TERMO_RENDERIZACAO_SEGUNDOS.observar(time.perf_counter() - inicio, modo='individual')
+        _guardar_no_arquivo(chave, pdf_bytes)
+    registar_termos([(movimentacao_id, chave)], gerado_por, checklist_data)
+    return pdf_bytes, veio_do_arquivo
+
+# Número máximo de termos arquivados devolvidos por pesquisa (os mais recentes primeiro)
+LIMITE_ARQUIVO = 50
+
+def listar_termos_arquivados(pesquisa=None, data_inicio=None, data_fim=None, limite=LIMITE_ARQUIVO):
+    """
+    Lista os termos arquivados mais recentes (no máximo 'limite') com a movimentação,
+    colaborador e aparelho correspondentes. 'pesquisa' é o início do nome do
+    colaborador ou do N/S, como nas pesquisas do pesquisa.py.
+    """
+    conn = get_db_connection()
+    query = """
+        SELECT
+            t.id, t.hash_conteudo, t.data_geracao, t.gerado_por, t.versao_template,
+            h.id as movimentacao_id, h.data_movimentacao,
+            c.nome_completo, a.numero_serie
+        FROM termos_gerados t
+        JOIN historico_movimentacoes h ON t.movimentacao_id = h.id
+        LEFT JOIN colaboradores c ON h.colaborador_id = c.id
+        JOIN aparelhos a ON h.aparelho_id = a.id
+    """
+    where_clauses = []
+    params = []
+    pesquisa = (pesquisa or "").strip()
+    if pesquisa:
+        padrao = pesquisa.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where_clauses.append("(c.nome_completo LIKE ? ESCAPE '\\' OR a.numero_serie LIKE ? ESCAPE '\\')")
+        params.extend([padrao, padrao])
+    # Comparação direta do texto ISO, para que o índice idx_termos_gerados_data seja usado
+    if data_inicio:
+        where_clauses.append("t.data_geracao >= ?")
+        params.append(data_inicio.isoformat())
+    if data_fim:
+        where_clauses.append("t.data_geracao < ?")
+        params.append((data_fim + timedelta(days=1)).isoformat())
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+    query += " ORDER BY t.data_geracao DESC LIMIT ?"
+    params.append(limite)
+
+    termos = conn.execute(query, params).fetchall()
+    conn.close()
+    return termos
+
+# --- Geração em Lote ---
+
+def _renderizar_termo(dados, checklist_data):
+    """Executada num processo do pool: devolve (bytes do PDF, segundos de renderização)."""
+    inicio = time.perf_counter()
+    pdf_bytes = gerar_pdf_termo(dados, checklist_data)
+    return pdf_bytes, time.perf_counter() - inicio
+
+def _contexto_processos():
+    """
+    Os processos do pool não podem nascer por fork do servidor do Streamlit (threads
+    de outras sessões, locks e conexões abertas seriam copiados a meio): usa o
+    forkserver onde existe e o spawn onde não existe (Windows).
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+_lock_main = threading.Lock()
+
+@contextmanager
+def _sem_script_da_pagina():
+    """
+    Durante a execução de uma página, o Streamlit instala o script como
+    sys.modules['__main__']; com forkserver ou spawn, cada processo novo do pool
+    voltaria a executar esse script (sem sessão) e morreria. Enquanto os processos
+    arrancam, __main__ é um módulo vazio.
+    """
+    with _lock_main:
+        main = sys.modules['__main__']
+        vazio = types.ModuleType('__main__')
+        sys.modules['__main__'] = vazio
+        try:
+            yield
+        finally:
+            # Não repõe por cima do script de uma sessão que entretanto começou
+            if sys.modules.get('__main__') is vazio:
+                sys.modules['__main__'] = main
+
+class ZipDoLote:
+    """
+    Ficheiro temporário do ZIP de um lote, guardado na sessão do Streamlit. O ficheiro
+    é apagado com 'apagar()' (novo lote), quando o objeto é recolhido por a sessão ter
+    terminado, ou quando o processo sai.
+    """
+
+    def __init__(self):
+        with tempfile.NamedTemporaryFile(prefix="termos_", suffix=".zip", delete=False) as ficheiro:
+            self.caminho = ficheiro.name
+        self.apagar = weakref.finalize(self, _remover_ficheiro, self.caminho)
+
+    def ler(self):
+        with open(self.caminho, 'rb') as ficheiro:
+            return ficheiro.read()
+
+def _remover_ficheiro(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+ERRO_POOL_AVARIADO = "Um processo de renderização terminou inesperadamente; gere este termo de novo."
+
+def gerar_lote_zip(lista_dados, checklist_data, caminho_zip, ao_progredir=None, max_processos=None, gerado_por=None):
+    """
+    Renderiza os termos num pool de processos e escreve cada PDF no ZIP assim que fica
+    pronto. No máximo 2 termos por processo estão em curso ou por escrever ao mesmo
+    tempo, por isso a memória não cresce com o tamanho do lote. Termos que já estão
+    no arquivo são copiados diretamente, sem passar pelo pool.
+
+    Se um processo do pool morrer, os termos ainda por renderizar ficam como erros e
+    o lote termina com os que já estavam prontos; os termos escritos no ZIP são
+    sempre registados em 'termos_gerados'.
+
+    'ao_progredir(concluidos, total)' é chamada depois de cada documento.
+    Devolve a lista de erros como (protocolo, nome, mensagem).
+    """
+    max_processos = max_processos or min(4, os.cpu_count() or 1)
+    limite_em_curso = max_processos * 2
+    total = len(lista_dados)
+    pendentes = iter(lista_dados)
+    em_curso = {}
+    erros = []
+    registos = []
+    concluidos = 0
+    pool_avariado = False
+
+    try:
+        with zipfile.ZipFile(caminho_zip, 'w', compression=zipfile.ZIP_DEFLATED) as zf, \
+             ProcessPoolExecutor(max_workers=max_processos, mp_context=_contexto_processos()) as executor:
+
+            def concluir(dados, chave, pdf_bytes=None, erro=None):
+                nonlocal concluidos
+                if erro is None:
+                    zf.writestr(nome_ficheiro_termo(dados), pdf_bytes)
+                    registos.append((dados['protocolo'], chave))
+                else:
+                    erros.append((dados['protocolo'], dados['nome_completo'], erro))
+                concluidos += 1
+                if ao_progredir:
+                    ao_progredir(concluidos, total)
+
+            def submeter_proximos():
+                nonlocal pool_avariado
+                while len(em_curso) < limite_em_curso:
+                    dados = next(pendentes, None)
+                    if dados is None:
+                        return
+                    chave = chave_termo(dados, checklist_data)
+                    pdf_bytes = ler_termo_arquivado(chave)
+                    metricas.CACHE_PEDIDOS.inc(cache='arquivo_termos')
+                    if pdf_bytes is not None:
+                        concluir(dados, chave, pdf_bytes)
+                        continue
+                    metricas.CACHE_FALHAS.inc(cache='arquivo_termos')
+                    if pool_avariado:
+                        concluir(dados, chave, erro=ERRO_POOL_AVARIADO)
+                        continue
+                    try:
+                        # Os processos do pool são criados (um a um) dentro de submit
+                        with _sem_script_da_pagina():
+                            em_curso[executor.submit(_renderizar_termo, dados, checklist_data)] = (dados, chave)
+                    except BrokenProcessPool:
+                        pool_avariado = True
+                        concluir(dados, chave, erro=ERRO_POOL_AVARIADO)
+
+            submeter_proximos()
+            while em_curso:
+                prontos, _ = wait(em_curso, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    dados, chave = em_curso.pop(futuro)
+                    try:
+                        pdf_bytes, segundos = futuro.result()
+                        metricas.TERMO_RENDERIZACAO_SEGUNDOS.observar(segundos, modo='lote')
+                        _guardar_no_arquivo(chave, pdf_bytes)
+                        concluir(dados, chave, pdf_bytes)
+                    except BrokenProcessPool:
+                        pool_avariado = True
+                        concluir(dados, chave, erro=ERRO_POOL_AVARIADO)
+                    except Exception as e:
+                        concluir(dados, chave, erro=str(e))
+                submeter_proximos()
+    finally:
+        registar_termos(registos, gerado_por, checklist_data)
+    return erros
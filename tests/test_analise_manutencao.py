@@ -0,0 +1,21 @@
+import sqlite3
+
+import analise_manutencao
+from setup_database import configurar_banco
+
+def test_calcular_sem_manutencoes(tmp_path):
+    """Instalação nova (sem O.S.): os indicadores são tabelas vazias, sem erro."""
+    caminho = str(tmp_path / 'inventario.db')
+    configurar_banco(caminho)
+    conn = sqlite3.connect(caminho)
+    try:
+        df = analise_manutencao.carregar_manutencoes(conn)
+    finally:
+        conn.close()
+
+    assert df.empty
+    analise = analise_manutencao.calcular(df)
+
+    assert set(analise) == {'tempos_fornecedor', 'envelhecimento', 'custo_modelo', 'custo_setor', 'reincidencia', 'mtbf'}
+    assert all(tabela.empty for tabela in analise.values())
+    assert list(analise['tempos_fornecedor'].columns[-3:]) == ['p50 (dias)', 'p90 (dias)', 'p95 (dias)']
@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+
+from reconciliacao import ler_contagem
+
+def _xlsx(df, **opcoes):
+    arquivo = io.BytesIO()
+    df.to_excel(arquivo, index=False, **opcoes)
+    arquivo.seek(0)
+    return arquivo
+
+def test_csv_com_cabecalho():
+    contagem = ler_contagem(io.BytesIO(b"codigo;local;colaborador\n sn001 ;Mesa;Ana\nSN002;;\n"), 'contagem.csv')
+    assert contagem['codigo'].tolist() == ['SN001', 'SN002']
+    assert contagem['linha'].tolist() == [2, 3]
+    assert contagem.loc[0, 'localizacao'] == 'Mesa' and contagem.loc[0, 'colaborador'] == 'Ana'
+
+def test_csv_sem_cabecalho_mantem_primeiro_codigo():
+    contagem = ler_contagem(io.BytesIO(b"SN001\nSN002\nSN003\n"), 'scanner.csv')
+    assert contagem['codigo'].tolist() == ['SN001', 'SN002', 'SN003']
+    assert contagem['linha'].tolist() == [1, 2, 3]
+
+def test_xlsx_sem_cabecalho_mantem_primeiro_codigo():
+    arquivo = _xlsx(pd.DataFrame({0: ['SN001', 'SN002']}), header=False)
+    assert ler_contagem(arquivo, 'scanner.xlsx')['codigo'].tolist() == ['SN001', 'SN002']
+
+def test_xlsx_com_cabecalho():
+    arquivo = _xlsx(pd.DataFrame({'numero_serie': ['SN001'], 'responsavel': ['1001']}))
+    contagem = ler_contagem(arquivo, 'contagem.xlsx')
+    assert contagem['codigo'].tolist() == ['SN001'] and contagem['colaborador'].tolist() == ['1001']